@@ -0,0 +1,131 @@
+"""
+fixtures.py
+
+Deterministic benchmark inputs, generated on first use into benchmarks/.fixtures
+(git-ignored): speech-like WAV audio of several lengths and SRT transcripts from
+a few KB to tens of MB, either clean Whisper-style cues or YouTube-style rolling
+auto captions (each cue repeats the previous line and adds a few words).
+"""
+import os
+import random
+import wave
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent / ".fixtures"
+
+SAMPLE_RATE = 16000
+
+_WORDS = (
+    "the a of and to in that is it for on with as this we you be are at have not by but from or "
+    "model audio transcript summary video speaker question answer point example system data time "
+    "first next really think going know right people thing actually important because about just"
+).split()
+
+
+def _path(name: str) -> Path:
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    return FIXTURE_DIR / name
+
+
+def audio_fixture(seconds: int) -> Path:
+    """16 kHz mono WAV of SECONDS: tone bursts with noise, separated by short silences."""
+    import numpy as np
+
+    path = _path(f"audio-{seconds}s.wav")
+    if path.exists():
+        return path
+    rng = np.random.RandomState(seconds)
+    tmp = path.with_suffix(".tmp")
+    with wave.open(str(tmp), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        t = np.arange(SAMPLE_RATE, dtype=np.float32) / SAMPLE_RATE
+        for second in range(seconds):
+            if second % 7 == 6:
+                block = np.zeros(SAMPLE_RATE, dtype=np.float32)
+            else:
+                freq = 120 + 80 * rng.rand()
+                block = 0.3 * np.sin(2 * np.pi * freq * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+                block += 0.02 * rng.randn(SAMPLE_RATE).astype(np.float32)
+            wf.writeframes((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def _ts(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    h, rem = divmod(ms, 3600_000)
+    m, rem = divmod(rem, 60_000)
+    s, ms = divmod(rem, 1000)
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+
+def _sentence(rng: random.Random, lo: int, hi: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(lo, hi)))
+
+
+def _clean_cues(rng: random.Random):
+    """Whisper-style cues: one sentence each, back to back."""
+    t = 0.0
+    index = 1
+    while True:
+        dur = rng.uniform(1.5, 6.0)
+        yield f"{index}\n{_ts(t)} --> {_ts(t + dur)}\n{_sentence(rng, 5, 16)}\n\n"
+        t += dur
+        index += 1
+
+
+def _rolling_cues(rng: random.Random):
+    """YouTube auto-caption style: two-line cues where line 1 repeats the previous line 2."""
+    t = 0.0
+    index = 1
+    previous = _sentence(rng, 3, 6)
+    while True:
+        current = _sentence(rng, 3, 6)
+        # Short "commit" cue holding the previous text, then the rolling two-line cue
+        yield f"{index}\n{_ts(t)} --> {_ts(t + 0.01)}\n{previous}\n\n"
+        index += 1
+        dur = rng.uniform(1.0, 3.0)
+        yield f"{index}\n{_ts(t + 0.01)} --> {_ts(t + dur)}\n{previous}\n{current}\n\n"
+        index += 1
+        t += dur
+        previous = current
+
+
+def srt_fixture(kind: str, size_bytes: int) -> Path:
+    """SRT of roughly SIZE_BYTES; KIND is 'clean' or 'rolling'."""
+    generators = {"clean": _clean_cues, "rolling": _rolling_cues}
+    path = _path(f"{kind}-{size_bytes}.srt")
+    if path.exists():
+        return path
+    rng = random.Random(f"{kind}-{size_bytes}")
+    tmp = path.with_suffix(".tmp")
+    written = 0
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        for cue in generators[kind](rng):
+            f.write(cue)
+            written += len(cue)
+            if written >= size_bytes:
+                break
+    os.replace(tmp, path)
+    return path
+
+
+def segments_fixture(count: int) -> list:
+    """COUNT Whisper-style segment dicts, as model.transcribe() returns them."""
+    rng = random.Random(count)
+    t = 0.0
+    segments = []
+    for _ in range(count):
+        dur = rng.uniform(1.5, 6.0)
+        segments.append({"start": t, "end": t + dur, "text": " " + _sentence(rng, 5, 16)})
+        t += dur
+    return segments
+
+
+def size_label(size_bytes: int) -> str:
+    for unit, scale in (("MB", 1 << 20), ("KB", 1 << 10)):
+        if size_bytes >= scale:
+            return f"{size_bytes // scale}{unit}"
+    return f"{size_bytes}B"
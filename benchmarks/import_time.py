@@ -0,0 +1,79 @@
+"""
+import_time.py
+
+Startup regression check: importing the CLI (and the modules a transcript-only
+run touches) must stay under a time budget and must not pull in heavy
+dependencies or load the configuration. Each measurement runs in a fresh
+interpreter; the best of several runs is compared with the budget.
+
+    python benchmarks/import_time.py [--budget-ms 120] [--runs 5]
+
+Exits non-zero when the budget is exceeded or a heavy module is imported.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that only the code paths needing them may import
+HEAVY = ("requests", "urllib3", "dotenv", "tomllib", "tomli", "anthropic", "whisper", "torch", "numpy", "yt_dlp")
+
+# What a plain `video-processor --version` or transcript run imports up front
+ENTRY_MODULES = ("video_processor.cli", "video_processor.pipeline", "video_processor.llm_client")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - t0
+import video_processor.config as config
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+    "settings_loaded": config._settings is not None,
+}}))
+"""
+
+
+def measure(modules, runs: int) -> dict:
+    """Best-of-RUNS import time for MODULES, each run in a new interpreter."""
+    code = _PROBE.format(modules=tuple(modules), heavy=HEAVY)
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    best = None
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True, env=env, cwd=str(ROOT)
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=120.0, help="maximum import time in milliseconds")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per measurement (best is kept)")
+    args = parser.parse_args(argv)
+
+    result = measure(ENTRY_MODULES, args.runs)
+    print(f".. Import of {', '.join(ENTRY_MODULES)}: {result['ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failures = []
+    if result["ms"] > args.budget_ms:
+        failures.append(f"import took {result['ms']:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if result["heavy"]:
+        failures.append(f"heavy modules imported at startup: {', '.join(result['heavy'])}")
+    if result["settings_loaded"]:
+        failures.append("configuration was loaded at import time")
+    for failure in failures:
+        print(f"** {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+run.py
+
+Offline benchmark suite for the pipeline's hot paths. Everything runs locally:
+fixtures are generated on first use (see fixtures.py), LLM calls go to a stub
+server (see stub_llm.py), and caches live in a throwaway directory.
+
+    python benchmarks/run.py [--quick] [--only srt_parse,llm_chat] [--compare [RESULTS.json]]
+
+Benchmarks:
+    srt_parse      srt_to_timestamped_lines throughput on clean and rolling-caption SRT, with the
+                   speedup over the original srt.parse implementation
+    srt_compose    SrtWriter cost for Whisper segments (srt.compose shown for reference)
+    ffmpeg_decode  converter.load_audio on WAV fixtures (skipped without ffmpeg)
+    compaction     rolling-caption compaction time and token reduction
+    prompt_build   build_prompt on timestamped transcripts of several sizes
+    llm_chat       llm_client.chat overhead per backend against the stub, and a cache hit
+    import_time    CLI import time in a fresh interpreter
+
+Results are written to benchmarks/results/<version>_<timestamp>.json. With
+--compare, each metric is checked against the newest earlier result (or the
+given file) and changes beyond --threshold are flagged; --fail-on-regression
+turns flagged regressions into a non-zero exit status.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH_DIR))
+
+import fixtures  # noqa: E402
+
+SRT_SIZES = (4 << 10, 512 << 10, 8 << 20, 32 << 20)
+SEGMENT_COUNTS = (100, 2000, 20000)
+AUDIO_SECONDS = (30, 300, 1800)
+LLM_BACKENDS = (
+    # (name, backend, model); the model picks the OpenAI API flavour
+    ("ollama", "ollama", "bench"),
+    ("openai-chat", "openai", "gpt-4o-mini"),
+    ("openai-responses", "openai", "gpt-5-mini"),
+    ("anthropic", "anthropic", "claude-bench"),
+)
+
+BENCHMARKS = ("srt_parse", "srt_compose", "ffmpeg_decode", "compaction", "prompt_build", "llm_chat", "llm_rate_limit", "import_time")
+
+
+def _quiet():
+    """Silence the pipeline's console output while timing."""
+    stack = contextlib.ExitStack()
+    stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+    stack.enter_context(contextlib.redirect_stderr(io.StringIO()))
+    return stack
+
+
+def _measure(fn, repeat: int, min_time: float = 0.0) -> list:
+    """Wall times of REPEAT calls of FN (more while their total is under MIN_TIME)."""
+    times = []
+    while len(times) < repeat or sum(times) < min_time:
+        start = time.perf_counter()
+        with _quiet():
+            fn()
+        times.append(time.perf_counter() - start)
+        if len(times) >= repeat * 20:
+            break
+    return times
+
+
+def _metric(value: float, unit: str, better: str, times: list = None, **extra) -> dict:
+    metric = {"value": value, "unit": unit, "better": better}
+    if times:
+        metric["runs"] = len(times)
+        metric["spread"] = (max(times) - min(times)) / min(times) if min(times) else 0.0
+    metric.update(extra)
+    return metric
+
+
+def _legacy_srt_to_timestamped_lines(srt_text: str) -> str:
+    """The srt.parse-based parser this suite started with, kept as the speedup reference."""
+    import srt
+
+    lines = []
+    for sub in list(srt.parse(srt_text)):
+        hours, remainder = divmod(int(sub.start.total_seconds()), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        lines.append(f"[{hours:02}:{minutes:02}:{seconds:02}] {' '.join(sub.content.splitlines())}")
+    return "\n".join(lines)
+
+
+def bench_srt_parse(quick: bool, repeat: int) -> dict:
+    from video_processor.srt_parser import srt_to_timestamped_lines
+
+    results = {}
+    for kind in ("clean", "rolling"):
+        for size in SRT_SIZES[:2] if quick else SRT_SIZES:
+            path = fixtures.srt_fixture(kind, size)
+            text = path.read_text(encoding="utf-8")
+            runs = repeat if size < (8 << 20) else 1
+            mb = len(text.encode("utf-8")) / (1 << 20)
+            times = _measure(lambda: srt_to_timestamped_lines(text), runs, 0.2)
+            legacy = min(_measure(lambda: _legacy_srt_to_timestamped_lines(text), runs, 0.2))
+            label = f"{kind}/{fixtures.size_label(size)}"
+            results[f"srt_parse/{label}"] = _metric(
+                mb / min(times), "MB/s", "higher", times, seconds=min(times), speedup_vs_srt_parse=legacy / min(times)
+            )
+    return results
+
+
+def bench_srt_compose(quick: bool, repeat: int) -> dict:
+    from datetime import timedelta
+
+    import srt
+    from video_processor.converter import SrtWriter
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.srt"
+        for count in SEGMENT_COUNTS[:2] if quick else SEGMENT_COUNTS:
+            segments = fixtures.segments_fixture(count)
+
+            def write():
+                with SrtWriter(path) as writer:
+                    writer.add_segments(segments)
+
+            def compose():
+                subs = [
+                    srt.Subtitle(i + 1, timedelta(seconds=s["start"]), timedelta(seconds=s["end"]), s["text"].strip())
+                    for i, s in enumerate(segments)
+                ]
+                return srt.compose(subs)
+
+            times = _measure(write, repeat, 0.2)
+            reference = min(_measure(compose, repeat, 0.2))
+            results[f"srt_compose/{count}"] = _metric(
+                min(times), "s", "lower", times, per_segment_us=min(times) / count * 1e6, srt_compose=reference
+            )
+    return results
+
+
+def bench_ffmpeg_decode(quick: bool, repeat: int) -> dict:
+    if not shutil.which("ffmpeg"):
+        print(".. ffmpeg_decode: skipped (ffmpeg not on PATH)")
+        return {}
+    from video_processor.converter import load_audio
+
+    results = {}
+    for seconds in AUDIO_SECONDS[:1] if quick else AUDIO_SECONDS:
+        path = str(fixtures.audio_fixture(seconds))
+        times = _measure(lambda: load_audio(path), repeat if seconds < 600 else 1)
+        results[f"ffmpeg_decode/{seconds}s"] = _metric(
+            min(times), "s", "lower", times, realtime_factor=seconds / min(times)
+        )
+    return results
+
+
+def bench_compaction(quick: bool, repeat: int) -> dict:
+    from video_processor.compaction import compact_transcript
+
+    results = {}
+    for size in SRT_SIZES[:2] if quick else SRT_SIZES[:3]:
+        raw = fixtures.srt_fixture("rolling", size).read_text(encoding="utf-8")
+        _, report = compact_transcript(raw, "auto")
+        times = _measure(lambda: compact_transcript(raw, "auto"), repeat, 0.2)
+        results[f"compaction/rolling/{fixtures.size_label(size)}"] = _metric(
+            min(times), "s", "lower", times,
+            tokens_before=report["tokens_before"], tokens_after=report["tokens_after"],
+        )
+    return results
+
+
+def bench_prompt_build(quick: bool, repeat: int) -> dict:
+    from video_processor.pipeline import build_prompt, timestamped_transcript
+
+    results = {}
+    for size in SRT_SIZES[:2] if quick else SRT_SIZES[:3]:
+        raw = fixtures.srt_fixture("clean", size).read_text(encoding="utf-8")
+        timestamped = timestamped_transcript(raw, True)
+        times = _measure(lambda: build_prompt(timestamped), repeat, 0.2)
+        results[f"prompt_build/{fixtures.size_label(size)}"] = _metric(min(times), "s", "lower", times)
+    return results
+
+
+def bench_llm_chat(quick: bool, repeat: int) -> dict:
+    from stub_llm import StubLLMServer
+    from video_processor import llm_client
+    from video_processor.config import override_settings
+
+    results = {}
+    calls = max(3, repeat if quick else repeat * 4)
+    with StubLLMServer(tokens=200) as stub:
+        override_settings(OLLAMA_URL=stub.url, OPENAI_BASE_URL=stub.url + "/v1", OPENAI_API_KEY="bench")
+        os.environ["ANTHROPIC_BASE_URL"] = stub.url
+        os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+        prompt = "Summarize the transcript.\n" + "[00:00:01] word " * 2000
+        for name, backend, model in LLM_BACKENDS:
+            if backend == "anthropic" and importlib.util.find_spec("anthropic") is None:
+                print(".. llm_chat/anthropic: skipped (anthropic SDK not installed)")
+                continue
+
+            def call():
+                text, _ = llm_client.chat(prompt, model=model, backend=backend, use_cache=False)
+                assert text, f"empty response from stub ({name})"
+
+            call()  # warm the session / client
+            times = _measure(call, calls)
+            results[f"llm_chat/{name}"] = _metric(statistics.median(times), "s", "lower", times, best=min(times))
+
+        # Cache-hit path: key hashing plus a disk read
+        llm_client.chat(prompt, model="bench", backend="ollama")
+        times = _measure(lambda: llm_client.chat(prompt, model="bench", backend="ollama"), calls * 4)
+        results["llm_chat/cache-hit"] = _metric(statistics.median(times), "s", "lower", times, best=min(times))
+    return results
+
+
+def bench_llm_rate_limit(quick: bool, repeat: int) -> dict:
+    """Many concurrent chats against a stub that rejects more than 2 requests in flight with 429."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from stub_llm import StubLLMServer
+    from video_processor import llm_client, llm_http
+    from video_processor.config import override_settings
+
+    calls = 16 if quick else 48
+    with StubLLMServer(tokens=200, first_token_delay=0.02, max_in_flight=2) as stub:
+        override_settings(OLLAMA_URL=stub.url, LLM_MAX_CONCURRENCY=8, LLM_MAX_RETRIES=20)
+        llm_http._limiters.clear()
+        llm_http._slots.clear()
+        prompt = "Summarize the transcript.\n" + "[00:00:01] word " * 200
+
+        def call(i):
+            text, _ = llm_client.chat(f"{i} {prompt}", model="bench-limited", backend="ollama", use_cache=False)
+            assert text, "empty response from stub"
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(call, range(calls)))
+            elapsed = time.perf_counter() - start
+        limiter = llm_http.rate_limiter("ollama", "bench-limited")
+        print(f".. llm_rate_limit: {calls} calls, {stub.rejected} rejected with 429, concurrency settled at {int(limiter.limit)}")
+    return {
+        "llm_rate_limit/throughput": _metric(calls / elapsed, "calls/s", "higher"),
+        "llm_rate_limit/rejected": _metric(stub.rejected / calls, "429s/call", "lower"),
+    }
+
+
+def bench_import_time(quick: bool, repeat: int) -> dict:
+    import import_time
+
+    result = import_time.measure(import_time.ENTRY_MODULES, 3 if quick else 5)
+    return {"import_time/cli": _metric(result["ms"] / 1000, "s", "lower", heavy=result["heavy"])}
+
+
+def _version() -> str:
+    from video_processor.cli import _pkg_version
+
+    return str(_pkg_version)
+
+
+def latest_result(exclude: Path = None) -> Path:
+    """Newest results file other than EXCLUDE, or None."""
+    if not RESULTS_DIR.is_dir():
+        return None
+    candidates = sorted((p for p in RESULTS_DIR.glob("*.json") if p != exclude), key=lambda p: p.stat().st_mtime)
+    return candidates[-1] if candidates else None
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Print per-metric changes against BASELINE; returns the names that regressed beyond THRESHOLD."""
+    regressions = []
+    print(f".. Compared with {baseline.get('version')} ({baseline.get('timestamp')}):")
+    for name, metric in current["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if not old or not old.get("value") or old.get("unit") != metric["unit"]:
+            continue
+        change = metric["value"] / old["value"] - 1.0
+        # Positive 'worse' means slower (for times) or lower throughput
+        worse = change if metric["better"] == "lower" else -change
+        flag = ""
+        if worse > threshold:
+            flag = "  ** REGRESSION"
+            regressions.append(name)
+        elif worse < -threshold:
+            flag = "  (improved)"
+        print(f"..   {name:<34} {old['value']:12.6g} -> {metric['value']:12.6g} {metric['unit']:<5} {change:+7.1%}{flag}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for video-processor hot paths")
+    parser.add_argument("--quick", action="store_true", help="small fixtures and fewer runs")
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=None, help="runs per measurement (best or median is kept)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<version>_<timestamp>.json)")
+    parser.add_argument("--no-save", action="store_true", help="do not write a results file")
+    parser.add_argument("--compare", nargs="?", const="latest", help="compare with RESULTS.json (default: newest saved)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 if --compare finds a regression")
+    args = parser.parse_args(argv)
+
+    selected = BENCHMARKS
+    if args.only:
+        selected = tuple(b.strip() for b in args.only.split(",") if b.strip())
+        unknown = [b for b in selected if b not in BENCHMARKS]
+        if unknown:
+            parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    repeat = args.repeat or (3 if args.quick else 7)
+
+    # Keep the user's caches out of it; must be set before settings are first loaded
+    cache_dir = tempfile.mkdtemp(prefix="vp-bench-cache-")
+    os.environ["VP_CACHE_DIR"] = cache_dir
+
+    run = {
+        "version": _version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "quick": args.quick,
+        "results": {},
+    }
+    try:
+        for name in selected:
+            print(f"== {name}")
+            t0 = time.perf_counter()
+            results = globals()[f"bench_{name}"](args.quick, repeat)
+            for key, metric in results.items():
+                print(f"..   {key:<34} {metric['value']:12.6g} {metric['unit']}")
+            print(f".. {name} done in {time.perf_counter() - t0:.1f}s")
+            run["results"].update(results)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    path = None
+    if not args.no_save:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = Path(args.output) if args.output else RESULTS_DIR / f"{run['version']}_{stamp}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f".. Results written to {path}")
+
+    if args.compare:
+        baseline_path = latest_result(exclude=path) if args.compare == "latest" else Path(args.compare)
+        if baseline_path is None:
+            print(".. No earlier results to compare with")
+            return 0
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(run, baseline, args.threshold)
+        if regressions:
+            print(f"** {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            if args.fail_on_regression:
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+stub_llm.py
+
+Offline stand-in for the LLM backends: one localhost HTTP server that streams a
+fixed response in the wire format of each API llm_client speaks:
+
+    POST /v1/chat/completions   Ollama and OpenAI Chat Completions (SSE chunks + usage)
+    POST /v1/responses          OpenAI Responses API (typed SSE events)
+    POST /v1/messages           Anthropic Messages (SSE events, for the SDK via ANTHROPIC_BASE_URL)
+    POST /api/chat              Ollama native chat (NDJSON lines with Ollama's timings)
+
+Responses are TOKENS words long and sent without artificial delay, so a client
+benchmark measures llm_client's own overhead (connection reuse, SSE parsing,
+callbacks) rather than model speed. Optional FIRST_TOKEN_DELAY simulates TTFT,
+MAX_IN_FLIGHT a provider quota: requests beyond it get 429 with Retry-After
+and x-ratelimit-* headers, and LOAD_DELAY an Ollama model load, paid when an
+/api/chat request names a model or num_ctx other than the one loaded.
+
+    python benchmarks/stub_llm.py [--port 18080] [--tokens 200] [--max-in-flight 2]
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Events are many small writes; without TCP_NODELAY, Nagle and delayed ACKs add ~40 ms stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _words(self):
+        n = self.server.tokens
+        return [f"word{i % 50} " for i in range(n)]
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if self.server.first_token_delay:
+            time.sleep(self.server.first_token_delay)
+
+    def _send(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+    def _event(self, payload: dict, event: str = None):
+        head = f"event: {event}\n".encode() if event else b""
+        self._send(head + b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _reject(self):
+        body = b'{"error": {"message": "Rate limit reached", "type": "rate_limit_error"}}'
+        self.send_response(429)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("retry-after-ms", "50")
+        self.send_header("x-ratelimit-remaining-requests", "0")
+        self.send_header("x-ratelimit-reset-requests", "50ms")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _ollama_chat(self, request: dict, prompt_tokens: int, words: list):
+        server = self.server
+        model = (request.get("model"), (request.get("options") or {}).get("num_ctx"))
+        t_load = time.perf_counter()
+        with server.lock:
+            # Ollama loads one model at a time here and reloads it when num_ctx changes
+            if server.loaded != model:
+                server.loads += 1
+                if server.load_delay:
+                    time.sleep(server.load_delay)
+                server.loaded = model
+        load_ns = int((time.perf_counter() - t_load) * 1e9)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if not request.get("messages"):
+            # An empty message list only loads the model
+            self._send(json.dumps({"model": model[0], "done": True, "done_reason": "load"}).encode() + b"\n")
+            self._end_stream()
+            return
+        if server.first_token_delay:
+            time.sleep(server.first_token_delay)
+        t_eval = time.perf_counter()
+        for w in words:
+            self._send(json.dumps({"model": model[0], "message": {"role": "assistant", "content": w}, "done": False}).encode() + b"\n")
+        self._send(json.dumps({
+            "model": model[0], "message": {"role": "assistant", "content": ""}, "done": True, "done_reason": "stop",
+            "load_duration": load_ns, "prompt_eval_count": prompt_tokens, "prompt_eval_duration": 1_000_000,
+            "eval_count": len(words), "eval_duration": int((time.perf_counter() - t_eval) * 1e9),
+        }).encode() + b"\n")
+        self._end_stream()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            if server.max_in_flight and server.in_flight >= server.max_in_flight:
+                server.rejected += 1
+                admitted = False
+            else:
+                server.in_flight += 1
+                admitted = True
+        if not admitted:
+            self._reject()
+            return
+        try:
+            self._respond(body, length)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _respond(self, body: bytes, length: int):
+        self.server.requests += 1
+        # Rough usage with a simulated prefix cache: a repeated request body counts as fully cached
+        prompt_tokens = length // 4
+        cached = prompt_tokens if body in self.server.seen else 0
+        self.server.seen.add(body)
+        words = self._words()
+        if self.path == "/api/chat":
+            self._ollama_chat(json.loads(body), prompt_tokens, words)
+        elif self.path.endswith("/chat/completions"):
+            self._start_stream()
+            for w in words:
+                self._event({"choices": [{"index": 0, "delta": {"content": w}, "finish_reason": None}]})
+            self._event({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            self._event({"choices": [], "usage": {
+                "prompt_tokens": prompt_tokens, "completion_tokens": len(words),
+                "prompt_tokens_details": {"cached_tokens": cached},
+            }})
+            self._send(b"data: [DONE]\n\n")
+            self._end_stream()
+        elif self.path.endswith("/responses"):
+            self._start_stream()
+            for w in words:
+                self._event({"type": "response.output_text.delta", "delta": w}, "response.output_text.delta")
+            self._event(
+                {"type": "response.completed",
+                 "response": {"status": "completed", "usage": {
+                     "input_tokens": prompt_tokens, "output_tokens": len(words),
+                     "input_tokens_details": {"cached_tokens": cached},
+                 }}},
+                "response.completed",
+            )
+            self._end_stream()
+        elif self.path.endswith("/messages"):
+            self._start_stream()
+            message = {
+                "id": "msg_stub", "type": "message", "role": "assistant", "model": "stub", "content": [],
+                "stop_reason": None, "stop_sequence": None, "usage": {
+                    "input_tokens": prompt_tokens - cached, "output_tokens": 0,
+                    "cache_read_input_tokens": cached, "cache_creation_input_tokens": prompt_tokens - cached,
+                },
+            }
+            self._event({"type": "message_start", "message": message}, "message_start")
+            self._event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+                        "content_block_start")
+            for w in words:
+                self._event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": w}},
+                            "content_block_delta")
+            self._event({"type": "content_block_stop", "index": 0}, "content_block_stop")
+            self._event({"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                         "usage": {"output_tokens": len(words)}}, "message_delta")
+            self._event({"type": "message_stop"}, "message_stop")
+            self._end_stream()
+        else:
+            body = b'{"error": "not found"}'
+            self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """Stub server running in a background thread; use as a context manager."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, tokens: int = 200, first_token_delay: float = 0.0, max_in_flight: int = 0,
+                 load_delay: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.max_in_flight = max_in_flight
+        self.load_delay = load_delay
+        self.loaded = None
+        self.loads = 0
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.requests = 0
+        self.seen = set()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub LLM server for offline benchmarks")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--tokens", type=int, default=200, help="words per response")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="seconds before the first event")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="answer 429 beyond this many concurrent requests")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="seconds to 'load' an Ollama model (native API)")
+    args = parser.parse_args()
+    server = StubLLMServer(args.port, args.tokens, args.first_token_delay, args.max_in_flight, args.load_delay)
+    print(f".. Stub LLM listening on {server.url} ({args.tokens} tokens per response)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Daemon jobs run in server threads; their artifacts and output must follow the client's job."""
+import os
+import sys
+
+import pytest
+
+from video_processor import config, daemon, failover, jobs
+
+SRT = "1\n00:00:00,000 --> 00:00:02,000\nhello there\n\n2\n00:00:02,000 --> 00:00:04,000\ngeneral kenobi\n"
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("VP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VP_JOBS_DB", "off")
+    monkeypatch.setattr(config, "_settings", None)
+    jobs.job_store.cache_clear()
+    server = daemon.JobServer(("127.0.0.1", 0), jobs=1, whisper_workers=1)
+    yield server
+    server.server_close()
+    jobs.job_store.cache_clear()
+
+
+def test_fanout_variants_write_to_client_workdir(server, tmp_path, monkeypatch):
+    def fake_chat(prompt, model, backend, on_token=None, stats=None, **options):
+        print(f".. fake {backend}:{model}")
+        return f"# Summary by {model}\n", False
+
+    monkeypatch.setattr(failover, "chat", fake_chat)
+    client = tmp_path / "client"
+    client.mkdir()
+    (client / "talk.srt").write_text(SRT, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    events = []
+    options = {
+        'backend': "ollama", 'llm_model': "m1", 'template': "transcribe.tpl", 'use_cache': False, 'temperature': 0.0, 'token_limit': 1000,
+        'variants': [
+            {'template': "transcribe.tpl", 'backend': "ollama", 'llm_model': "m1"},
+            {'template': "transcribe.tpl", 'backend': "ollama", 'llm_model': "m2"},
+        ],
+    }
+    job = {'source': "talk.srt", 'cwd': str(client), 'timestamp': "20990101-000000", 'options': options}
+    # Set here, not in the fixture: pytest swaps its capture streams back in between phases
+    monkeypatch.setattr(sys, "stdout", server.stdout)
+    monkeypatch.setattr(sys, "stderr", server.stderr)
+    result = server.run_job(job, events.append)
+
+    written = sorted(p.name for p in client.glob("*.md"))
+    assert len(written) == 2
+    assert all("20990101-000000" in name for name in written)
+    assert not list(tmp_path.glob("*.md"))
+    assert sorted(os.path.basename(p) for p in result['output']) == written
+    text = "".join(e['text'] for e in events if e['event'] == "output")
+    assert ".. fake ollama:m1" in text and ".. fake ollama:m2" in text
+
+
+def test_requests_without_the_token_are_refused(server):
+    import http.client
+    import threading
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    try:
+        for headers, status in (({}, 401), ({'Authorization': "Bearer wrong"}, 401),
+                                ({'Authorization': f"Bearer {server.token}"}, 200)):
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/health", headers=headers)
+            assert conn.getresponse().status == status
+            conn.close()
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        conn.request("POST", "/jobs", body=b'{"source": "x.srt", "cwd": "/"}', headers={'Content-Type': "application/json"})
+        assert conn.getresponse().status == 401
+        conn.close()
+    finally:
+        server.shutdown()
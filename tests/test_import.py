@@ -0,0 +1,26 @@
+"""Importing the CLI must stay cheap: no configuration load and no heavy dependencies."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys
+import video_processor.cli
+import video_processor.config as config
+print(json.dumps({
+    "loaded": sorted(m for m in ("requests", "anthropic", "whisper", "torch") if m in sys.modules),
+    "settings_loaded": config._settings is not None,
+}))
+"""
+
+
+def test_cli_import_is_lazy():
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    out = subprocess.run([sys.executable, "-c", PROBE], check=True, capture_output=True, text=True, env=env)
+    result = json.loads(out.stdout)
+    assert result["loaded"] == []
+    assert result["settings_loaded"] is False
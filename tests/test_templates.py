@@ -0,0 +1,47 @@
+"""-p accepts user templates: names from the user template directory and template file paths."""
+from click.testing import CliRunner
+
+from video_processor import cli, config, failover, jobs
+
+SRT = "1\n00:00:00,000 --> 00:00:02,000\nhello there\n\n2\n00:00:02,000 --> 00:00:04,000\ngeneral kenobi\n"
+
+
+def test_two_user_templates_summarize_one_transcript(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+    monkeypatch.setenv("VP_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("VP_JOBS_DB", "off")
+    monkeypatch.setattr(config, "_settings", None)
+    jobs.job_store.cache_clear()
+    prompts = tmp_path / "xdg" / "video-processor" / "prompts"
+    prompts.mkdir(parents=True)
+    (prompts / "notes.tpl").write_text("List the speakers.", encoding="utf-8")
+    (tmp_path / "quiz.tpl").write_text("Write three quiz questions.", encoding="utf-8")
+    (tmp_path / "talk.srt").write_text(SRT, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    sent = []
+
+    def fake_chat(prompt, model, backend, on_token=None, stats=None, **options):
+        sent.append(prompt)
+        return "# Summary\n", False
+
+    monkeypatch.setattr(failover, "chat", fake_chat)
+    result = CliRunner().invoke(
+        cli.main, ["--no-daemon", "--no-cache", "-b", "ollama", "-l", "m1", "-p", "notes", "-p", "./quiz.tpl", "talk.srt"]
+    )
+    jobs.job_store.cache_clear()
+
+    assert result.exit_code == 0, result.output
+    assert sorted(sent) == ["List the speakers.", "Write three quiz questions."]
+    written = sorted(p.name for p in tmp_path.glob("*.md"))
+    assert len(written) == 2
+    assert written[0].startswith("talk-notes_ollama_m1_") and written[1].startswith("talk-quiz_ollama_m1_")
+
+
+def test_unknown_template_lists_user_templates(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    (tmp_path / "video-processor" / "prompts").mkdir(parents=True)
+    (tmp_path / "video-processor" / "prompts" / "notes.tpl").write_text("x", encoding="utf-8")
+    result = CliRunner().invoke(cli.main, ["--no-daemon", "-p", "missing", "talk.srt"])
+    assert result.exit_code != 0
+    assert "notes.tpl" in result.output and "transcribe.tpl" in result.output
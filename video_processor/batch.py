@@ -0,0 +1,153 @@
+"""
+batch.py
+
+Process many sources in one run. Each item flows through the same stages as a
+single CLI run, but the stages are gated independently so that caption fetches,
+Whisper transcription and LLM calls for different items overlap.
+"""
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from .pipeline import fetch_source, transcribe_source, summarize_variants, is_url
+
+
+def summary_stages(options: dict) -> list:
+    """Job-store stage names of the summaries a run with OPTIONS produces for each source."""
+    variants = options.get('variants') or [{}]
+    return [
+        f"summary:{v.get('template', options['template'])}:{v.get('backend', options['backend'])}:"
+        f"{v.get('llm_model', options['llm_model'])}"
+        for v in variants
+    ]
+
+
+def read_sources(path: str) -> list:
+    """
+    Read sources (URLs or file paths) from PATH, one per line; '-' reads stdin.
+    Blank lines and lines starting with '#' are ignored.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def expand_playlists(sources: list, *, stages: list = (), limit: int = 0, yt_cookies: str = None, debug: bool = False) -> list:
+    """
+    Replace every YouTube playlist or channel URL in SOURCES by the watch URLs of
+    its videos (the first LIMIT of each when LIMIT > 0), listed by flat extraction.
+    A video is left out when the job store shows every summary in STAGES already
+    done for its id with the output still on disk; an empty STAGES keeps them all.
+    """
+    from .downloader import is_playlist_url, expand_playlist
+    from .jobs import job_store
+
+    store = job_store() if stages else None
+    expanded = []
+    for source in sources:
+        if not (is_url(source) and is_playlist_url(source)):
+            expanded.append(source)
+            continue
+        click.echo(f".. Listing videos of {source}")
+        try:
+            videos = expand_playlist(source, debug=debug, yt_cookies=yt_cookies, limit=limit)
+        except Exception as e:
+            raise click.ClickException(f"Could not list {source}: {str(e).splitlines()[0] if str(e) else e}")
+        done = [v for v in videos if store is not None and set(stages) <= set(store.find_video(v['id']))]
+        if done:
+            click.echo(f".. Skipping {len(done)} of {len(videos)} videos already processed")
+            if debug:
+                for v in done:
+                    click.echo(f"__   {v['id']} {v['title'] or ''}", err=True)
+        expanded += [v['url'] for v in videos if v not in done]
+    return expanded
+
+
+def run_batch(
+    sources: list,
+    *,
+    download_workers: int = 4,
+    whisper_workers: int = 1,
+    llm_workers: int = 2,
+    youtube: bool = False,
+    **options,
+) -> list:
+    """
+    Run every source through the pipeline stages with per-stage worker pools.
+
+    Each stage has its own executor, and an item is handed to the next stage's
+    executor as soon as it leaves the previous one, so caption downloads, Whisper
+    and LLM calls for different items run concurrently. URLs are treated as
+    YouTube sources even without YOUTUBE. Remaining keyword OPTIONS are passed
+    through to the pipeline stages.
+
+    Returns a list of result dicts in input order: {'source', 'ok', 'output', 'truncated', 'error'}.
+    """
+    download_pool = ThreadPoolExecutor(max_workers=max(1, download_workers), thread_name_prefix="vp-download")
+    whisper_pool = ThreadPoolExecutor(max_workers=max(1, whisper_workers), thread_name_prefix="vp-whisper")
+    llm_pool = ThreadPoolExecutor(max_workers=max(1, llm_workers), thread_name_prefix="vp-llm")
+
+    results = [None] * len(sources)
+    remaining = threading.Semaphore(0)
+
+    def finish(index: int, result: dict = None, error: Exception = None) -> None:
+        source = sources[index]
+        if error is not None:
+            click.echo(f"** Failed {source}: {error}", err=True)
+            results[index] = {'source': source, 'ok': False, 'output': None, 'truncated': False, 'error': str(error)}
+        else:
+            truncated = result['truncated']
+            results[index] = {**result, 'ok': not truncated, 'error': 'output truncated' if truncated else None}
+        remaining.release()
+
+    def stage(index: int, func, *args, then=None) -> None:
+        try:
+            value = func(*args, **options)
+        except Exception as e:
+            finish(index, error=e)
+            return
+        if then is None:
+            finish(index, result=value)
+        else:
+            then(index, value)
+
+    def to_llm(index: int, state: dict) -> None:
+        llm_pool.submit(stage, index, summarize_variants, state)
+
+    def to_whisper_or_llm(index: int, state: dict) -> None:
+        if state['text'] is None:
+            whisper_pool.submit(stage, index, transcribe_source, state, then=to_llm)
+        else:
+            to_llm(index, state)
+
+    def fetch(source: str, **opts) -> dict:
+        return fetch_source(source, youtube=youtube or is_url(source), **opts)
+
+    try:
+        for index, source in enumerate(sources):
+            download_pool.submit(stage, index, fetch, source, then=to_whisper_or_llm)
+        for _ in sources:
+            remaining.acquire()
+    finally:
+        for pool in (download_pool, whisper_pool, llm_pool):
+            pool.shutdown(wait=True)
+    return results
+
+
+def report(results: list) -> int:
+    """Print the per-item summary and return the number of failed items."""
+    failed = [r for r in results if not r['ok']]
+    click.echo(f"== Batch complete: {len(results) - len(failed)} succeeded, {len(failed)} failed ==")
+    for r in results:
+        if r['ok']:
+            output = ", ".join(r['output']) if isinstance(r['output'], list) else r['output']
+            click.echo(f".. OK   {r['source']} -> {output}")
+        else:
+            first_line = (r['error'] or '').splitlines()[0] if r['error'] else ''
+            click.echo(f"** FAIL {r['source']}: {first_line}")
+    return len(failed)
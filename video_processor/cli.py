@@ -3,18 +3,20 @@ cli.py
 
 Command-line interface for video-processor.
 """
+import time
+_t_import = time.perf_counter()
+
 import click
 import os
 import sys
 import subprocess
 import re
 import shutil
-import glob
 import tempfile
 from pathlib import Path
-from datetime import datetime
 import importlib.resources as pkg_resources
-from .config import WHISPER_MODEL, MODEL, TOKEN_LIMIT
+from .config import get_settings, override_settings
+from .jobctx import get_global_timestamp, get_workdir, generate_timestamp_suffix
 
 # Package version for --version flag
 try:
@@ -23,67 +25,6 @@ try:
 except Exception:
     _pkg_version = "dev"
 
-# Global timestamp for consistent naming across all artifacts
-_global_timestamp = None
-
-def get_global_timestamp() -> str:
-    """Get the global timestamp for this execution (set once at start)"""
-    global _global_timestamp
-    if _global_timestamp is None:
-        _global_timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    return _global_timestamp
-
-def slugify_filename_component(text: str) -> str:
-    """
-    Slugify text for safe use in filenames.
-    Based on filerenamer approach: replace problematic chars with safe alternatives.
-    """
-    if not text:
-        return ""
-    
-    # Replace common problematic characters with safe alternatives
-    replacements = {
-        '/': '-',
-        '\\': '-',
-        ':': '-',
-        '*': '-',
-        '?': '-',
-        '"': '-',
-        "'": '-',
-        '’': '-',
-        '<': '-',
-        '>': '-',
-        '|': '-',
-        ' ': '-',
-        '\t': '-',
-        '\n': '-',
-        '\r': '-',
-    }
-    
-    result = text
-    for old_char, new_char in replacements.items():
-        result = result.replace(old_char, new_char)
-    
-    # Remove any remaining non-printable characters
-    result = ''.join(char for char in result if char.isprintable())
-    
-    # Collapse multiple consecutive hyphens into single hyphens
-    while '--' in result:
-        result = result.replace('--', '-')
-    
-    # Remove leading/trailing hyphens
-    result = result.strip('-')
-    
-    return result
-
-def generate_timestamp_suffix(backend: str, model: str) -> str:
-    """Generate timestamp suffix using global timestamp: _backend_model_yyyymmdd-hhmmss"""
-    timestamp = get_global_timestamp()
-    # Slugify backend and model names for safe filename use
-    safe_backend = slugify_filename_component(backend)
-    safe_model = slugify_filename_component(model)
-    return f"_{safe_backend}_{safe_model}_{timestamp}"
-
 def strip_media_creation_time(path: Path, debug: bool = False) -> None:
     """Remux media to remove embedded creation timestamps that Explorer may prefer over file mtime."""
     if path.suffix.lower() not in {".mp4", ".m4a", ".mov"}:
@@ -133,6 +74,87 @@ def strip_media_creation_time(path: Path, debug: bool = False) -> None:
         if temp_file and temp_file.exists():
             temp_file.unlink()
 
+class _ConfigDefault:
+    """
+    Click default read from the settings only when needed, so runs that exit
+    early (--version) never load the configuration. str() gives the value for --help.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(self):
+        return getattr(get_settings(), self.name)
+
+    def __str__(self):
+        return str(self())
+
+_BACKENDS = ('ollama', 'anthropic', 'openai')
+
+def _resolve_templates(names: tuple) -> list:
+    """
+    Templates for -p values: a path to a template file (kept as an absolute
+    path), else a name ('.tpl' optional) from the user template directory or
+    the summary templates in prompts/.
+    """
+    from .llm_client import user_prompts_dir
+    from .pipeline import INTERNAL_TEMPLATES
+
+    available = {
+        n for n in os.listdir(Path(__file__).parent / 'prompts') if n.endswith('.tpl') and n not in INTERNAL_TEMPLATES
+    }
+    if os.path.isdir(user_prompts_dir()):
+        available.update(n for n in os.listdir(user_prompts_dir()) if n.endswith('.tpl'))
+    templates = []
+    for name in names:
+        if os.sep in name or (os.altsep and os.altsep in name) or os.path.isfile(name):
+            if not os.path.isfile(name):
+                raise click.BadParameter(f"template file '{name}' not found", param_hint="-p/--prompt")
+            template = os.path.abspath(name)
+        else:
+            template = name if name.endswith('.tpl') else name + '.tpl'
+            if template not in available:
+                raise click.BadParameter(
+                    f"unknown template '{name}'; available: {', '.join(sorted(available))}", param_hint="-p/--prompt"
+                )
+        if template not in templates:
+            templates.append(template)
+    return templates
+
+def _parse_targets(values: tuple, option: str = "--target") -> list:
+    """(backend, model) pairs from --target BACKEND:MODEL values; the model may itself contain ':'."""
+    targets = []
+    for value in values:
+        backend, sep, model = value.partition(':')
+        if not sep or not model or backend.lower() not in _BACKENDS:
+            raise click.BadParameter(
+                f"'{value}' is not BACKEND:MODEL with BACKEND one of {', '.join(_BACKENDS)}", param_hint=option
+            )
+        if (backend.lower(), model) not in targets:
+            targets.append((backend.lower(), model))
+    return targets
+
+def _start_profile(trace: bool, backend: str, model: str) -> None:
+    """Activate stage profiling; the timeline is written when the click context closes, however main exits."""
+    from . import profiling
+
+    profiler = profiling.start()
+    # Interpreter startup before this module is not visible here; imports and option parsing are
+    profiler.add_span("startup", _t_import, profiler.t0 - _t_import)
+    base = str(get_workdir() / f"profile{generate_timestamp_suffix(backend, model)}")
+
+    def finish():
+        profiling.stop()
+        profiler.report()
+        try:
+            paths = profiling.write(profiler, base, trace=trace, command=sys.argv, backend=backend, model=model)
+        except OSError as e:
+            click.echo(f"** Could not write profile: {e}", err=True)
+            return
+        click.echo(f".. Profile written to {', '.join(paths)}", err=True)
+
+    click.get_current_context().call_on_close(finish)
+
 # Custom command class to include version header in help output
 class VersionedHelpCommand(click.Command):
     def format_help(self, ctx, formatter):
@@ -158,7 +180,7 @@ class VersionedHelpCommand(click.Command):
 @click.argument("source", type=str, required=False)
 @click.option(
     "-y", "--youtube", is_flag=True,
-    help="Treat SOURCE as a YouTube URL and download captions via yt-dlp."
+    help="Treat SOURCE as a YouTube URL and download captions via yt-dlp; a playlist or channel URL is processed video by video as a batch."
 )
 @click.option(
     "-d", "--download-video", is_flag=True,
@@ -171,12 +193,22 @@ class VersionedHelpCommand(click.Command):
 )
 @click.option(
     "-w", "--whisper-model",
-    default=WHISPER_MODEL, show_default=True,
+    default=_ConfigDefault("WHISPER_MODEL"), show_default=True,
     help="Whisper model to use for transcription."
 )
+@click.option(
+    "--chunk-seconds",
+    default=None, type=float, metavar="SECONDS",
+    help="Split long media at silences into ~SECONDS chunks and transcribe them in parallel worker processes (0 disables; default from config)."
+)
+@click.option(
+    "--chunk-workers",
+    default=None, type=int, metavar="N",
+    help="Worker processes for chunked transcription, each with its own model (0 = auto; default from config)."
+)
 @click.option(
     "-l", "--llm-model",
-    default=MODEL, show_default=True,
+    default=_ConfigDefault("MODEL"), show_default=True,
     help="LLM model to use for summarization via Ollama."
 )
 @click.option(
@@ -186,14 +218,65 @@ class VersionedHelpCommand(click.Command):
 )
 @click.option(
     "--token-limit",
-    default=TOKEN_LIMIT, show_default=True, type=int,
+    default=_ConfigDefault("TOKEN_LIMIT"), show_default=True, type=int,
     help="Maximum OUTPUT tokens for LLM response generation."
 )
+@click.option(
+    "--map-reduce",
+    is_flag=True,
+    help="Summarize long transcripts in token-budgeted windows concurrently, then merge them in a reduce pass."
+)
+@click.option(
+    "--window-tokens",
+    default=_ConfigDefault("MAP_WINDOW_TOKENS"), show_default=True, type=int,
+    help="Map-reduce: maximum transcript tokens per window."
+)
+@click.option(
+    "--map-concurrency",
+    default=_ConfigDefault("MAP_CONCURRENCY"), show_default=True, type=int,
+    help="Map-reduce: window summaries in flight."
+)
+@click.option(
+    "--compact",
+    type=click.Choice(["auto", "on", "off"]), default=_ConfigDefault("COMPACT_CAPTIONS"), show_default=True,
+    help="Merge rolling/overlapping caption cues into paragraphs before prompting (auto: only when cues repeat)."
+)
 @click.option(
     "-b", "--backend",
-    type=click.Choice(['ollama', 'anthropic', 'openai']),
+    type=click.Choice(_BACKENDS),
     help="One-off override for LLM backend (ollama, anthropic, or openai)."
 )
+@click.option(
+    "-p", "--prompt", "prompts",
+    multiple=True, metavar="TEMPLATE",
+    help="Prompt template: a name from prompts/ or ~/.config/video-processor/prompts ('.tpl' optional; default transcribe), "
+         "or a template file path. Repeat for several summaries of one transcript."
+)
+@click.option(
+    "--target", "targets",
+    multiple=True, metavar="BACKEND:MODEL",
+    help="Backend and model to summarize with, e.g. ollama:llama3.1:8b. Repeat to compare models; replaces -b/-l."
+)
+@click.option(
+    "--fallback", "fallbacks",
+    multiple=True, metavar="BACKEND:MODEL",
+    help="Target to fail over to when the primary fails, truncates or misses the first-token deadline; repeat in order of preference (default from config)."
+)
+@click.option(
+    "--first-token-deadline",
+    default=_ConfigDefault("FIRST_TOKEN_DEADLINE"), show_default=True, type=float, metavar="SECONDS",
+    help="Give up on a backend that has not streamed a first token after SECONDS and move to the next fallback (0 = wait)."
+)
+@click.option(
+    "--hedge-after",
+    default=_ConfigDefault("HEDGE_AFTER"), show_default=True, type=float, metavar="SECONDS",
+    help="Also start the next fallback if no first token arrived after SECONDS; the first complete answer wins (0 = off)."
+)
+@click.option(
+    "--fanout-concurrency",
+    default=_ConfigDefault("FANOUT_CONCURRENCY"), show_default=True, type=int,
+    help="Template/model combinations summarized at once when -p or --target is repeated."
+)
 @click.option(
     "--ollama-host",
     default=None, metavar="HOST[:PORT]",
@@ -224,20 +307,116 @@ class VersionedHelpCommand(click.Command):
     default=None, metavar="FILE",
     help="Write summarization to FILE. Omit -o to auto-save with title-derived filename; use -o= to print to stdout instead."
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Bypass the local transcript and LLM response caches for this run."
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue each source from its first incomplete stage (metadata, captions/video, Whisper SRT, summary) recorded by earlier runs."
+)
+@click.option(
+    "--jobs", "list_jobs",
+    is_flag=True,
+    help="List recently recorded jobs with their stages and artifacts, then exit."
+)
+@click.option(
+    "--batch",
+    default=None, metavar="LISTFILE",
+    help="Process every source listed in LISTFILE (one URL or path per line; '-' reads stdin) as a pipelined batch."
+)
+@click.option(
+    "--download-workers",
+    default=_ConfigDefault("BATCH_DOWNLOAD_WORKERS"), show_default=True, type=int,
+    help="Batch mode: parallel caption/video downloads."
+)
+@click.option(
+    "--whisper-workers",
+    default=_ConfigDefault("BATCH_WHISPER_WORKERS"), show_default=True, type=int,
+    help="Batch and daemon mode: concurrent Whisper transcriptions (one per device)."
+)
+@click.option(
+    "--llm-workers",
+    default=_ConfigDefault("BATCH_LLM_WORKERS"), show_default=True, type=int,
+    help="Batch mode: LLM calls in flight."
+)
+@click.option(
+    "--playlist-limit",
+    default=_ConfigDefault("PLAYLIST_LIMIT"), show_default=True, type=int, metavar="N",
+    help="Playlist and channel URLs: process only the first N videos listed (0 = all)."
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    help="Run as a daemon on localhost: load the Whisper model (-w) once and process jobs handed over by other runs."
+)
+@click.option(
+    "--daemon-port",
+    default=_ConfigDefault("DAEMON_PORT"), show_default=True, type=int, metavar="PORT",
+    help="Localhost port the daemon listens on and runs hand jobs to."
+)
+@click.option(
+    "--daemon-jobs",
+    default=_ConfigDefault("DAEMON_JOBS"), show_default=True, type=int,
+    help="Daemon mode: jobs processed at once; further jobs queue."
+)
+@click.option(
+    "--no-daemon",
+    is_flag=True,
+    help="Run this job in-process even if a daemon is running."
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Record wall time, CPU time and peak RSS per pipeline stage and write a JSON timeline (profile_*.json)."
+)
+@click.option(
+    "--profile-trace",
+    is_flag=True,
+    help="Like --profile, and also write the timeline in Chrome trace format (profile_*.trace.json)."
+)
 def main(
     youtube: bool,
     download_video: bool,
     whisper_model: str,
+    chunk_seconds: float,
+    chunk_workers: int,
     llm_model: str,
     temperature: float,
     token_limit: int,
+    map_reduce: bool,
+    window_tokens: int,
+    map_concurrency: int,
+    compact: str,
     backend: str,
+    prompts: tuple,
+    targets: tuple,
+    fallbacks: tuple,
+    first_token_deadline: float,
+    hedge_after: float,
+    fanout_concurrency: int,
     ollama_host: str,
     yt_cookies: str,
     init_config: bool,
     symlink_cli: bool,
     transcript: bool,
     output: str,
+    no_cache: bool,
+    batch: str,
+    download_workers: int,
+    whisper_workers: int,
+    llm_workers: int,
+    playlist_limit: int,
+    serve: bool,
+    daemon_port: int,
+    daemon_jobs: int,
+    no_daemon: bool,
+    resume: bool,
+    list_jobs: bool,
+    profile: bool,
+    profile_trace: bool,
     debug: bool,
     source: str = None,
 ):
@@ -293,110 +472,40 @@ def main(
         click.echo(f"Symlinked {script} → {dest}")
         return
 
+    if list_jobs:
+        from .jobs import format_jobs
+        click.echo(format_jobs())
+        return
+
+    if serve:
+        if source is not None or batch is not None:
+            raise click.UsageError("--serve takes no SOURCE or --batch; submit jobs by running video-processor normally.")
+        from .daemon import serve as serve_daemon
+        serve_daemon(
+            daemon_port, jobs=daemon_jobs, whisper_model=whisper_model, whisper_workers=whisper_workers, debug=debug,
+        )
+        return
+
     # SOURCE argument becomes required for normal operation
-    if source is None:
+    if source is None and batch is None:
         raise click.UsageError("Missing argument 'SOURCE'.")
+    if batch is not None and source is not None:
+        raise click.UsageError("SOURCE cannot be combined with --batch; list sources in the batch file instead.")
+    if batch is not None and output is not None:
+        raise click.UsageError("-o/--output cannot be combined with --batch; each item is saved to its title-derived filename.")
+    from .downloader import is_playlist_url
+    from .pipeline import is_url
+
+    playlist = source is not None and is_url(source) and is_playlist_url(source)
+    if playlist and output is not None:
+        raise click.UsageError("-o/--output cannot be combined with a playlist or channel URL; each video is saved to its title-derived filename.")
 
     # Determine which backend to use (CLI flag overrides project config)
-    from .config import BACKEND as CONFIG_BACKEND
     if backend:
         os.environ['LLM_BACKEND'] = backend
         backend_used = backend
     else:
-        backend_used = CONFIG_BACKEND
-
-    # Determine if source is a pre-existing transcript (flag or auto-detected extension)
-    source_ext = os.path.splitext(source)[1].lower() if source else ""
-    is_transcript = transcript or (not youtube and source_ext in (".srt", ".txt"))
-
-    if is_transcript:
-        if debug:
-            click.echo(f"__ Transcript mode: reading {source} directly (skipping Whisper)", err=True)
-        with open(source, "r", encoding="utf-8") as f:
-            raw_text = f.read()
-        if source_ext == ".srt":
-            click.echo(f".. Reading SRT transcript: {source}")
-            srt_text = raw_text
-        else:
-            # Plain text or unknown extension: pass directly to LLM, skipping SRT parsing
-            click.echo(f".. Reading plain-text transcript: {source}")
-            srt_text = None  # handled below
-    elif youtube:
-        click.echo(f".. Seeking subtitles for {source}")
-        if download_video:
-            click.echo(f".. Downloading full video for {source}")
-            # sanitize title for output basename (slugify like for SRT)
-            try:
-                # Don't use check=True since yt-dlp may have warnings but still succeed
-                result = subprocess.run(
-                    ["yt-dlp", "--get-title", "-q", source],
-                    capture_output=True, text=True
-                )
-                # Check if we got a title, regardless of return code (yt-dlp may return non-zero with warnings)
-                if result.stdout.strip():
-                    title = result.stdout.strip()
-                else:
-                    title = None
-            except Exception as e:
-                title = None
-                if debug:
-                    click.echo(f"__ Title extraction exception: {e}", err=True)
-            # Add timestamp suffix to video files
-            timestamp_suffix = generate_timestamp_suffix(backend_used, llm_model)
-            if title:
-                # Use proper filename cleaning function
-                slug = slugify_filename_component(title)
-                out_template = f"{slug}{timestamp_suffix}.%(ext)s"
-            else:
-                # Fallback to video ID if title extraction fails
-                out_template = f"%(id)s{timestamp_suffix}.%(ext)s"
-            cmd_vid = ["yt-dlp"]
-            if not debug:
-                cmd_vid += ["-q", "--no-warnings"]
-            # Select best single file format (highest resolution) - use "b" to suppress warning
-            cmd_vid += ["--no-mtime", "--no-continue", "-f", "b"]
-            if yt_cookies:
-                cmd_vid += ["--cookies-from-browser", yt_cookies]
-            cmd_vid += ["-o", out_template, source]
-            if debug:
-                click.echo(f"__ Running video download: {' '.join(cmd_vid)}", err=True)
-            try:
-                subprocess.run(cmd_vid, check=True)
-                if title:
-                    slug = slugify_filename_component(title)
-                    base_pattern = f"{slug}{timestamp_suffix}.*"
-                else:
-                    try:
-                        video_id = subprocess.run(
-                            ["yt-dlp", "--get-id", "-q", source],
-                            check=True, capture_output=True, text=True
-                        ).stdout.strip()
-                        base_pattern = f"{video_id}{timestamp_suffix}.*"
-                    except Exception:
-                        base_pattern = f"*{timestamp_suffix}.*"
-                downloaded_video_file = None
-                for video_file in glob.glob(base_pattern):
-                    if os.path.isfile(video_file):
-                        strip_media_creation_time(Path(video_file), debug=debug)
-                        downloaded_video_file = video_file
-            except Exception as e:
-                raise click.ClickException(f"Error downloading video: {e}")
-        from .downloader import download_srt
-        try:
-            srt_text = download_srt(source, debug=debug, backend=backend_used, model=llm_model, yt_cookies=yt_cookies)
-        except RuntimeError as err:
-            if not download_video or not downloaded_video_file:
-                raise click.ClickException(str(err))
-            click.echo(f".. No subtitles found; falling back to Whisper transcription", err=True)
-            from .converter import transcribe_to_srt
-            srt_text = transcribe_to_srt(downloaded_video_file, whisper_model, debug=debug, backend=backend_used, model=llm_model)
-    else:
-        from .converter import transcribe_to_srt
-
-        srt_text = transcribe_to_srt(source, whisper_model, debug=debug, backend=backend_used, model=llm_model)
-
-    from .srt_parser import srt_to_timestamped_lines
-    from .llm_client import load_template, chat
+        backend_used = get_settings().BACKEND
 
     # CLI override for Ollama host: normalize and override config/env and llm_client
     if ollama_host:
@@ -407,125 +516,118 @@ def main(
                 _hp = f"{_hp}:11434"
             _raw = "http://" + _hp
         os.environ["OLLAMA_URL"] = _raw
-        from . import llm_client as _lc
-        _lc.OLLAMA_URL = _raw
+        override_settings(OLLAMA_URL=_raw)
         click.echo(f".. Overriding Ollama URL to {_raw}")
 
-    if is_transcript and source_ext != ".srt":
-        # Plain text: use as-is, no SRT parsing
-        timestamped = raw_text
-    else:
-        timestamped = srt_to_timestamped_lines(srt_text)
-    template = load_template("transcribe.tpl")
-    prompt = template.replace("{{ transcript }}", timestamped)
-    # Track if any errors occurred during processing
-    has_errors = False
-    
-    try:
-        click.echo(f".. Sending prompt to LLM backend ({backend_used}), model={llm_model}, temp={temperature}, max_tokens={token_limit}")
-        md, was_truncated = chat(prompt, model=llm_model, temperature=temperature, debug=debug, max_tokens=token_limit)
-        if was_truncated:
-            has_errors = True
-        click.echo(f".. Received result from LLM (length={len(md)} chars)")
-    except Exception as e:
-        # Provide a clearer error if the Ollama server returns HTTP errors or is unreachable
-        import requests
-
-        if isinstance(e, requests.exceptions.HTTPError):
-            resp = e.response
-            # Attempt to parse structured Ollama error JSON
-            try:
-                body = resp.json()
-                info = body.get('error', {})
-                err_msg = info.get('message', '').strip()
-            except Exception:
-                body = resp.text
-                info = {}
-                err_msg = str(body).strip()
-            # Debug output for LLM HTTP errors
-            if debug:
-                click.echo(f"[debug] LLM error response [{resp.status_code}]: {body}", err=True)
-            # Detect missing-model error (legacy and new formats)
-            if info.get('type') == 'not_found_error' or ('model' in err_msg and 'not found' in err_msg):
-                model_name = llm_model
-                if backend == 'anthropic':
-                    raise click.ClickException(
-                        f"Model '{model_name}' not found on Anthropic Cloud."
-                        " Please use a valid Anthropic model name, e.g. claude-2, claude-2.1, claude-2-instant, or claude-3."
-                    )
-                elif backend == 'openai':
-                    raise click.ClickException(
-                        f"Model '{model_name}' not found on OpenAI."
-                        " Please use a valid OpenAI model name, e.g. gpt-4, gpt-4-turbo, gpt-3.5-turbo, o4-mini-2025-04-16."
-                    )
-                raise click.ClickException(
-                    f"Model '{model_name}' not found on Ollama server."
-                    f"\nPlease pull it first: `ollama pull {model_name}`"
-                )
-            msg = f"HTTP {resp.status_code} {resp.reason}: {err_msg}"
-        else:
-            msg = str(e)
-        # Special-case missing Anthropic SDK or API key
-        if 'Anthropic SDK is not installed' in msg:
-            raise click.ClickException(
-                "Anthropic SDK is not installed; please install with:\n"
-                "  pip install anthropic>=0.3.0"
-            )
-        if 'ANTHROPIC_API_KEY is not set' in msg:
-            raise click.ClickException(
-                "ANTHROPIC_API_KEY is not set; please export your Anthropic API key, e.g.:\n"
-                "  export ANTHROPIC_API_KEY=your_api_key_here"
-            )
-        if 'OPENAI_API_KEY is not set' in msg:
-            raise click.ClickException(
-                "OPENAI_API_KEY is not set; please export your OpenAI API key, e.g.:\n"
-                "  export OPENAI_API_KEY=your_api_key_here"
-            )
-        raise click.ClickException(
-            f"Error during chat completion: {msg}\n"
-            "Ensure your LLM backend is configured correctly (check LLM_BACKEND, OLLAMA_URL, ANTHROPIC_API_KEY, OPENAI_API_KEY)."
+    # Template x model fan-out: the transcript is fetched once and every combination summarized from it
+    templates = _resolve_templates(prompts) if prompts else ["transcribe.tpl"]
+    pairs = _parse_targets(targets) if targets else [(backend_used, llm_model)]
+    if len(pairs) == 1:
+        backend_used, llm_model = pairs[0]
+    variants = None
+    if len(templates) * len(pairs) > 1:
+        if output in ("", "="):
+            raise click.UsageError("-o= (stdout) cannot be combined with several templates or targets.")
+        variants = [
+            {'template': template, 'backend': b, 'llm_model': m} for template in templates for b, m in pairs
+        ]
+
+    options = dict(
+        download_video=download_video,
+        transcript=transcript,
+        whisper_model=whisper_model,
+        chunk_seconds=chunk_seconds,
+        chunk_workers=chunk_workers,
+        llm_model=llm_model,
+        temperature=temperature,
+        token_limit=token_limit,
+        map_reduce=map_reduce,
+        window_tokens=window_tokens,
+        map_concurrency=map_concurrency,
+        compact=compact,
+        template=templates[0],
+        fallbacks=_parse_targets(fallbacks or tuple(get_settings().LLM_FALLBACKS), "--fallback"),
+        first_token_deadline=first_token_deadline,
+        hedge_after=hedge_after,
+        variants=variants,
+        fanout_concurrency=fanout_concurrency,
+        backend=backend_used,
+        yt_cookies=yt_cookies,
+        debug=debug,
+        use_cache=not no_cache,
+        resume=resume,
+    )
+
+    if profile or profile_trace:
+        _start_profile(trace=profile_trace, backend=backend_used, model=llm_model)
+
+    if batch is not None or playlist:
+        from .batch import read_sources, run_batch, report, expand_playlists, summary_stages
+        # Videos of playlists and channels already summarized the same way are skipped (not with --no-cache)
+        sources = expand_playlists(
+            read_sources(batch) if batch is not None else [source],
+            stages=[] if no_cache else summary_stages(options),
+            limit=playlist_limit,
+            yt_cookies=yt_cookies,
+            debug=debug,
         )
-    # Handle output: -o= prints to stdout; omitting -o auto-saves to file; -o FILE saves to named file
-    if output in ("", "="):
-        click.echo(md)
-    else:
-        if output is None:
-            # Auto-generate filename from video title
-            try:
-                # Don't use check=True since yt-dlp may have warnings but still succeed
-                result = subprocess.run(
-                    ["yt-dlp", "--get-title", "-q", source],
-                    capture_output=True, text=True
-                )
-                # Check if we got a title, regardless of return code (yt-dlp may return non-zero with warnings)
-                if result.stdout.strip():
-                    title = result.stdout.strip()
-                else:
-                    title = os.path.splitext(os.path.basename(source))[0]
-            except Exception:
-                title = os.path.splitext(os.path.basename(source))[0]
-            # Use proper filename cleaning function
-            slug = slugify_filename_component(title)
-            # Add timestamp suffix to MD files
-            timestamp_suffix = generate_timestamp_suffix(backend_used, llm_model)
-            filename = slug + timestamp_suffix + ".md"
-        else:
-            # Add timestamp suffix to custom output filename
-            base_name = os.path.splitext(output)[0]
-            ext = os.path.splitext(output)[1] or ".md"
-            timestamp_suffix = generate_timestamp_suffix(backend_used, llm_model)
-            filename = base_name + timestamp_suffix + ext
-        # Write summary to file, warning if overwriting
-        existed = os.path.exists(filename)
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(md)
-        if existed:
-            click.echo(f".. Summarization overwritten to {filename}")
-        else:
-            click.echo(f".. Summarization written to {filename}")
-    
+        if not sources:
+            click.echo(".. Nothing left to process")
+            return
+        click.echo(
+            f".. Batch of {len(sources)} sources: download_workers={download_workers}, "
+            f"whisper_workers={whisper_workers}, llm_workers={llm_workers}"
+        )
+        results = run_batch(
+            sources,
+            youtube=youtube,
+            download_workers=download_workers,
+            whisper_workers=whisper_workers,
+            llm_workers=llm_workers,
+            **options,
+        )
+        if report(results):
+            sys.exit(1)
+        return
+
+    from .pipeline import process_source
+
+    # Jobs that may need Whisper go to a running daemon, which already has the model loaded.
+    # A one-off --ollama-host cannot be applied to the daemon, and --profile measures this process,
+    # so such runs stay local.
+    source_ext = os.path.splitext(source)[1].lower()
+    is_transcript = transcript or (not youtube and source_ext in (".srt", ".txt"))
+    may_need_whisper = not is_transcript and (not youtube or download_video)
+    if may_need_whisper and not no_daemon and daemon_port > 0 and not ollama_host and not (profile or profile_trace):
+        from .daemon import submit_job
+        job = {
+            'source': source if is_url(source) else os.path.abspath(source),
+            'cwd': os.getcwd(),
+            'timestamp': timestamp,
+            'youtube': youtube,
+            'output': output,
+            'options': options,
+        }
+        try:
+            result = submit_job(daemon_port, job)
+        except RuntimeError as err:
+            raise click.ClickException(str(err))
+        if result is not None:
+            if not result.get('ok'):
+                raise click.ClickException(result.get('error') or "Daemon job failed")
+            if result.get('truncated'):
+                sys.exit(1)
+            return
+        if debug:
+            click.echo(f"__ No daemon on port {daemon_port}; running in-process", err=True)
+
+    try:
+        result = process_source(source, youtube=youtube, output=output, **options)
+    except RuntimeError as err:
+        raise click.ClickException(str(err))
+
     # Exit with non-zero code if any errors occurred during processing
-    if has_errors:
+    if result['truncated']:
         sys.exit(1)
 
 
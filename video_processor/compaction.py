@@ -0,0 +1,121 @@
+"""
+compaction.py
+
+Shrink caption transcripts before they reach the prompt. YouTube auto captions
+roll: every phrase appears in two or three consecutive cues (the new cue
+repeats the previous line, and short "commit" cues repeat it once more).
+Compaction drops the words each cue repeats from the text already emitted,
+then coalesces the remaining fragments into sentence or paragraph windows
+that keep the timestamp of their first cue. Only cues that start before (or
+exactly when) the previous cue ends are rolling continuations; a cue after a
+gap keeps all its words, so a speaker who really repeats themselves is kept.
+"""
+from .srt_parser import format_timestamp, iter_cues
+
+# Auto mode compacts only when at least this share of caption words are repeats
+ROLLING_THRESHOLD = 0.2
+
+# Rolling caption cues start where the previous one ends; allow for millisecond rounding
+_CONTIGUOUS = 0.05
+
+_PUNCT = ".,!?;:\"'()[]-–—…"
+_SENTENCE_END = (".", "?", "!", "…")
+
+
+def _norm(word: str) -> str:
+    return word.strip(_PUNCT).lower()
+
+
+def _overlap(tail: list, words: list, min_overlap: int) -> int:
+    """Length of the longest prefix of WORDS that ends TAIL (0 if shorter than MIN_OVERLAP)."""
+    longest = min(len(tail), len(words))
+    for k in range(longest, 0, -1):
+        if k < min_overlap and k < len(words):
+            break
+        if tail[-k:] == words[:k]:
+            return k
+    return 0
+
+
+def dedupe_cues(cues, min_overlap: int = 2, tail_words: int = 64):
+    """
+    Yield (start, text) for (start, end, text) CUES with the words each cue
+    repeats from the end of the text already emitted removed; cues with nothing
+    new are dropped. Only a cue that starts within the previous cue's window
+    (rolling captions) is trimmed; cues after a gap, or after a cue without an
+    end time, pass through whole. A partial overlap must be at least
+    MIN_OVERLAP words, so a single common word at a cue boundary is not
+    mistaken for a repeat.
+    """
+    tail = []
+    previous_end = None
+    for start, end, text in cues:
+        words = text.split()
+        normalized = [_norm(w) for w in words]
+        rolling = previous_end is not None and start <= previous_end + _CONTIGUOUS
+        previous_end = None if end is None else max(end, previous_end or end)
+        k = _overlap(tail, normalized, min_overlap) if rolling else 0
+        if k == len(words):
+            continue
+        tail = (tail + normalized[k:])[-tail_words:]
+        yield start, " ".join(words[k:])
+
+
+def coalesce_cues(cues, max_seconds: float = 30.0, max_chars: int = 400, min_chars: int = 80):
+    """
+    Merge consecutive fragments into windows stamped with their first cue's
+    start. A window ends at a sentence end once it holds MIN_CHARS, at
+    MAX_CHARS, or before a cue starting MAX_SECONDS after the window did.
+    """
+    start = None
+    parts = []
+    size = 0
+    for t, text in cues:
+        if parts and t - start >= max_seconds:
+            yield start, " ".join(parts)
+            parts, size = [], 0
+        if not parts:
+            start = t
+        parts.append(text)
+        size += len(text) + 1
+        if size >= max_chars or (size >= min_chars and text.endswith(_SENTENCE_END)):
+            yield start, " ".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield start, " ".join(parts)
+
+
+def _lines(cues) -> str:
+    return "\n".join(f"[{format_timestamp(start)}] {text}" for start, text in cues)
+
+
+def compact_transcript(srt_text, mode: str = "auto") -> tuple:
+    """
+    Timestamped transcript lines for SRT_TEXT, compacted per MODE:
+    'on' always de-duplicates and coalesces, 'off' never does, and 'auto' does
+    when at least ROLLING_THRESHOLD of the caption words are repeats.
+
+    Returns:
+        tuple[str, dict]: (timestamped_text, report) where report holds 'applied',
+        'cues', 'lines', 'repeated_ratio', 'tokens_before' and 'tokens_after'.
+    """
+    from .tokens import estimate_tokens
+
+    cues = list(iter_cues(srt_text, ends=True))
+    plain = _lines((start, text) for start, _, text in cues)
+    report = {"mode": mode, "applied": False, "cues": len(cues), "lines": len(cues), "repeated_ratio": 0.0}
+    report["tokens_before"] = report["tokens_after"] = estimate_tokens(plain)
+    if mode == "off" or not cues:
+        return plain, report
+
+    deduped = list(dedupe_cues(cues))
+    words_in = sum(len(text.split()) for _, _, text in cues)
+    words_out = sum(len(text.split()) for _, text in deduped)
+    report["repeated_ratio"] = 1.0 - words_out / words_in if words_in else 0.0
+    if mode == "auto" and report["repeated_ratio"] < ROLLING_THRESHOLD:
+        return plain, report
+
+    windows = list(coalesce_cues(deduped))
+    compacted = _lines(windows)
+    report.update(applied=True, lines=len(windows), tokens_after=estimate_tokens(compacted))
+    return compacted, report
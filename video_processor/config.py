@@ -1,71 +1,206 @@
 """
 Configuration for video_processor package.
+
+Settings are resolved once, on first use, from the environment (plus any .env
+file) and the user-wide and project-local config.toml files; get_settings()
+returns the cached result. The module-level names (WHISPER_MODEL, BACKEND, ...)
+remain available as attributes of this module and are read from the settings.
 """
 import os
+import threading
 from pathlib import Path
 
-# Load any per-project .env (for secrets like API keys)
-try:
-    from dotenv import load_dotenv, find_dotenv
+
+def _load_dotenv() -> None:
+    """Load any per-project .env (for secrets like API keys) into os.environ."""
+    try:
+        from dotenv import load_dotenv, find_dotenv
+    except ImportError:
+        return
 
     # First search relative to this file (project tree)
-    _dotenv_path = find_dotenv()
+    dotenv_path = find_dotenv()
 
     # Then search from the current working directory
-    if not _dotenv_path:
-        _dotenv_path = find_dotenv(usecwd=True)
+    if not dotenv_path:
+        dotenv_path = find_dotenv(usecwd=True)
 
     # Finally check ~/.env as a fallback
-    if not _dotenv_path:
+    if not dotenv_path:
         home_env = Path.home() / ".env"
         if home_env.exists():
-            _dotenv_path = str(home_env)
-
-    if _dotenv_path:
-        load_dotenv(_dotenv_path, override=False)
-except ImportError:
-    pass
-
-# Parse optional project-local config.toml (for defaults)
-try:
-    import tomllib
-except ModuleNotFoundError:
-    import tomli as tomllib
-
-# Configuration precedence: user-wide (~/.config/video-processor/config.toml), then project-local (./config.toml)
-_cfg = {}
-# User-wide config via XDG_CONFIG_HOME or fallback to ~/.config
-_xdg = Path(os.getenv("XDG_CONFIG_HOME", Path.home() / ".config"))
-_user_cfg = _xdg / "video-processor" / "config.toml"
-if _user_cfg.exists():
-    with open(_user_cfg, "rb") as f:
-        _cfg = tomllib.load(f)
-
-# Project-local config overrides user-wide settings
-_cfg_path = Path.cwd() / "config.toml"
-if _cfg_path.exists():
-    with open(_cfg_path, "rb") as f:
-        proj = tomllib.load(f)
-        _cfg.update(proj)
-
-# LLM backend (ollama or anthropic)
-BACKEND = os.getenv("LLM_BACKEND", _cfg.get("backend", "ollama")).lower()
-
-# Ollama server URL (default http://localhost:11434)
-_raw = os.getenv("OLLAMA_URL", _cfg.get("ollama_host", "localhost:11434"))
-if not _raw.startswith(("http://", "https://")):
-    hostport = _raw
-    if ":" not in hostport:
-        hostport = f"{hostport}:11434"
-    _raw = "http://" + hostport
-OLLAMA_URL = _raw
-
-# Whisper defaults (use base model as safe default...)
-WHISPER_MODEL = os.getenv("WHISPER_MODEL", _cfg.get("whisper_model", "base"))
-# Device for Whisper (e.g. 'cuda' or 'cpu')
-DEVICE = os.getenv("DEVICE", _cfg.get("device", "cuda"))
-
-# LLM model name
-MODEL = os.getenv("LLM_MODEL", _cfg.get("model", "claude-opus-4"))
-# Token limit for LLM
-TOKEN_LIMIT = int(os.getenv("TOKEN_LIMIT", _cfg.get("token_limit", 10000)))
\ No newline at end of file
+            dotenv_path = str(home_env)
+
+    if dotenv_path:
+        load_dotenv(dotenv_path, override=False)
+
+
+def _read_config() -> dict:
+    """Parse the optional config.toml files (for defaults)."""
+    try:
+        import tomllib
+    except ModuleNotFoundError:
+        import tomli as tomllib
+
+    # Configuration precedence: user-wide (~/.config/video-processor/config.toml), then project-local (./config.toml)
+    cfg = {}
+    # User-wide config via XDG_CONFIG_HOME or fallback to ~/.config
+    xdg = Path(os.getenv("XDG_CONFIG_HOME", Path.home() / ".config"))
+    user_cfg = xdg / "video-processor" / "config.toml"
+    if user_cfg.exists():
+        with open(user_cfg, "rb") as f:
+            cfg = tomllib.load(f)
+
+    # Project-local config overrides user-wide settings
+    cfg_path = Path.cwd() / "config.toml"
+    if cfg_path.exists():
+        with open(cfg_path, "rb") as f:
+            cfg.update(tomllib.load(f))
+    return cfg
+
+
+class Settings:
+    """Resolved configuration: environment variables override config.toml, which overrides defaults."""
+
+    def __init__(self, cfg: dict):
+        # LLM backend (ollama or anthropic)
+        self.BACKEND = os.getenv("LLM_BACKEND", cfg.get("backend", "ollama")).lower()
+        # Failover policy: BACKEND:MODEL targets tried after the primary, a first-token deadline and a
+        # hedging delay in seconds (0 disables either)
+        fallbacks = os.getenv("LLM_FALLBACKS")
+        self.LLM_FALLBACKS = (
+            [f.strip() for f in fallbacks.split(",") if f.strip()] if fallbacks is not None
+            else list(cfg.get("fallbacks", []))
+        )
+        self.FIRST_TOKEN_DEADLINE = float(os.getenv("FIRST_TOKEN_DEADLINE", cfg.get("first_token_deadline", 0)))
+        self.HEDGE_AFTER = float(os.getenv("HEDGE_AFTER", cfg.get("hedge_after", 0)))
+
+        # Ollama server URL (default http://localhost:11434)
+        raw = os.getenv("OLLAMA_URL", cfg.get("ollama_host", "localhost:11434"))
+        if not raw.startswith(("http://", "https://")):
+            hostport = raw
+            if ":" not in hostport:
+                hostport = f"{hostport}:11434"
+            raw = "http://" + hostport
+        self.OLLAMA_URL = raw
+        # Seconds to wait for each Ollama stream event (the first one includes loading the model)
+        self.OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", cfg.get("ollama_timeout", 300)))
+        # Ollama API: "native" (/api/chat: num_ctx sized per prompt, keep_alive, load/eval timings)
+        # or "openai" (/v1/chat/completions, for OpenAI-compatible servers; served context fixed at OLLAMA_NUM_CTX)
+        self.OLLAMA_API = str(os.getenv("OLLAMA_API", cfg.get("ollama_api", "native"))).lower()
+        # Smallest context requested natively (Ollama's default), and the context the openai API is served with
+        self.OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", cfg.get("ollama_num_ctx", 4096)))
+        # Largest context requested natively; bounds the KV cache memory Ollama allocates
+        self.OLLAMA_MAX_CTX = int(os.getenv("OLLAMA_MAX_CTX", cfg.get("ollama_max_ctx", 32768)))
+        # How long Ollama keeps the model loaded after a request (duration like "30m", or -1 for ever)
+        self.OLLAMA_KEEP_ALIVE = str(os.getenv("OLLAMA_KEEP_ALIVE", cfg.get("ollama_keep_alive", "30m")))
+        # Load the model in the background while captions download or Whisper runs
+        self.OLLAMA_PREWARM = str(os.getenv("OLLAMA_PREWARM", cfg.get("ollama_prewarm", True))).lower() in ("1", "true", "yes", "on")
+
+        # Whisper defaults (use base model as safe default...)
+        self.WHISPER_MODEL = os.getenv("WHISPER_MODEL", cfg.get("whisper_model", "base"))
+        # Device for Whisper (e.g. 'cuda' or 'cpu')
+        self.DEVICE = os.getenv("DEVICE", cfg.get("device", "cuda"))
+        # Whisper weight precision: "fp32" (as shipped) or "fp16" (halves memory; CUDA only)
+        self.WHISPER_PRECISION = os.getenv("WHISPER_PRECISION", cfg.get("whisper_precision", "fp32"))
+        # Warm Whisper models kept loaded, in MB of weights per memory pool (0 = keep only the last used model)
+        self.WHISPER_RAM_BUDGET_MB = float(os.getenv("WHISPER_RAM_BUDGET_MB", cfg.get("whisper_ram_budget_mb", 0)))
+        self.WHISPER_VRAM_BUDGET_MB = float(os.getenv("WHISPER_VRAM_BUDGET_MB", cfg.get("whisper_vram_budget_mb", 0)))
+        # Chunked transcription: split long audio at silences into ~N second chunks (0 disables)
+        self.CHUNK_SECONDS = float(os.getenv("CHUNK_SECONDS", cfg.get("chunk_seconds", 0)))
+        # Worker processes for chunked transcription (0 = one per 4 CPU cores)
+        self.CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", cfg.get("chunk_workers", 0)))
+
+        # LLM model name
+        self.MODEL = os.getenv("LLM_MODEL", cfg.get("model", "claude-opus-4"))
+        # Token limit for LLM
+        self.TOKEN_LIMIT = int(os.getenv("TOKEN_LIMIT", cfg.get("token_limit", 10000)))
+        # LLM transport: requests in flight per backend and pooled keep-alive connections per backend
+        self.LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", cfg.get("llm_max_concurrency", 4)))
+        self.LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", cfg.get("llm_pool_size", 10)))
+        # Rate limiting per backend/model: retries on 429/overload/5xx, and request/token budgets per minute
+        # (0 = learn them from the provider's rate-limit headers)
+        self.LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", cfg.get("llm_max_retries", 4)))
+        self.LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", cfg.get("llm_requests_per_minute", 0)))
+        self.LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", cfg.get("llm_tokens_per_minute", 0)))
+        # Map-reduce summarization: transcript window size in tokens and map calls in flight
+        self.MAP_WINDOW_TOKENS = int(os.getenv("MAP_WINDOW_TOKENS", cfg.get("map_window_tokens", 8000)))
+        self.MAP_CONCURRENCY = int(os.getenv("MAP_CONCURRENCY", cfg.get("map_concurrency", 4)))
+        # Template x model fan-out (-p/--target repeated): combinations summarized at once
+        self.FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", cfg.get("fanout_concurrency", 4)))
+        # Caption compaction before prompting: auto (rolling captions only), on, or off
+        self.COMPACT_CAPTIONS = str(os.getenv("COMPACT_CAPTIONS", cfg.get("compact_captions", "auto"))).lower()
+
+        # Batch mode: per-stage concurrency (caption fetches, Whisper workers, LLM calls in flight)
+        self.BATCH_DOWNLOAD_WORKERS = int(os.getenv("BATCH_DOWNLOAD_WORKERS", cfg.get("batch_download_workers", 4)))
+        self.BATCH_WHISPER_WORKERS = int(os.getenv("BATCH_WHISPER_WORKERS", cfg.get("batch_whisper_workers", 1)))
+        self.BATCH_LLM_WORKERS = int(os.getenv("BATCH_LLM_WORKERS", cfg.get("batch_llm_workers", 2)))
+        # Playlist and channel URLs: videos taken from the top of the list (0 = all)
+        self.PLAYLIST_LIMIT = int(os.getenv("PLAYLIST_LIMIT", cfg.get("playlist_limit", 0)))
+
+        # Daemon mode (--serve): localhost port (0 disables hand-off) and jobs run at once
+        self.DAEMON_PORT = int(os.getenv("VP_DAEMON_PORT", cfg.get("daemon_port", 8765)))
+        self.DAEMON_JOBS = int(os.getenv("VP_DAEMON_JOBS", cfg.get("daemon_jobs", 2)))
+
+        # Local caches (transcripts, LLM responses, metadata) live under XDG_CACHE_HOME by default
+        self.CACHE_DIR = os.getenv(
+            "VP_CACHE_DIR",
+            cfg.get("cache_dir", str(Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "video-processor")),
+        )
+        # Job store for --resume (SQLite); "off" disables job tracking
+        self.JOBS_DB = str(os.getenv("VP_JOBS_DB", cfg.get("jobs_db", "")) or Path(self.CACHE_DIR) / "jobs.sqlite")
+        # Transcript cache budget in MB (0 disables)
+        self.TRANSCRIPT_CACHE_MB = float(os.getenv("TRANSCRIPT_CACHE_MB", cfg.get("transcript_cache_mb", 500)))
+        # LLM response cache budget in MB (0 disables) and entry lifetime in days
+        self.LLM_CACHE_MB = float(os.getenv("LLM_CACHE_MB", cfg.get("llm_cache_mb", 100)))
+        self.LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", cfg.get("llm_cache_ttl_days", 30)))
+        # YouTube metadata cache budget in MB (0 disables) and entry lifetime in days
+        self.METADATA_CACHE_MB = float(os.getenv("METADATA_CACHE_MB", cfg.get("metadata_cache_mb", 20)))
+        self.METADATA_CACHE_TTL_DAYS = float(os.getenv("METADATA_CACHE_TTL_DAYS", cfg.get("metadata_cache_ttl_days", 7)))
+
+        # OpenAI endpoint; an API key in config.toml takes precedence over OPENAI_API_KEY
+        self.OPENAI_BASE_URL = cfg.get("openai_base_url", "https://api.openai.com/v1")
+        self.OPENAI_API_KEY = cfg.get("openai_api_key") or os.getenv("OPENAI_API_KEY")
+
+    def replace(self, **changes) -> "Settings":
+        """Copy of these settings with CHANGES applied."""
+        new = object.__new__(Settings)
+        new.__dict__.update(self.__dict__)
+        for name, value in changes.items():
+            if name not in self.__dict__:
+                raise AttributeError(f"Unknown setting {name!r}")
+            setattr(new, name, value)
+        return new
+
+
+_settings = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """The process-wide settings, loaded on first call."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _load_dotenv()
+                _settings = Settings(_read_config())
+    return _settings
+
+
+def override_settings(**changes) -> None:
+    """Apply one-off overrides (e.g. CLI flags) on top of the loaded settings for the rest of the run."""
+    global _settings
+    settings = get_settings().replace(**changes)
+    with _settings_lock:
+        _settings = settings
+
+
+def __getattr__(name: str):
+    # Backwards-compatible module constants (config.WHISPER_MODEL, from .config import BACKEND, ...)
+    if name.isupper():
+        try:
+            return getattr(get_settings(), name)
+        except AttributeError:
+            pass
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,91 +3,521 @@ converter.py
 
 Transcribe video/audio files to SRT using OpenAI Whisper.
 """
+import functools
+import gc
 import os
 import shutil
 import subprocess
-import tempfile
 import re
-import whisper
+import tempfile
+import threading
+import time
 import srt
-from datetime import timedelta, datetime
+from collections import OrderedDict
+from datetime import timedelta
 from pathlib import Path
 
-from .config import WHISPER_MODEL, DEVICE
+from .config import get_settings
+from .cache import DiskCache, file_digest, make_key
+from .profiling import stage, peak_rss as _peak_rss
+
+SAMPLE_RATE = 16000
+
+# Bump when the SRT produced for the same media/model could change
+_TRANSCRIPT_CACHE_VERSION = 1
+
+@functools.lru_cache(maxsize=None)
+def _transcript_cache() -> DiskCache:
+    return DiskCache("transcripts", max_bytes=int(get_settings().TRANSCRIPT_CACHE_MB * 1024 * 1024))
+
+def _human_size(size: float) -> str:
+    n = float(size)
+    for unit in ('B','KiB','MiB','GiB'):
+        if n < 1024.0:
+            return f"{n:.2f}{unit}"
+        n /= 1024.0
+    return f"{n:.2f}TiB"
+
+def probe_duration(input_path: str) -> float:
+    """Media duration in seconds via ffprobe, or None if it cannot be determined."""
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", input_path],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        return float(out)
+    except (subprocess.CalledProcessError, ValueError):
+        return None
+
+def load_audio(input_path: str, debug: bool = False):
+    """
+    Decode INPUT_PATH to 16 kHz mono float32 samples in memory.
+
+    ffmpeg writes s16le PCM to a pipe; samples are converted chunk by chunk into a
+    float32 buffer preallocated from the ffprobe duration (grown if needed), so no
+    temporary WAV is written and no full-size int16 copy is held.
+    """
+    import numpy as np
+
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-nostats", "-i", input_path, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+           "-f", "s16le", "-acodec", "pcm_s16le", "-"]
+    if debug:
+        print(f"__ Running ffmpeg decode: {' '.join(cmd)}")
+    duration = probe_duration(input_path)
+    # One extra second of headroom avoids a regrow for rounding in the container duration
+    capacity = int(((duration or 600.0) + 1.0) * SAMPLE_RATE)
+    audio = np.empty(capacity, dtype=np.float32)
+    scratch = np.empty(1 << 18, dtype=np.int16)
+    scratch_bytes = memoryview(scratch).cast("B")
+    n = 0
+    t0 = time.perf_counter()
+    # Errors go to a temp file: a stderr pipe nobody reads while stdout is drained could fill and stall ffmpeg
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors)
+    try:
+        pending = 0
+        while True:
+            got = proc.stdout.readinto(scratch_bytes[pending:])
+            if not got:
+                break
+            pending += got
+            usable = pending // 2
+            if n + usable > len(audio):
+                grown = np.empty(max(len(audio) * 2, n + usable), dtype=np.float32)
+                grown[:n] = audio[:n]
+                audio = grown
+            np.multiply(scratch[:usable], 1.0 / 32768.0, out=audio[n:n + usable], casting="unsafe")
+            n += usable
+            # Carry over an odd trailing byte
+            if pending % 2:
+                scratch_bytes[0] = scratch_bytes[pending - 1]
+            pending %= 2
+        if proc.wait() != 0:
+            errors.seek(0)
+            raise RuntimeError(f"ffmpeg failed to decode {input_path}: {errors.read().decode(errors='replace').strip()}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+        errors.close()
+    audio = audio[:n]
+    elapsed = time.perf_counter() - t0
+    rss = _peak_rss()
+    print(
+        f".. Decoded {n / SAMPLE_RATE:.1f}s of audio in {elapsed:.2f}s"
+        + (f" (peak RSS {_human_size(rss)})" if rss else "")
+    )
+    return audio
+
+def save_wav(audio, path: Path) -> None:
+    """Write float32 samples as a 16 kHz mono 16-bit WAV."""
+    import wave
+    import numpy as np
+
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        step = 1 << 20
+        for i in range(0, len(audio), step):
+            chunk = np.clip(audio[i:i + step] * 32768.0, -32768, 32767).astype("<i2")
+            wf.writeframes(chunk.tobytes())
+
+def split_on_silence(audio, chunk_seconds: float, search_seconds: float = 15.0, frame_seconds: float = 0.1) -> list:
+    """
+    Split AUDIO into (start, end) sample ranges of roughly CHUNK_SECONDS each.
+    Each cut is placed at the quietest FRAME_SECONDS frame (lowest RMS) within
+    SEARCH_SECONDS of the nominal boundary, so words are not split across chunks.
+    """
+    import numpy as np
+
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    if chunk <= 0 or total <= chunk:
+        return [(0, total)]
+    frame = max(1, int(frame_seconds * SAMPLE_RATE))
+    search = min(int(search_seconds * SAMPLE_RATE), chunk // 2)
+    bounds = [0]
+    while total - bounds[-1] > chunk:
+        target = bounds[-1] + chunk
+        lo = max(bounds[-1] + frame, target - search)
+        hi = min(total - frame, target + search)
+        n_frames = (hi - lo) // frame
+        if n_frames <= 0:
+            cut = target
+        else:
+            window = audio[lo:lo + n_frames * frame].reshape(n_frames, frame)
+            rms = np.sqrt(np.mean(np.square(window, dtype=np.float64), axis=1))
+            # Cut in the middle of the quietest frame
+            cut = lo + int(np.argmin(rms)) * frame + frame // 2
+        bounds.append(cut)
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _chunk_worker_init(model_name: str, device: str, threads: int) -> None:
+    """Process-pool initializer: pin torch threads and load the model once per worker."""
+    try:
+        import torch
+        torch.set_num_threads(max(1, threads))
+    except ImportError:
+        pass
+    load_model(model_name, device=device)
+
+def _transcribe_chunk(audio_chunk, offset: float, model_name: str, device: str) -> list:
+    """Transcribe one chunk in a worker; returns segments shifted to global time."""
+    model = load_model(model_name, device=device)
+    duration = len(audio_chunk) / SAMPLE_RATE
+    result = model.transcribe(audio_chunk, fp16=(device != "cpu"))
+    segments = []
+    for seg in result.get("segments", []):
+        start = float(seg["start"])
+        # Whisper occasionally emits a trailing segment past the end of short input
+        if start >= duration:
+            continue
+        end = min(float(seg["end"]), duration)
+        segments.append({"start": offset + start, "end": offset + end, "text": seg.get("text", "")})
+    return segments
+
+def transcribe_chunked(audio, chunks: list, model_name: str, writer: "SrtWriter", workers: int = 0, debug: bool = False, device: str = None) -> None:
+    """
+    Transcribe CHUNKS of AUDIO in a process pool whose workers each keep a model
+    loaded, appending segments to WRITER in order as each chunk completes.
+    Segments repeated across a seam (same text, overlapping time) are dropped.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
 
-_model = None
+    device = device or get_settings().DEVICE
+    cpus = os.cpu_count() or 1
+    # Auto: one worker per 4 cores, each running a 4-thread model
+    workers = max(1, min(workers or max(1, cpus // 4), len(chunks)))
+    threads = max(1, cpus // workers)
+    print(
+        f".. Starting chunked transcription: {len(chunks)} chunks of ~{len(audio) / len(chunks) / SAMPLE_RATE:.0f}s, "
+        f"{workers} workers x {threads} threads"
+    )
+    if debug:
+        for i, (a, b) in enumerate(chunks, start=1):
+            print(f"__ Chunk {i}: {a / SAMPLE_RATE:.2f}s - {b / SAMPLE_RATE:.2f}s")
+    # spawn: workers must not inherit torch/CUDA state or threads from this process
+    ctx = multiprocessing.get_context("spawn")
+    last = None
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=ctx,
+        initializer=_chunk_worker_init,
+        initargs=(model_name, device, threads),
+    ) as pool:
+        futures = [
+            pool.submit(_transcribe_chunk, audio[a:b], a / SAMPLE_RATE, model_name, device)
+            for a, b in chunks
+        ]
+        for i, future in enumerate(futures, start=1):
+            for seg in future.result():
+                text = seg["text"].strip()
+                if last is not None and text == last["text"].strip() and seg["start"] < last["end"]:
+                    continue
+                if last is not None and seg["start"] < last["end"]:
+                    # Keep cues monotonic across the seam
+                    seg["start"] = last["end"]
+                writer.add_segment(seg["start"], seg["end"], seg["text"])
+                last = seg
+            if debug:
+                print(f"__ Chunk {i}/{len(chunks)} done ({writer.count} segments so far)")
 
-def load_model(model_name: str = WHISPER_MODEL, device: str = DEVICE):
+class SrtWriter:
     """
-    Load and cache the Whisper model on the specified device.
+    Incremental SRT emitter. Each segment is formatted once and appended to
+    PATH.partial as it arrives; close() atomically renames the file into place
+    and returns the full text. In chunked mode segments arrive as chunks finish,
+    so a partial SRT exists while transcription runs. model.transcribe() returns
+    all segments at once, so an unchunked run writes the file in one go at the end.
+
+    Segments must arrive in start-time order. Cues that srt.compose would drop
+    (empty text, negative start, start >= end) are skipped the same way.
     """
-    global _model
-    if _model is None:
-        _model = whisper.load_model(model_name, device=device)
-    return _model
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + ".partial")
+        self._fh = open(self.partial_path, "w", encoding="utf-8")
+        self._blocks = []
+
+    def add_segment(self, start: float, end: float, text: str) -> None:
+        content = text.strip()
+        if not content or start < 0 or start >= end:
+            return
+        subtitle = srt.Subtitle(
+            index=len(self._blocks) + 1,
+            start=timedelta(seconds=start),
+            end=timedelta(seconds=end),
+            content=content,
+        )
+        block = subtitle.to_srt()
+        self._blocks.append(block)
+        self._fh.write(block)
+        self._fh.flush()
+
+    def add_segments(self, segments) -> None:
+        """Append Whisper-style segment dicts ({'start', 'end', 'text'})."""
+        for seg in segments:
+            self.add_segment(seg["start"], seg["end"], seg.get("text", ""))
+
+    @property
+    def count(self) -> int:
+        return len(self._blocks)
+
+    def close(self) -> str:
+        """Finish the file atomically and return the composed SRT text."""
+        if not self._fh.closed:
+            self._fh.close()
+            os.replace(self.partial_path, self.path)
+        return "".join(self._blocks)
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        if not self._fh.closed:
+            self._fh.close()
+            try:
+                os.remove(self.partial_path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+# Approximate Whisper parameter counts in millions, used to make room before a load
+_MODEL_PARAMS_M = {
+    "tiny": 39, "base": 74, "small": 244, "medium": 769,
+    "large": 1550, "large-v1": 1550, "large-v2": 1550, "large-v3": 1550,
+    "large-v3-turbo": 809, "turbo": 809,
+}
+
+# Loaded models, least recently used first: (name, device, precision) -> (model, weight bytes)
+_models = OrderedDict()
+# Batch mode may call load_model from several worker threads
+_models_lock = threading.Lock()
+
+def _resolve_precision(device: str, precision: str = None) -> str:
+    precision = (precision or get_settings().WHISPER_PRECISION or "fp32").lower()
+    if precision not in ("fp32", "fp16"):
+        raise ValueError(f"Unsupported Whisper precision {precision!r} (expected 'fp32' or 'fp16')")
+    # Half-precision weights only make sense on CUDA; CPU inference runs in fp32
+    if not str(device).startswith("cuda"):
+        return "fp32"
+    return precision
+
+def _pool(device: str) -> str:
+    return "vram" if str(device).startswith("cuda") else "ram"
+
+def _budget_bytes(pool: str) -> int:
+    settings = get_settings()
+    mb = settings.WHISPER_VRAM_BUDGET_MB if pool == "vram" else settings.WHISPER_RAM_BUDGET_MB
+    return int(mb * 1024 * 1024)
+
+def _estimate_bytes(model_name: str, precision: str) -> int:
+    params = _MODEL_PARAMS_M.get(model_name, 0)
+    return params * 1_000_000 * (2 if precision == "fp16" else 4)
+
+def _weight_bytes(model) -> int:
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return 0
+
+def _free_torch_memory() -> None:
+    """Collect dropped models and return cached CUDA blocks to the driver."""
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+def _evict_for(pool: str, incoming: int) -> list:
+    """
+    Drop least-recently-used models in POOL until INCOMING more bytes fit the
+    budget (with a zero budget, drop them all). Caller holds _models_lock.
+    Returns the evicted keys.
+    """
+    budget = _budget_bytes(pool)
+    evicted = []
+    for key in list(_models):
+        if _pool(key[1]) != pool:
+            continue
+        used = sum(size for k, (_, size) in _models.items() if _pool(k[1]) == pool)
+        if budget > 0 and used + incoming <= budget:
+            break
+        del _models[key]
+        evicted.append(key)
+    return evicted
+
+def load_model(model_name: str = None, device: str = None, precision: str = None):
+    """
+    Load the Whisper model MODEL_NAME on DEVICE (defaults from config), reusing
+    a warm copy if one is cached. Models are kept per (name, device, precision)
+    and evicted least recently used first once the RAM/VRAM budget would be
+    exceeded.
+    """
+    settings = get_settings()
+    model_name = model_name or settings.WHISPER_MODEL
+    device = device or settings.DEVICE
+    precision = _resolve_precision(device, precision)
+    key = (model_name, device, precision)
+    with _models_lock:
+        entry = _models.get(key)
+        if entry is not None:
+            _models.move_to_end(key)
+            return entry[0]
+        evicted = _evict_for(_pool(device), _estimate_bytes(model_name, precision))
+        if evicted:
+            print(f".. Unloading Whisper model(s) {', '.join(k[0] for k in evicted)} to make room for {model_name!r}")
+            _free_torch_memory()
+        import whisper
+        model = whisper.load_model(model_name, device=device)
+        if precision == "fp16":
+            model = model.half()
+        _models[key] = (model, _weight_bytes(model))
+        # The estimate may be missing (custom checkpoints); re-check with the real size
+        evicted = _evict_for(_pool(device), 0) if _budget_bytes(_pool(device)) > 0 else []
+        if key in evicted:
+            # A single model larger than the budget is still returned, just not kept
+            evicted.remove(key)
+        if evicted:
+            _free_torch_memory()
+    return model
+
+def unload_model(model_name: str = None, device: str = None, precision: str = None) -> int:
+    """
+    Drop cached models matching the given name/device/precision (None matches
+    any) and free their memory. Returns the number of models unloaded.
+    """
+    with _models_lock:
+        keys = [
+            k for k in _models
+            if (model_name is None or k[0] == model_name)
+            and (device is None or k[1] == device)
+            and (precision is None or k[2] == precision)
+        ]
+        for k in keys:
+            del _models[k]
+    if keys:
+        _free_torch_memory()
+    return len(keys)
+
+def release_models() -> int:
+    """Unload every cached Whisper model (e.g. before a long idle period)."""
+    return unload_model()
+
+def loaded_models() -> list:
+    """(name, device, precision, weight bytes) for each cached model, least recently used first."""
+    with _models_lock:
+        return [(*k, size) for k, (_, size) in _models.items()]
 
 def transcribe_to_srt(
     input_path: str,
-    model_name: str = WHISPER_MODEL,
+    model_name: str = None,
     debug: bool = False,
     backend: str = 'default',
     model: str = 'default',
+    use_cache: bool = True,
+    chunk_seconds: float = None,
+    chunk_workers: int = None,
 ) -> str:
     """
     Transcribe the given media file and return an SRT-formatted string.
+    MODEL_NAME, CHUNK_SECONDS and CHUNK_WORKERS default to the configured values.
+
+    Transcripts are cached by media content hash, Whisper model and device; a
+    cache hit returns without running ffmpeg or loading Whisper. With
+    CHUNK_SECONDS > 0, audio longer than one chunk is split at silences and the
+    chunks are transcribed in a pool of CHUNK_WORKERS processes.
     """
-    # Prepare ffmpeg conversion to mono WAV for full-length decoding
-    if shutil.which("ffmpeg") is None:
-        raise RuntimeError(
-            "ffmpeg not found in PATH; please install ffmpeg for transcription"
-        )
+    settings = get_settings()
+    device = settings.DEVICE
+    model_name = model_name or settings.WHISPER_MODEL
+    if chunk_seconds is None:
+        chunk_seconds = settings.CHUNK_SECONDS
+    if chunk_workers is None:
+        chunk_workers = settings.CHUNK_WORKERS
     # Timestamp suffix for artifact naming and sanitize basename for files
-    from .cli import generate_timestamp_suffix
+    from .jobctx import generate_timestamp_suffix, get_workdir
     timestamp_suffix = generate_timestamp_suffix(backend, model_name)
     raw_stem = Path(input_path).stem
     # slugify stem: remove invalid chars and replace spaces/underscores with hyphens
     stem = re.sub(r"[^\w\s-]", "", raw_stem).strip()
     stem = re.sub(r"[\s_-]+", "-", stem)
+    srt_file = get_workdir() / f"{stem}{timestamp_suffix}.srt"
+
+    cache_key = None
+    if use_cache and _transcript_cache().enabled:
+        with stage("media hash", bytes=os.path.getsize(input_path)):
+            media_hash = file_digest(input_path)
+        key_parts = [_TRANSCRIPT_CACHE_VERSION, media_hash, model_name, device]
+        precision = _resolve_precision(device)
+        if precision != "fp32":
+            key_parts.append(f"precision={precision}")
+        if chunk_seconds and chunk_seconds > 0:
+            # Chunk seams can shift segment boundaries, so chunked results are keyed separately
+            key_parts.append(f"chunk={float(chunk_seconds)}")
+        cache_key = make_key(*key_parts)
+        cached = _transcript_cache().get(cache_key)
+        if debug:
+            print(f"__ Transcript cache {'hit' if cached is not None else 'miss'}: sha256={media_hash[:12]} model={model_name!r} device={device!r}")
+        if cached is not None:
+            print(f".. Using cached transcript for {input_path} ({model_name}, {device})")
+            srt_file.write_text(cached, encoding='utf-8')
+            if debug:
+                print(f"__ Saved intermediate SRT to {srt_file}")
+            return cached
+
+    # ffmpeg decodes the full-length audio track to 16 kHz mono PCM in memory
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError(
+            "ffmpeg not found in PATH; please install ffmpeg for transcription"
+        )
+    with stage("ffmpeg decode") as prof:
+        audio = load_audio(input_path, debug=debug)
+        prof['audio_seconds'] = round(len(audio) / SAMPLE_RATE, 1)
+    if debug:
+        # preserve decoded audio for inspection
+        dest = get_workdir() / f"{stem}{timestamp_suffix}.wav"
+        save_wav(audio, dest)
+        print(f"__ Saved intermediate audio to {dest} ({_human_size(os.path.getsize(dest))})")
     if debug:
-        wav_name = f"{stem}{timestamp_suffix}.wav"
+        # Confirm Whisper parameters and environment
+        import whisper
+        ver = getattr(whisper, "__version__", None)
+        print(f"__ whisper version: {ver}, model_name={model_name!r}, device={device!r}")
+        try:
+            import torch
+            print(
+                f"__ torch.cuda.is_available(): {torch.cuda.is_available()}, "
+                f"torch.cuda.device_count(): {torch.cuda.device_count()}"
+            )
+        except ImportError:
+            pass
+    chunks = split_on_silence(audio, chunk_seconds) if chunk_seconds and chunk_seconds > 0 else []
+    if len(chunks) > 1:
+        with stage("whisper transcribe (chunked)", chunks=len(chunks)), SrtWriter(srt_file) as writer:
+            transcribe_chunked(audio, chunks, model_name, writer, workers=chunk_workers, debug=debug, device=device)
+        srt_text = writer.close()
     else:
-        wav_name = None
-    tmp_wav = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    tmp_wav.close()
-    try:
-        cmd = ["ffmpeg", "-y", "-i", input_path, "-ac", "1", "-ar", "16000", "-vn", tmp_wav.name]
-        if debug:
-            print(f"__ Running ffmpeg conversion: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        if debug:
-            # report size of converted WAV
-            try:
-                size = os.path.getsize(tmp_wav.name)
-                n = float(size)
-                for unit in ('B','KiB','MiB','GiB'):
-                    if n < 1024.0:
-                        hr = f"{n:.2f}{unit}"
-                        break
-                    n /= 1024.0
-                else:
-                    hr = f"{n:.2f}TiB"
-                print(f"____ Converted WAV size: {hr}")
-            except Exception:
-                pass
-        if debug:
-            # Confirm Whisper parameters and environment
-            ver = getattr(whisper, "__version__", None)
-            print(f"__ whisper version: {ver}, model_name={model_name!r}, device={DEVICE!r}")
-            try:
-                import torch
-                print(
-                    f"__ torch.cuda.is_available(): {torch.cuda.is_available()}, "
-                    f"torch.cuda.device_count(): {torch.cuda.device_count()}"
-                )
-            except ImportError:
-                pass
         if debug: print(f"__ Loading model '{model_name}' for transcription")
-        model = load_model(model_name)
+        with stage("model load", model=model_name, device=device):
+            model = load_model(model_name, device=device)
         if debug: print(f"____ Model loaded.")
         if debug:
             try:
@@ -97,34 +527,20 @@ def transcribe_to_srt(
             except Exception:
                 print("** Failed to get model parameters, using default device")
                 pass
-        print(f".. Starting transcription of {tmp_wav.name}")
-        result = model.transcribe(tmp_wav.name)
-        # result = model.transcribe(tmp_wav.name, verbose=debug)
+        print(f".. Starting transcription of {input_path}")
+        with stage("whisper transcribe", model=model_name, device=device):
+            result = model.transcribe(audio)
         if debug: print(f"____ Transcription result length: {len(result)}")
-    finally:
-        if debug:
-            print(f"__ Transcription complete")
-            # preserve intermediate WAV for inspection
-            dest = Path.cwd() / wav_name
-            shutil.move(tmp_wav.name, dest)
-            print(f"__ Saved intermediate audio to {dest}")
-        else:
-            try:
-                os.remove(tmp_wav.name)
-            except OSError:
-                pass
-    # Build SRT from Whisper segments
-    subtitles = []
-    for i, seg in enumerate(result.get("segments", []), start=1):
-        start = timedelta(seconds=seg["start"])
-        end = timedelta(seconds=seg["end"])
-        content = seg.get("text", "").strip()
-        subtitle = srt.Subtitle(index=i, start=start, end=end, content=content)
-        subtitles.append(subtitle)
-        srt_text = srt.compose(subtitles)
-        # save SRT for debugging with timestamp suffix using global timestamp
-        srt_file = Path.cwd() / f"{stem}{timestamp_suffix}.srt"
-        srt_file.write_text(srt_text, encoding='utf-8')
-        if debug:
-            print(f"__ Saved intermediate SRT to {srt_file}")
+        if debug: print(f"__ Transcription complete")
+        # Build SRT from Whisper segments, appending each cue once
+        with stage("srt compose") as prof:
+            with SrtWriter(srt_file) as writer:
+                writer.add_segments(result.get("segments", []))
+            srt_text = writer.close()
+            prof['cues'] = writer.count
+    # SRT saved for debugging with timestamp suffix using global timestamp
+    if debug:
+        print(f"__ Saved intermediate SRT to {srt_file} ({writer.count} segments)")
+    if cache_key is not None:
+        _transcript_cache().set(cache_key, srt_text)
     return srt_text
@@ -0,0 +1,351 @@
+"""
+daemon.py
+
+Long-running server mode: `video-processor --serve` loads the Whisper model
+once and accepts jobs over localhost HTTP, so later runs skip the torch import
+and model load. A job is POSTed to /jobs as JSON and its console output is
+streamed back as newline-delimited JSON events, ending with a 'result' event.
+Jobs beyond the concurrency limit wait in a queue. cli.main hands Whisper jobs
+to a running daemon automatically (see submit_job).
+
+A job runs as the daemon's user, with the daemon's settings and API keys, in
+whatever directory it names. So every request must carry the token the daemon
+writes at startup to a file only its owner can read (see token_path); other
+local users cannot submit jobs or query it.
+"""
+import hmac
+import http.client
+import json
+import os
+import secrets
+import sys
+import threading
+import traceback
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = "127.0.0.1"
+
+# Options a job may pass through to the pipeline stages
+JOB_OPTIONS = {
+    "download_video", "transcript", "whisper_model", "chunk_seconds", "chunk_workers",
+    "llm_model", "temperature", "token_limit", "map_reduce", "window_tokens", "map_concurrency",
+    "backend", "yt_cookies", "debug", "use_cache", "compact",
+    "template", "variants", "fanout_concurrency", "fallbacks", "first_token_deadline", "hedge_after",
+    "resume",
+}
+
+
+def token_path(port: int) -> Path:
+    """File holding the access token of the daemon on PORT (under the cache dir, mode 0600)."""
+    from .config import get_settings
+
+    return Path(get_settings().CACHE_DIR) / f"daemon-{port}.token"
+
+
+def _write_token(port: int) -> str:
+    """Create a fresh token for the daemon on PORT, readable only by the current user."""
+    token = secrets.token_urlsafe(32)
+    path = token_path(port)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+    # O_EXCL: never write the token into a file (or symlink) someone else created
+    fd = os.open(str(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+def _read_token(port: int) -> str:
+    try:
+        return token_path(port).read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+
+
+class _ThreadRouter:
+    """
+    Stand-in for sys.stdout/sys.stderr that sends writes from a job thread to
+    that job's event stream and everything else to the original stream.
+    """
+
+    def __init__(self, stream, name: str):
+        self._stream = stream
+        self._name = name
+        self._local = threading.local()
+
+    def route(self, emit) -> None:
+        self._local.emit = emit
+
+    def current(self):
+        """The emit function writes from this thread are routed to, or None."""
+        return getattr(self._local, "emit", None)
+
+    def write(self, text):
+        if not isinstance(text, str):
+            # Lets click detect this as a text stream
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        emit = getattr(self._local, "emit", None)
+        if emit is None:
+            return self._stream.write(text)
+        if text:
+            emit({"event": "output", "stream": self._name, "text": text})
+        return len(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def carry_output(func):
+    """
+    FUNC wrapped so that, run in another thread, its console output goes to
+    the same job as the calling thread's; FUNC itself outside the daemon.
+    """
+    routers = [s for s in (sys.stdout, sys.stderr) if isinstance(s, _ThreadRouter)]
+    routes = [(router, router.current()) for router in routers]
+    if not any(emit for _, emit in routes):
+        return func
+
+    def run(*args, **kwargs):
+        saved = [(router, router.current()) for router in routers]
+        for router, emit in routes:
+            router.route(emit)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            for router, emit in saved:
+                router.route(emit)
+    return run
+
+
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, jobs: int, whisper_workers: int, debug: bool = False, token: str = None):
+        super().__init__(address, _Handler)
+        self.token = token or secrets.token_urlsafe(32)
+        self.job_slots = threading.BoundedSemaphore(max(1, jobs))
+        self.whisper_slots = threading.BoundedSemaphore(max(1, whisper_workers))
+        self.debug = debug
+        self.lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.stdout = _ThreadRouter(sys.stdout, "stdout")
+        self.stderr = _ThreadRouter(sys.stderr, "stderr")
+
+    def run_job(self, job: dict, emit) -> dict:
+        """Run one job in the calling thread, reporting its output through EMIT."""
+        from .jobctx import job_context, in_workdir
+        from .pipeline import fetch_source, transcribe_source, summarize_variants, is_url
+
+        cwd = job.get("cwd") or os.getcwd()
+        if not os.path.isdir(cwd):
+            raise RuntimeError(f"Job working directory does not exist: {cwd}")
+        options = {k: v for k, v in (job.get("options") or {}).items() if k in JOB_OPTIONS}
+        source = job["source"]
+        self.stdout.route(emit)
+        self.stderr.route(emit)
+        try:
+            with job_context(workdir=cwd, timestamp=job.get("timestamp")):
+                if not is_url(source):
+                    source = in_workdir(source)
+                state = fetch_source(source, youtube=bool(job.get("youtube")), **options)
+                if state["text"] is None:
+                    with self.whisper_slots:
+                        state = transcribe_source(state, **options)
+                return summarize_variants(state, output=job.get("output"), **options)
+        finally:
+            self.stdout.route(None)
+            self.stderr.route(None)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "video-processor"
+
+    def log_message(self, format, *args):
+        if self.server.debug:
+            print(f"__ Daemon: {self.address_string()} {format % args}", file=sys.__stderr__)
+
+    def _send_json(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        """Check the request's bearer token; answers 401 and returns False if it is missing or wrong."""
+        given = self.headers.get("Authorization", "")
+        if hmac.compare_digest(given.encode("utf-8"), f"Bearer {self.server.token}".encode("utf-8")):
+            return True
+        self._send_json(401, {"error": "missing or invalid daemon token"})
+        return False
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        from .cli import _pkg_version
+        from .converter import loaded_models
+
+        with self.server.lock:
+            running, queued = self.server.running, self.server.queued
+        self._send_json(200, {
+            "service": "video-processor",
+            "version": _pkg_version,
+            "pid": os.getpid(),
+            "running": running,
+            "queued": queued,
+            "models": [list(m) for m in loaded_models()],
+        })
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            job = json.loads(self.rfile.read(length) or b"{}")
+            if not job.get("source"):
+                raise ValueError("missing 'source'")
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid job: {e}"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        write_lock = threading.Lock()
+        connected = [True]
+
+        def emit(event: dict) -> None:
+            # A client that hangs up does not cancel the job; its output is dropped
+            if not connected[0]:
+                return
+            line = (json.dumps(event) + "\n").encode("utf-8")
+            with write_lock:
+                try:
+                    self.wfile.write(line)
+                    self.wfile.flush()
+                except OSError:
+                    connected[0] = False
+
+        server = self.server
+        if not server.job_slots.acquire(blocking=False):
+            with server.lock:
+                server.queued += 1
+                position = server.queued
+            emit({"event": "queued", "position": position})
+            server.job_slots.acquire()
+            with server.lock:
+                server.queued -= 1
+        with server.lock:
+            server.running += 1
+        print(f".. Daemon: starting job {job['source']}", file=sys.__stderr__)
+        try:
+            result = server.run_job(job, emit)
+            emit({"event": "result", "ok": True, "output": result["output"], "truncated": result["truncated"]})
+            print(f".. Daemon: finished job {job['source']}", file=sys.__stderr__)
+        except Exception as e:
+            if not isinstance(e, RuntimeError):
+                traceback.print_exc(file=sys.__stderr__)
+            error = str(e) if isinstance(e, RuntimeError) else f"{type(e).__name__}: {e}"
+            emit({"event": "result", "ok": False, "error": error})
+            print(f"** Daemon: job {job['source']} failed: {error}", file=sys.__stderr__)
+        finally:
+            with server.lock:
+                server.running -= 1
+            server.job_slots.release()
+
+
+def serve(port: int, jobs: int = 2, whisper_model: str = None, whisper_workers: int = 1, debug: bool = False) -> None:
+    """Preload WHISPER_MODEL and serve jobs on localhost:PORT until interrupted."""
+    server = JobServer((HOST, port), jobs=jobs, whisper_workers=whisper_workers, debug=debug)
+    server.token = _write_token(port)
+    if whisper_model:
+        from .converter import load_model
+        print(f".. Daemon: loading Whisper model '{whisper_model}'", file=sys.stderr)
+        try:
+            load_model(whisper_model)
+        except Exception as e:
+            # Caption-only and transcript jobs still work without Whisper
+            print(f"** Daemon: could not preload Whisper model '{whisper_model}': {e}", file=sys.stderr)
+    sys.stdout, sys.stderr = server.stdout, server.stderr
+    print(f".. Daemon listening on http://{HOST}:{port} (jobs={jobs}, whisper_workers={whisper_workers}); Ctrl-C to stop", file=sys.__stderr__)
+    print(f".. Daemon: access token in {token_path(port)}", file=sys.__stderr__)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(".. Daemon: shutting down", file=sys.__stderr__)
+    finally:
+        sys.stdout, sys.stderr = server.stdout._stream, server.stderr._stream
+        server.server_close()
+        try:
+            token_path(port).unlink()
+        except OSError:
+            pass
+        from .converter import release_models
+        release_models()
+
+
+def submit_job(port: int, job: dict, connect_timeout: float = 0.5):
+    """
+    Send JOB to the daemon on localhost:PORT, relaying its output to this
+    process's stdout/stderr as it arrives.
+
+    Returns:
+        dict | None: the final 'result' event, or None if no daemon answered
+        or this user cannot read its token (the caller then runs the job itself).
+    Raises RuntimeError if the daemon accepted the job but the connection was lost.
+    """
+    token = _read_token(port)
+    if token is None:
+        return None
+    conn = http.client.HTTPConnection(HOST, port, timeout=connect_timeout)
+    try:
+        conn.connect()
+    except OSError:
+        return None
+    print(f".. Handing job to daemon on {HOST}:{port}", file=sys.stderr)
+    try:
+        # Jobs can run for a long time; only the connect is bounded
+        conn.sock.settimeout(None)
+        body = json.dumps(job).encode("utf-8")
+        conn.request(
+            "POST", "/jobs", body=body, headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+        )
+        resp = conn.getresponse()
+        if resp.status != 200 or resp.getheader("Content-Type") != "application/x-ndjson":
+            # Something else is listening on the port, or the job was rejected
+            print(f"** Daemon on port {port} did not accept the job (HTTP {resp.status}); running locally", file=sys.stderr)
+            return None
+        for raw in resp:
+            event = json.loads(raw)
+            kind = event.get("event")
+            if kind == "output":
+                stream = sys.stderr if event.get("stream") == "stderr" else sys.stdout
+                stream.write(event.get("text", ""))
+                stream.flush()
+            elif kind == "queued":
+                print(f".. Daemon busy; job queued (position {event.get('position')})", file=sys.stderr)
+            elif kind == "result":
+                return event
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        raise RuntimeError(f"Lost connection to the video-processor daemon: {e}")
+    finally:
+        conn.close()
+    raise RuntimeError("Lost connection to the video-processor daemon before the job finished")
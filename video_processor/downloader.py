@@ -1,7 +1,8 @@
 """
 downloader.py
 
-Download YouTube captions as SRT using yt-dlp.
+Download YouTube captions as SRT using yt-dlp, and expand playlist and
+channel URLs into their videos.
 """
 import os
 import sys
@@ -9,13 +10,189 @@ import tempfile
 import subprocess
 import shutil
 import re
+import glob
+import functools
+import json
 from pathlib import Path
-from datetime import datetime
 
-def download_srt(url: str, debug: bool = False, backend: str = 'default', model: str = 'default', yt_cookies: str = None) -> str:
+from .config import get_settings
+from .cache import DiskCache, make_key
+from .profiling import stage
+
+@functools.lru_cache(maxsize=None)
+def _metadata_cache() -> DiskCache:
+    settings = get_settings()
+    return DiskCache(
+        "metadata", max_bytes=int(settings.METADATA_CACHE_MB * 1024 * 1024), ttl=settings.METADATA_CACHE_TTL_DAYS * 86400
+    )
+
+def _extract_info(url: str, debug: bool = False, yt_cookies: str = None) -> dict:
+    """
+    Run a single yt-dlp metadata extraction for URL (no download). Uses the yt_dlp
+    module in-process when importable, else one `yt-dlp -J` subprocess. YT_COOKIES
+    names a browser to take cookies from, as for the downloads.
+    """
+    try:
+        import yt_dlp
+    except ImportError:
+        yt_dlp = None
+    if yt_dlp is not None:
+        if debug:
+            print(f"__ Probing metadata in-process via yt_dlp {getattr(yt_dlp.version, '__version__', '?')}: {url}", file=sys.stderr)
+        opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'noplaylist': True}
+        if yt_cookies:
+            opts['cookiesfrombrowser'] = (yt_cookies,)
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return ydl.sanitize_info(ydl.extract_info(url, download=False))
+    cmd = ["yt-dlp", "-J", "-q", "--no-warnings", "--no-playlist", url]
+    if yt_cookies:
+        cmd += ["--cookies-from-browser", yt_cookies]
+    if debug:
+        print(f"__ Probing metadata: {' '.join(cmd)}", file=sys.stderr)
+    # Don't use check=True since yt-dlp may have warnings but still succeed
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if not result.stdout.strip():
+        raise RuntimeError((result.stderr or "yt-dlp returned no metadata").strip())
+    return json.loads(result.stdout)
+
+def probe_metadata(url: str, debug: bool = False, use_cache: bool = True, yt_cookies: str = None) -> dict:
+    """
+    Resolve id, title, duration, chapters and available subtitle tracks for URL with
+    one extraction (with the browser cookies of YT_COOKIES, if given), caching the
+    result on disk. Returns {} if the probe fails.
+    """
+    key = make_key(url)
+    if use_cache:
+        cached = _metadata_cache().get(key)
+        if cached is not None:
+            if debug:
+                print(f"__ Metadata cache hit for {url}: id={cached.get('id')!r}", file=sys.stderr)
+            return cached
+    try:
+        with stage("yt-dlp probe"):
+            info = _extract_info(url, debug=debug, yt_cookies=yt_cookies)
+    except Exception as e:
+        if debug:
+            print(f"__ Metadata probe failed: {e}", file=sys.stderr)
+        return {}
+    meta = {
+        'id': info.get('id'),
+        'title': info.get('title'),
+        'duration': info.get('duration'),
+        'webpage_url': info.get('webpage_url') or url,
+        'chapters': [
+            {'start_time': c.get('start_time'), 'end_time': c.get('end_time'), 'title': c.get('title')}
+            for c in (info.get('chapters') or [])
+        ],
+        'subtitles': sorted((info.get('subtitles') or {}).keys()),
+        'automatic_captions': sorted((info.get('automatic_captions') or {}).keys()),
+    }
+    if debug:
+        print(
+            f"__ Metadata: id={meta['id']!r} title={meta['title']!r} duration={meta['duration']} "
+            f"chapters={len(meta['chapters'])} subtitles={meta['subtitles']}",
+            file=sys.stderr,
+        )
+    if meta['id']:
+        _metadata_cache().set(key, meta)
+    return meta
+
+# Playlist pages, channel handles and channel tabs (a watch URL with list= is a playlist too)
+_PLAYLIST_URL = re.compile(
+    r"[?&]list=|youtube\.com/(?:playlist\b|@[^/?#]+/?(?:$|[?#]|(?:videos|streams|shorts|featured)\b)|"
+    r"(?:channel|c|user)/[^/?#]+/?(?:$|[?#]|(?:videos|streams|shorts|featured)\b))"
+)
+
+# A channel's home page without a tab
+_CHANNEL_HOME = re.compile(r"^(https?://(?:www\.|m\.)?youtube\.com/(?:@[^/?#]+|(?:channel|c|user)/[^/?#]+))/?(?:[?#].*)?$")
+
+def is_playlist_url(url: str) -> bool:
+    """True if URL is a YouTube playlist or channel rather than a single video."""
+    return bool(_PLAYLIST_URL.search(url))
+
+def _flat_entries(info: dict) -> list:
+    """Video entries of a flat extraction, descending into channel tabs (which are playlists themselves)."""
+    videos = []
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        if entry.get('_type') == 'playlist' or entry.get('entries'):
+            videos += _flat_entries(entry)
+        elif entry.get('id') and entry.get('ie_key', 'Youtube') == 'Youtube':
+            videos.append(entry)
+    return videos
+
+def expand_playlist(url: str, debug: bool = False, yt_cookies: str = None, limit: int = 0) -> list:
+    """
+    The videos of a playlist or channel URL, in playlist order, as dicts with
+    'id', 'url' and 'title'; only the first LIMIT when LIMIT > 0. Uses flat
+    extraction: one listing request per page of the playlist, no fetch of each
+    video's page. Duplicates are dropped.
+    """
+    # A channel's home page lists its tabs, not its videos
+    home = _CHANNEL_HOME.match(url)
+    if home:
+        url = home.group(1) + "/videos"
+    try:
+        import yt_dlp
+    except ImportError:
+        yt_dlp = None
+    with stage("yt-dlp playlist"):
+        if yt_dlp is not None:
+            if debug:
+                print(f"__ Expanding playlist in-process via yt_dlp: {url}", file=sys.stderr)
+            opts = {'quiet': True, 'no_warnings': True, 'skip_download': True, 'extract_flat': 'in_playlist'}
+            if limit > 0:
+                opts['playlistend'] = limit
+            if yt_cookies:
+                opts['cookiesfrombrowser'] = (yt_cookies,)
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        else:
+            cmd = ["yt-dlp", "-J", "-q", "--no-warnings", "--flat-playlist"]
+            if limit > 0:
+                cmd += ["--playlist-end", str(limit)]
+            if yt_cookies:
+                cmd += ["--cookies-from-browser", yt_cookies]
+            cmd.append(url)
+            if debug:
+                print(f"__ Expanding playlist: {' '.join(cmd)}", file=sys.stderr)
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if not result.stdout.strip():
+                raise RuntimeError((result.stderr or "yt-dlp returned no playlist").strip())
+            info = json.loads(result.stdout)
+    videos, seen = [], set()
+    for entry in _flat_entries(info):
+        if entry['id'] in seen:
+            continue
+        seen.add(entry['id'])
+        videos.append({
+            'id': entry['id'],
+            'url': f"https://www.youtube.com/watch?v={entry['id']}",
+            'title': entry.get('title'),
+        })
+    if debug:
+        print(f"__ Playlist {info.get('title')!r}: {len(videos)} videos", file=sys.stderr)
+    return videos
+
+def _find_srt(output_dir: str, video_id: str = None) -> str:
+    """
+    The SRT yt-dlp wrote for VIDEO_ID in OUTPUT_DIR ({id}.{lang}.srt), preferring
+    English; None if there is none. Without an id, the first .srt found.
+    """
+    names = sorted(f for f in os.listdir(output_dir) if f.lower().endswith('.srt'))
+    if video_id:
+        names = [f for f in names if f == f"{video_id}.srt" or f.startswith(f"{video_id}.")]
+    if not names:
+        return None
+    english = [f for f in names if f.lower().endswith(('.en.srt', '.en-orig.srt'))]
+    return os.path.join(output_dir, (english or names)[0])
+
+def download_srt(url: str, debug: bool = False, backend: str = 'default', model: str = 'default', yt_cookies: str = None, meta: dict = None) -> str:
     """
     Download English subtitles for a YouTube URL, preferring creator-provided subs and
     falling back to auto-generated. Returns the SRT content as a string.
+    META is the probe_metadata() result for URL; it is probed here if not given.
     """
     # Ensure yt-dlp is available
     if shutil.which("yt-dlp") is None:
@@ -27,33 +204,17 @@ def download_srt(url: str, debug: bool = False, backend: str = 'default', model:
     output_dir = tempfile.mkdtemp(prefix="vpdl-")
     base_output = os.path.join(output_dir, "%(id)s.%(ext)s")
     
-    # Get video info for proper filename formatting
-    video_id = None
-    video_title = None
-    try:
-        # Get video ID - don't use check=True since yt-dlp may have warnings
-        id_result = subprocess.run(
-            ["yt-dlp", "--get-id", "-q", url],
-            capture_output=True, text=True
-        )
-        # Check if we got a video ID, regardless of return code (yt-dlp may return non-zero with warnings)
-        if id_result.stdout.strip():
-            video_id = id_result.stdout.strip()
-        
-        # Get video title - don't use check=True since yt-dlp may have warnings  
-        title_result = subprocess.run(
-            ["yt-dlp", "--get-title", "-q", url],
-            capture_output=True, text=True
-        )
-        # Check if we got a title, regardless of return code (yt-dlp may return non-zero with warnings)
-        if title_result.stdout.strip():
-            video_title = title_result.stdout.strip()
-    except Exception:
-        pass
+    # Video info for proper filename formatting
+    if meta is None:
+        meta = probe_metadata(url, debug=debug, yt_cookies=yt_cookies)
+    video_id = meta.get('id')
+    video_title = meta.get('title')
+    # Creator subtitles are only worth a yt-dlp run if the probe saw an English track
+    has_creator_subs = 'en' in meta['subtitles'] if 'subtitles' in meta else True
     
     try:
         # Creator-provided subtitles
-        cmd = ["yt-dlp", "-q", "--no-warnings", "--no-continue"]
+        cmd = ["yt-dlp", "-q", "--no-warnings", "--no-continue", "--no-playlist"]
         if yt_cookies:
             cmd += ["--cookies-from-browser", yt_cookies]
         cmd += [
@@ -62,7 +223,7 @@ def download_srt(url: str, debug: bool = False, backend: str = 'default', model:
             "-o", base_output,
             url,
         ]
-        if debug:
+        if debug and has_creator_subs:
             # Create executable command with variable substitution
             exec_cmd = cmd.copy()
             if video_id:
@@ -72,19 +233,23 @@ def download_srt(url: str, debug: bool = False, backend: str = 'default', model:
             print(f"__ Running creator subtitles extraction: {' '.join(exec_cmd)}", file=sys.stderr)
         
         # Try creator subtitles first, but don't fail if they don't exist
-        try:
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        except subprocess.CalledProcessError:
-            # Creator subtitles not available, will try auto-generated next
+        if not has_creator_subs:
             if debug:
-                print("__ Creator subtitles not available", file=sys.stderr)
+                print("__ Skipping creator subtitles extraction: metadata lists no 'en' subtitles", file=sys.stderr)
+        else:
+            try:
+                with stage("yt-dlp creator subs"):
+                    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            except subprocess.CalledProcessError:
+                # Creator subtitles not available, will try auto-generated next
+                if debug:
+                    print("__ Creator subtitles not available", file=sys.stderr)
 
         # If none, fallback to auto-generated subtitles
-        found = any(f.lower().endswith('.srt') for f in os.listdir(output_dir))
-        if not found:
+        if _find_srt(output_dir, video_id) is None:
             if debug:
                 print("____ There aren't any subtitles to convert", file=sys.stderr)
-            cmd_auto = ["yt-dlp", "-q", "--no-warnings", "--no-continue"]
+            cmd_auto = ["yt-dlp", "-q", "--no-warnings", "--no-continue", "--no-playlist"]
             if yt_cookies:
                 cmd_auto += ["--cookies-from-browser", yt_cookies]
             cmd_auto += [
@@ -103,62 +268,116 @@ def download_srt(url: str, debug: bool = False, backend: str = 'default', model:
                 print(f"__ Running auto subtitles extraction: {' '.join(exec_cmd_auto)}", file=sys.stderr)
             
             try:
-                subprocess.run(cmd_auto, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                with stage("yt-dlp auto subs"):
+                    subprocess.run(cmd_auto, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             except subprocess.CalledProcessError:
                 # yt-dlp may exit with code 1 even when subtitles are successfully downloaded
                 # We'll check for actual files below rather than relying on exit code
                 if debug:
                     print("__ yt-dlp exited with error code (checking for subtitle files anyway)", file=sys.stderr)
             # Note where file is written (VTT -> SRT conversion)
-            if debug:
-                for fname in os.listdir(output_dir):
-                    if fname.lower().endswith('.srt'):
-                        path = os.path.join(output_dir, fname)
-                        print(f"____ Writing subtitles to file {path}", file=sys.stderr)
-                        break
+            path = _find_srt(output_dir, video_id)
+            if debug and path:
+                print(f"____ Writing subtitles to file {path}", file=sys.stderr)
 
         # Read SRT content and report size
-        for fname in os.listdir(output_dir):
-            if fname.lower().endswith('.srt'):
-                path = os.path.join(output_dir, fname)
-                size = os.path.getsize(path)
-                # human-readable size
-                n = float(size)
-                for unit in ('B','KiB','MiB','GiB'):
-                    if n < 1024.0:
-                        hr = f"{n:.2f}{unit}"
-                        break
-                    n /= 1024.0
-                else:
-                    hr = f"{n:.2f}TiB"
-                print(f".. Received subtitles ({hr})", file=sys.stderr)
-                
-                # Read SRT content
+        path = _find_srt(output_dir, video_id)
+        if path is not None:
+            size = os.path.getsize(path)
+            # human-readable size
+            n = float(size)
+            for unit in ('B','KiB','MiB','GiB'):
+                if n < 1024.0:
+                    hr = f"{n:.2f}{unit}"
+                    break
+                n /= 1024.0
+            else:
+                hr = f"{n:.2f}TiB"
+            print(f".. Received subtitles ({hr})", file=sys.stderr)
+            
+            # Read SRT content
+            with stage("caption read", bytes=size):
                 with open(path, encoding='utf-8') as f:
                     srt_content = f.read()
-                
-                # Persist SRT file with proper filename formatting
-                # Use same slugification as MD files
-                from .cli import slugify_filename_component
-                if video_title:
-                    slug = slugify_filename_component(video_title)
-                elif video_id:
-                    slug = slugify_filename_component(video_id)
-                else:
-                    slug = slugify_filename_component(Path(path).stem)
-                # Add timestamp suffix to SRT files using global timestamp
-                from .cli import generate_timestamp_suffix
-                timestamp_suffix = generate_timestamp_suffix(backend, model)
-                srt_path = Path.cwd() / f"{slug}{timestamp_suffix}.srt"
+            
+            # Persist SRT file with proper filename formatting
+            # Use same slugification as MD files
+            from .jobctx import slugify_filename_component
+            if video_title:
+                slug = slugify_filename_component(video_title)
+            elif video_id:
+                slug = slugify_filename_component(video_id)
+            else:
+                slug = slugify_filename_component(Path(path).stem)
+            # Add timestamp suffix to SRT files using global timestamp
+            from .jobctx import generate_timestamp_suffix, get_workdir
+            timestamp_suffix = generate_timestamp_suffix(backend, model)
+            srt_path = get_workdir() / f"{slug}{timestamp_suffix}.srt"
+            with stage("caption write", bytes=size):
                 srt_path.write_text(srt_content, encoding='utf-8')
-                if debug:
-                    print(f"__ Saved SRT file to {srt_path}", file=sys.stderr)
-                else:
-                    print(f".. Saved SRT file to {srt_path}", file=sys.stderr)
-                
-                return srt_content
+            if debug:
+                print(f"__ Saved SRT file to {srt_path}", file=sys.stderr)
+            else:
+                print(f".. Saved SRT file to {srt_path}", file=sys.stderr)
+            
+            return srt_content
         raise RuntimeError(
             f"No SRT file found in {output_dir}: yt-dlp did not produce any .srt. Try downloading (-d) the video to enable whisper transcription."
         )
     finally:
         shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def download_video(url: str, debug: bool = False, backend: str = 'default', model: str = 'default', yt_cookies: str = None, meta: dict = None) -> str:
+    """
+    Download the best single-file video for a YouTube URL into the working directory.
+    The filename uses slug + _backend_model_timestamp. Returns the downloaded file path,
+    or None if yt-dlp succeeded but no matching file could be located.
+    META is the probe_metadata() result for URL; it is probed here if not given.
+    """
+    from .cli import strip_media_creation_time
+    from .jobctx import slugify_filename_component, generate_timestamp_suffix, in_workdir
+    if meta is None:
+        meta = probe_metadata(url, debug=debug, yt_cookies=yt_cookies)
+    # sanitize title for output basename (slugify like for SRT)
+    title = meta.get('title')
+    # Add timestamp suffix to video files
+    timestamp_suffix = generate_timestamp_suffix(backend, model)
+    if title:
+        # Use proper filename cleaning function
+        slug = slugify_filename_component(title)
+        out_template = f"{slug}{timestamp_suffix}.%(ext)s"
+    else:
+        # Fallback to video ID if title extraction fails
+        out_template = f"%(id)s{timestamp_suffix}.%(ext)s"
+    cmd_vid = ["yt-dlp"]
+    if not debug:
+        cmd_vid += ["-q", "--no-warnings"]
+    # Select best single file format (highest resolution) - use "b" to suppress warning
+    cmd_vid += ["--no-mtime", "--no-continue", "--no-playlist", "-f", "b"]
+    if yt_cookies:
+        cmd_vid += ["--cookies-from-browser", yt_cookies]
+    cmd_vid += ["-o", in_workdir(out_template), url]
+    if debug:
+        print(f"__ Running video download: {' '.join(cmd_vid)}", file=sys.stderr)
+    try:
+        with stage("yt-dlp video download"):
+            subprocess.run(cmd_vid, check=True)
+        if title:
+            base_pattern = f"{slug}{timestamp_suffix}.*"
+        elif meta.get('id'):
+            base_pattern = f"{meta['id']}{timestamp_suffix}.*"
+        else:
+            base_pattern = f"*{timestamp_suffix}.*"
+        # Outside a daemon job in_workdir() leaves the pattern relative to the cwd
+        search_pattern = in_workdir(base_pattern)
+        if search_pattern != base_pattern:
+            search_pattern = os.path.join(glob.escape(os.path.dirname(search_pattern)), base_pattern)
+        downloaded_video_file = None
+        for video_file in glob.glob(search_pattern):
+            if os.path.isfile(video_file):
+                strip_media_creation_time(Path(video_file), debug=debug)
+                downloaded_video_file = video_file
+    except Exception as e:
+        raise RuntimeError(f"Error downloading video: {e}")
+    return downloaded_video_file
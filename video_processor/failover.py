@@ -0,0 +1,191 @@
+"""
+failover.py
+
+Backend policy for chat(): an ordered list of (backend, model) targets tried
+behind one call. The first target starts at once; the next one starts when
+the running attempts fail or come back truncated, when one misses the
+first-token deadline (it is then cancelled), or, with hedging, when none has
+produced a first token after HEDGE_AFTER seconds. The first complete,
+untruncated answer wins and every other attempt is cancelled.
+
+Output streams live from the first attempt to produce a token. If a
+different attempt wins, ON_RESET is called to discard what was streamed and
+the winner's text is replayed through ON_TOKEN.
+"""
+import sys
+import threading
+import time
+
+from .jobctx import bind_job
+from .llm_client import chat, ChatCancelled
+from .llm_http import CancelToken
+
+
+class AllTargetsFailed(RuntimeError):
+    """Every target failed; chained (__cause__) to the primary target's own error when it raised one."""
+
+
+class _Attempt:
+    def __init__(self, index: int, backend: str, model: str):
+        self.index = index
+        self.backend = backend
+        self.model = model
+        self.cancel = CancelToken()
+        self.stats = {}
+        self.parts = []
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.done = False
+        self.content = None
+        self.truncated = False
+        self.error = None
+        self.missed_deadline = False
+
+    @property
+    def label(self) -> str:
+        return f"{self.backend}:{self.model}"
+
+
+def _failure(attempt: _Attempt, first_token_deadline: float) -> str:
+    if attempt.missed_deadline:
+        return f"no first token within {first_token_deadline:g}s"
+    if attempt.error is None:
+        return "empty answer"
+    if isinstance(attempt.error, ChatCancelled):
+        return "cancelled"
+    return str(attempt.error).splitlines()[0]
+
+
+def chat_with_failover(
+    prompt: str,
+    targets: list,
+    *,
+    first_token_deadline: float = 0.0,
+    hedge_after: float = 0.0,
+    on_token=None,
+    on_reset=None,
+    stats: dict = None,
+    **chat_options,
+) -> tuple:
+    """
+    Answer PROMPT with the first of TARGETS ((backend, model) pairs, in order of
+    preference) to return a complete response. FIRST_TOKEN_DEADLINE and
+    HEDGE_AFTER are seconds (0 disables each). CHAT_OPTIONS go to every chat() call.
+
+    STATS, if given, gets the winner's chat() stats plus 'backend', 'model' and
+    'attempts' (labels of every target started).
+
+    Returns:
+        tuple[str, bool, str, str]: (content, was_truncated, backend, model).
+        A truncated answer is returned only if no target answered in full.
+    Raises the target's own error when the only target failed, else
+    AllTargetsFailed chained to the primary target's error.
+    """
+    if len(targets) == 1 and not first_token_deadline:
+        # Nothing to fail over to or cancel: a plain call, streamed directly
+        backend, model = targets[0]
+        content, truncated = chat(prompt, model=model, backend=backend, on_token=on_token, stats=stats, **chat_options)
+        if stats is not None:
+            stats.update(backend=backend, model=model, attempts=[f"{backend}:{model}"])
+        return content, truncated, backend, model
+
+    changed = threading.Condition()
+    attempts = []
+    leader = [None]  # the attempt whose tokens are streamed live
+
+    def feed(attempt: _Attempt, chunk: str) -> None:
+        with changed:
+            if attempt.first_token is None:
+                attempt.first_token = time.perf_counter()
+                changed.notify_all()
+            attempt.parts.append(chunk)
+            if leader[0] is None:
+                leader[0] = attempt
+            live = leader[0] is attempt
+        if live and on_token is not None:
+            on_token(chunk)
+
+    def run(attempt: _Attempt) -> None:
+        try:
+            content, truncated = chat(
+                prompt, model=attempt.model, backend=attempt.backend, stats=attempt.stats,
+                on_token=lambda chunk: feed(attempt, chunk), cancel=attempt.cancel, **chat_options,
+            )
+            outcome = (content, truncated, None)
+        except Exception as e:
+            outcome = (None, False, e)
+        with changed:
+            attempt.content, attempt.truncated, attempt.error = outcome
+            attempt.done = True
+            changed.notify_all()
+
+    def launch() -> None:
+        backend, model = targets[len(attempts)]
+        attempt = _Attempt(len(attempts), backend, model)
+        attempts.append(attempt)
+        if attempt.index:
+            print(f".. Trying fallback LLM {attempt.label}", file=sys.stderr)
+        threading.Thread(target=bind_job(run), args=(attempt,), name=f"vp-failover-{attempt.index}", daemon=True).start()
+
+    winner = None
+    with changed:
+        launch()
+        while True:
+            running = [a for a in attempts if not a.done and not a.cancel.cancelled]
+            finished = [a for a in attempts if a.done and a.error is None]
+            winner = next((a for a in finished if not a.truncated and a.content), None)
+            if winner is not None:
+                break
+            now = time.perf_counter()
+            waits = []
+            for attempt in running:
+                if attempt.first_token is None and first_token_deadline > 0:
+                    remaining = attempt.started + first_token_deadline - now
+                    if remaining <= 0:
+                        print(f"** No first token from {attempt.label} within {first_token_deadline:g}s; giving up on it", file=sys.stderr)
+                        attempt.missed_deadline = True
+                        attempt.cancel.cancel()
+                        continue
+                    waits.append(remaining)
+            running = [a for a in running if not a.cancel.cancelled]
+            more = len(attempts) < len(targets)
+            if not running:
+                if not more:
+                    break
+                launch()
+                continue
+            if more and hedge_after > 0 and all(a.first_token is None for a in running):
+                remaining = attempts[-1].started + hedge_after - now
+                if remaining <= 0:
+                    print(f".. {attempts[-1].label} slow to answer; hedging", file=sys.stderr)
+                    launch()
+                    continue
+                waits.append(remaining)
+            changed.wait(min(waits) if waits else None)
+
+        for attempt in attempts:
+            if attempt is not winner and not attempt.done:
+                attempt.cancel.cancel()
+        if winner is None:
+            # Fall back to the best truncated answer, then to the errors
+            winner = next((a for a in attempts if a.done and a.error is None and a.content), None)
+        streamed = leader[0]
+
+    if winner is None:
+        primary = attempts[0]
+        cause = primary.error if not primary.missed_deadline and not isinstance(primary.error, ChatCancelled) else None
+        if len(attempts) == 1 and cause is not None:
+            raise cause
+        errors = "; ".join(f"{a.label}: {_failure(a, first_token_deadline)}" for a in attempts)
+        raise AllTargetsFailed(f"All LLM targets failed ({errors})") from cause
+    if streamed is not winner:
+        if streamed is not None and on_reset is not None:
+            on_reset()
+        if on_token is not None:
+            on_token(winner.content)
+    if winner.index:
+        print(f".. Answer from fallback LLM {winner.label}", file=sys.stderr)
+    if stats is not None:
+        stats.update(winner.stats)
+        stats.update(backend=winner.backend, model=winner.model, attempts=[a.label for a in attempts])
+    return winner.content, winner.truncated, winner.backend, winner.model
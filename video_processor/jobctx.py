@@ -0,0 +1,124 @@
+"""
+jobctx.py
+
+Per-job context shared by the CLI, the daemon and the library modules: the
+run's timestamp and working directory, and the artifact naming built on them.
+Daemon jobs run in threads, so both are kept per thread (job_context) and
+carried into worker threads with bind_job.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Global timestamp for consistent naming across all artifacts
+_global_timestamp = None
+# Per-job overrides of the timestamp and working directory (daemon jobs run in threads)
+_job = threading.local()
+
+
+def get_global_timestamp() -> str:
+    """Get the global timestamp for this execution (set once at start)"""
+    global _global_timestamp
+    timestamp = getattr(_job, "timestamp", None)
+    if timestamp:
+        return timestamp
+    if _global_timestamp is None:
+        _global_timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return _global_timestamp
+
+
+@contextmanager
+def job_context(workdir: str = None, timestamp: str = None):
+    """Run the enclosed code in this thread as a job rooted at WORKDIR, naming artifacts with TIMESTAMP."""
+    saved = (getattr(_job, "workdir", None), getattr(_job, "timestamp", None))
+    _job.workdir, _job.timestamp = workdir, timestamp
+    try:
+        yield
+    finally:
+        _job.workdir, _job.timestamp = saved
+
+
+def bind_job(func):
+    """
+    FUNC wrapped to run in a worker thread as part of the calling thread's job:
+    same working directory and timestamp, and (in the daemon) output sent to
+    the same client.
+    """
+    from .daemon import carry_output
+
+    workdir, timestamp = getattr(_job, "workdir", None), getattr(_job, "timestamp", None)
+    func = carry_output(func)
+
+    def run(*args, **kwargs):
+        with job_context(workdir=workdir, timestamp=timestamp):
+            return func(*args, **kwargs)
+    return run
+
+
+def get_workdir() -> Path:
+    """Directory artifacts are written to: the job's working directory, else the process cwd."""
+    workdir = getattr(_job, "workdir", None)
+    return Path(workdir) if workdir else Path.cwd()
+
+
+def in_workdir(path: str) -> str:
+    """Resolve a relative PATH against the job's working directory (unchanged outside a job)."""
+    workdir = getattr(_job, "workdir", None)
+    if workdir and not os.path.isabs(path):
+        return os.path.join(workdir, path)
+    return path
+
+
+def slugify_filename_component(text: str) -> str:
+    """
+    Slugify text for safe use in filenames.
+    Based on filerenamer approach: replace problematic chars with safe alternatives.
+    """
+    if not text:
+        return ""
+
+    # Replace common problematic characters with safe alternatives
+    replacements = {
+        '/': '-',
+        '\\': '-',
+        ':': '-',
+        '*': '-',
+        '?': '-',
+        '"': '-',
+        "'": '-',
+        '’': '-',
+        '<': '-',
+        '>': '-',
+        '|': '-',
+        ' ': '-',
+        '\t': '-',
+        '\n': '-',
+        '\r': '-',
+    }
+
+    result = text
+    for old_char, new_char in replacements.items():
+        result = result.replace(old_char, new_char)
+
+    # Remove any remaining non-printable characters
+    result = ''.join(char for char in result if char.isprintable())
+
+    # Collapse multiple consecutive hyphens into single hyphens
+    while '--' in result:
+        result = result.replace('--', '-')
+
+    # Remove leading/trailing hyphens
+    result = result.strip('-')
+
+    return result
+
+
+def generate_timestamp_suffix(backend: str, model: str) -> str:
+    """Generate timestamp suffix using global timestamp: _backend_model_yyyymmdd-hhmmss"""
+    timestamp = get_global_timestamp()
+    # Slugify backend and model names for safe filename use
+    safe_backend = slugify_filename_component(backend)
+    safe_model = slugify_filename_component(model)
+    return f"_{safe_backend}_{safe_model}_{timestamp}"
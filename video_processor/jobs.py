@@ -0,0 +1,214 @@
+"""
+jobs.py
+
+Local record of each source's progress through the pipeline, kept in a SQLite
+database next to the caches. Every run records the stages it completes for a
+source: metadata, captions or downloaded media, Whisper SRT, prompt plan and
+summary. Each stage keeps its status, artifact path and a little data.
+With --resume, a rerun reads them back and continues from the first incomplete
+stage instead of downloading and transcribing again.
+
+Transcripts are copied into the store (under <cache_dir>/jobs/) because the
+originals are temp files or timestamp-suffixed names a rerun cannot find.
+"""
+import functools
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .cache import make_key
+from .config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    video_id TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_video_id ON jobs (video_id);
+CREATE TABLE IF NOT EXISTS stages (
+    job TEXT NOT NULL REFERENCES jobs (key),
+    name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    artifact TEXT,
+    data TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job, name)
+);
+"""
+
+
+class JobStore:
+    """The job database at PATH; thread-safe, and shared between processes (WAL mode)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.artifacts = self.path.parent / "jobs"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def job(self, source: str) -> "Job":
+        """The job for SOURCE (a URL or absolute path), created on first use."""
+        key = make_key("job", source)[:16]
+        now = time.time()
+        self.execute(
+            "INSERT INTO jobs (key, source, created, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET updated = excluded.updated",
+            (key, source, now, now),
+        )
+        return Job(self, key, source)
+
+    def find_video(self, video_id: str) -> list:
+        """Names of the summary stages completed for VIDEO_ID by any job, whose outputs still exist."""
+        rows = self.execute(
+            "SELECT s.name, s.artifact FROM stages s JOIN jobs j ON s.job = j.key "
+            "WHERE j.video_id = ? AND s.status = 'done' AND s.name LIKE 'summary:%'",
+            (video_id,),
+        )
+        return [name for name, artifact in rows if artifact and os.path.exists(artifact)]
+
+    def recent(self, limit: int = 20) -> list:
+        """The LIMIT most recently updated jobs as dicts with 'source', 'video_id', 'updated' and 'stages'."""
+        jobs = []
+        for key, source, video_id, updated in self.execute(
+            "SELECT key, source, video_id, updated FROM jobs ORDER BY updated DESC LIMIT ?", (limit,)
+        ):
+            stages = self.execute(
+                "SELECT name, status, artifact, error FROM stages WHERE job = ? ORDER BY updated", (key,)
+            )
+            jobs.append({'source': source, 'video_id': video_id, 'updated': updated, 'stages': stages})
+        return jobs
+
+
+class Job:
+    """
+    One source's stages. Without a store (job tracking disabled) every method
+    is a no-op and completed() finds nothing.
+    """
+
+    def __init__(self, store: JobStore, key: str, source: str):
+        self.store = store
+        self.key = key
+        self.source = source
+
+    def _set(self, name: str, status: str, artifact: str = None, data: dict = None, error: str = None) -> None:
+        if self.store is None:
+            return
+        self.store.execute(
+            "INSERT OR REPLACE INTO stages (job, name, status, artifact, data, error, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.key, name, status, artifact, json.dumps(data) if data is not None else None, error, time.time()),
+        )
+
+    def set_video_id(self, video_id: str) -> None:
+        if self.store is not None and video_id:
+            self.store.execute("UPDATE jobs SET video_id = ? WHERE key = ?", (video_id, self.key))
+
+    def finish(self, name: str, artifact: str = None, data: dict = None) -> None:
+        """Mark stage NAME done, with its ARTIFACT path and DATA (JSON-serializable)."""
+        self._set(name, "done", os.path.abspath(artifact) if artifact else None, data)
+
+    def fail(self, name: str, error) -> None:
+        self._set(name, "failed", error=str(error).splitlines()[0] if str(error) else type(error).__name__)
+
+    @contextmanager
+    def step(self, name: str):
+        """Mark stage NAME running for the duration of the block, and failed if it raises."""
+        self._set(name, "running")
+        try:
+            yield
+        except BaseException as e:
+            self.fail(name, e)
+            raise
+
+    def completed(self, name: str, **match) -> dict:
+        """
+        Stage NAME as {'artifact', 'data'} if it is done, its artifact (if any)
+        still exists and its data has the values in MATCH; else None.
+        """
+        if self.store is None:
+            return None
+        rows = self.store.execute(
+            "SELECT artifact, data FROM stages WHERE job = ? AND name = ? AND status = 'done'", (self.key, name)
+        )
+        if not rows:
+            return None
+        artifact, data = rows[0]
+        data = json.loads(data) if data else {}
+        if artifact and not os.path.exists(artifact):
+            return None
+        if any(data.get(k) != v for k, v in match.items()):
+            return None
+        return {'artifact': artifact, 'data': data}
+
+    def save_text(self, name: str, filename: str, text: str, data: dict = None) -> None:
+        """Store TEXT as stage NAME's artifact FILENAME in the job's directory and mark the stage done."""
+        if self.store is None:
+            return
+        directory = self.store.artifacts / self.key
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        path = directory / filename
+        os.replace(tmp, path)
+        self.finish(name, str(path), data)
+
+    def read_text(self, name: str, **match) -> str:
+        """The text artifact of completed stage NAME (see completed()), or None."""
+        stage = self.completed(name, **match)
+        if stage is None or not stage['artifact']:
+            return None
+        with open(stage['artifact'], encoding="utf-8") as f:
+            return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def job_store() -> JobStore:
+    """The process-wide JobStore at JOBS_DB, or None if job tracking is off or the database cannot be opened."""
+    path = get_settings().JOBS_DB
+    if path.lower() in ("off", "none", "false"):
+        return None
+    try:
+        return JobStore(path)
+    except (OSError, sqlite3.Error) as e:
+        import sys
+
+        print(f"** Job store {path} unavailable ({e}); --resume will not find this run", file=sys.stderr)
+        return None
+
+
+def open_job(source: str) -> Job:
+    """The Job for SOURCE (a URL or absolute path); a no-op Job when tracking is off."""
+    store = job_store()
+    return store.job(source) if store is not None else Job(None, None, source)
+
+
+def format_jobs(limit: int = 20) -> str:
+    """Recent jobs and their stages, one block per job, for --jobs."""
+    store = job_store()
+    if store is None:
+        return "** Job tracking is off (jobs_db)"
+    lines = []
+    for job in store.recent(limit):
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(job['updated']))
+        video = f" [{job['video_id']}]" if job['video_id'] else ""
+        lines.append(f".. {when} {job['source']}{video}")
+        for name, status, artifact, error in job['stages']:
+            detail = error if status == "failed" else artifact or ""
+            lines.append(f"     {status:<7} {name}{'  ' + detail if detail else ''}")
+    return "\n".join(lines) if lines else ".. No jobs recorded yet"
@@ -5,43 +5,297 @@ Wrapper for calling the Ollama chat completion API (Claude Opus 4).
 """
 import os
 import sys
-import requests
 import time
-import random
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from .config import OLLAMA_URL, BACKEND as CONFIG_BACKEND
+from .config import get_settings
+from .cache import DiskCache, make_key
+from .llm_http import (
+    get_session, get_anthropic_client, request_slot, rate_limiter, CancelToken, RetryableError, RETRY_STATUSES,
+    backoff_delay, response_closer, retry_after,
+)
+from . import profiling
+
+@functools.lru_cache(maxsize=None)
+def _response_cache() -> DiskCache:
+    settings = get_settings()
+    return DiskCache(
+        "llm", max_bytes=int(settings.LLM_CACHE_MB * 1024 * 1024), ttl=settings.LLM_CACHE_TTL_DAYS * 86400
+    )
+
+def user_prompts_dir() -> str:
+    """User template directory (~/.config/video-processor/prompts, or under XDG_CONFIG_HOME)."""
+    xdg = os.getenv("XDG_CONFIG_HOME", os.path.join(os.path.expanduser("~"), ".config"))
+    return os.path.join(xdg, "video-processor", "prompts")
+
+def template_path(name: str) -> str:
+    """
+    File for template NAME: an absolute path as given, else NAME in the user
+    template directory if present there, else in the package's prompts/.
+    """
+    if os.path.isabs(name):
+        return name
+    user_path = os.path.join(user_prompts_dir(), name)
+    if os.path.isfile(user_path):
+        return user_path
+    return os.path.join(os.path.dirname(__file__), 'prompts', name)
 
 def load_template(name: str) -> str:
     """
-    Load a prompt template from the prompts/ directory.
+    Load a prompt template (see template_path).
     """
-    base = os.path.dirname(__file__)
-    path = os.path.join(base, 'prompts', name)
-    with open(path, encoding='utf-8') as f:
+    with open(template_path(name), encoding='utf-8') as f:
         return f.read()
 
-def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, debug: bool = False, max_tokens: int = 10000) -> tuple[str, bool]:
+class ChatCancelled(RuntimeError):
+    """Raised inside a chat() call whose CancelToken was cancelled."""
+
+def join_prompt(context: str, prompt: str) -> str:
+    """The single-message form of CONTEXT followed by PROMPT, as sent to backends without explicit caching."""
+    return f"{context}\n\n{prompt}" if context else prompt
+
+def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, debug: bool = False, max_tokens: int = 10000, use_cache: bool = True, on_token=None, stats: dict = None, backend: str = None, context: str = None, cancel: CancelToken = None) -> tuple[str, bool]:
     """
     Send a user prompt to the selected LLM backend and return the content.
     Supported backends: Ollama (default), Anthropic Cloud, OpenAI.
-    The backend is selected via the project config or LLM_BACKEND env var.
+    The backend is BACKEND if given, else the LLM_BACKEND env var or project config.
+
+    CONTEXT, if given, is large reusable input (the transcript) sent ahead of
+    PROMPT so calls about the same transcript share a prefix: Anthropic gets it
+    as a separate block marked for prompt caching, OpenAI and Ollama reuse the
+    prefix automatically. Cache token usage is reported in STATS.
+
+    Complete responses are cached on disk keyed by prompt hash, backend, endpoint,
+    model, temperature and max_tokens; truncated responses are never cached.
+    Pass use_cache=False to bypass the cache.
+
+    Responses are streamed from every backend. ON_TOKEN, if given, is called with
+    each text chunk as it arrives (once with the whole text on a cache hit), and
+    STATS, if given, is filled with 'ttft', 'elapsed', 'output_tokens',
+    'tokens_per_sec' and 'cached', plus 'input_tokens', 'cache_read_tokens' and
+    'cache_write_tokens' where the backend reports them.
+
+    CANCEL, a llm_http.CancelToken, aborts the request from another thread:
+    the stream is closed and this call raises ChatCancelled.
+
+    Requests pass through the backend/model's shared llm_http.RateLimiter.
+    Rate limits, overload and server errors are retried up to LLM_MAX_RETRIES
+    times (after Retry-After when the server sends one) as long as no output
+    has been streamed yet; the retry count is reported in STATS as 'retries'.
     
     Returns:
         tuple[str, bool]: (response_content, was_truncated)
     """
-    # Select LLM backend (CLI env override, then project config)
-    backend = os.getenv('LLM_BACKEND', CONFIG_BACKEND).lower()
-    
+    # Loading settings also loads .env, so API keys are in the environment from here on
+    settings = get_settings()
+    # Select LLM backend (explicit argument, CLI env override, then project config)
+    backend = (backend or os.getenv('LLM_BACKEND', settings.BACKEND)).lower()
+
+    cache_key = None
+    if use_cache and _response_cache().enabled:
+        endpoint = settings.OLLAMA_URL if backend == 'ollama' else ''
+        prompt_hash = make_key(context, prompt) if context else make_key(prompt)
+        cache_key = make_key(prompt_hash, backend, endpoint, model, float(temperature), int(max_tokens))
+        with profiling.stage("llm cache lookup") as prof:
+            cached = _response_cache().get(cache_key)
+            prof['hit'] = cached is not None
+        if debug:
+            print(f"__ LLM Debug: Response cache {'hit' if cached is not None else 'miss'} (prompt sha256={prompt_hash[:12]})", file=sys.stderr)
+        if cached is not None:
+            print(f".. Using cached LLM response ({backend}, {model})", file=sys.stderr)
+            if on_token is not None:
+                on_token(cached)
+            if stats is not None:
+                stats.update(cached=True, ttft=0.0, elapsed=0.0, output_tokens=len(cached) // 4, tokens_per_sec=None)
+            return cached, False
+
+    profiler = profiling.active()
+    if profiler is not None and stats is None:
+        stats = {}
+    if stats is not None:
+        stats['cached'] = False
+    limiter = rate_limiter(backend, model)
+    # Input tokens drawn from the tokens-per-minute bucket (rough: 1 token ≈ 4 characters)
+    request_tokens = (len(prompt) + len(context or '')) // 4
+    streamed = []
+
+    def relay(chunk: str) -> None:
+        streamed.append(True)
+        if on_token is not None:
+            on_token(chunk)
+
+    retries = 0
+    while True:
+        # The stage starts once a request slot is held, so queueing for a slot is not counted as LLM time
+        with request_slot(backend), limiter.slot(request_tokens), \
+                profiling.stage("llm chat", backend=backend, model=model) as prof:
+            t_request = time.perf_counter()
+            try:
+                content, was_truncated = _chat_uncached(
+                    prompt, backend, model, temperature, debug, max_tokens, relay, stats, context, cancel, limiter
+                )
+                error = None
+            except RetryableError as e:
+                error = e
+            except Exception:
+                if cancel is not None and cancel.cancelled:
+                    # Whatever the closed stream raised, the cause was the cancellation
+                    raise ChatCancelled(f"{backend}:{model} request cancelled") from None
+                raise
+            prof['retries'] = retries
+            if error is None:
+                prof['truncated'] = was_truncated
+        if error is None:
+            limiter.succeeded()
+            break
+        if cancel is not None and cancel.cancelled:
+            raise ChatCancelled(f"{backend}:{model} request cancelled") from None
+        if streamed or retries >= settings.LLM_MAX_RETRIES:
+            # A started answer is never replayed
+            raise error
+        delay = error.retry_after if error.retry_after is not None else backoff_delay(retries)
+        if error.throttled:
+            limiter.throttled(delay)
+        print(
+            f"** {backend}:{model} {error.status or 'connection error'}: {str(error).lstrip('* ')}; "
+            f"retrying in {delay:.1f}s ({retries + 1}/{settings.LLM_MAX_RETRIES}, {int(limiter.limit)} in flight)",
+            file=sys.stderr,
+        )
+        if cancel is not None:
+            if cancel.wait(delay):
+                raise ChatCancelled(f"{backend}:{model} request cancelled") from None
+        else:
+            time.sleep(delay)
+        retries += 1
+    if stats is not None:
+        stats['retries'] = retries
+    if profiler is not None and stats.get('ttft') is not None:
+        # Split the request into time-to-first-token and generation spans
+        ttft = stats['ttft']
+        profiler.add_span("llm first token", t_request, ttft, parent="llm chat", backend=backend, model=model)
+        profiler.add_span(
+            "llm generation", t_request + ttft, max(0.0, stats['elapsed'] - ttft), parent="llm chat",
+            output_tokens=stats.get('output_tokens'), tokens_per_sec=stats.get('tokens_per_sec'),
+        )
+    if cache_key is not None and not was_truncated and content:
+        _response_cache().set(cache_key, content)
+    return content, was_truncated
+
+# Threads that run sync chat() calls on behalf of achat(); request_slot() still bounds each backend
+_async_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="vp-achat")
+
+async def achat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, debug: bool = False, max_tokens: int = 10000, use_cache: bool = True, on_token=None, stats: dict = None, backend: str = None, context: str = None) -> tuple[str, bool]:
+    """
+    Async variant of chat(): same arguments and return value. The request runs on
+    the pooled per-backend transport in a worker thread, so many calls can be
+    awaited concurrently (e.g. with asyncio.gather) while sharing connections.
+    ON_TOKEN is invoked from that worker thread.
+    """
+    import asyncio
+    from .jobctx import bind_job
+
+    loop = asyncio.get_running_loop()
+    call = bind_job(functools.partial(
+        chat, prompt, model=model, temperature=temperature, debug=debug, max_tokens=max_tokens, use_cache=use_cache,
+        on_token=on_token, stats=stats, backend=backend, context=context,
+    ))
+    return await loop.run_in_executor(_async_executor, call)
+
+class _StreamMeter:
+    """Tracks time-to-first-token and generation rate for one streamed response."""
+
+    def __init__(self, on_token=None, cancel: CancelToken = None):
+        self.on_token = on_token
+        self.cancel = cancel
+        self.parts = []
+        self.t_start = time.perf_counter()
+        self.t_first = None
+
+    def feed(self, chunk: str) -> None:
+        if self.cancel is not None and self.cancel.cancelled:
+            raise ChatCancelled("request cancelled")
+        if not chunk:
+            return
+        if self.t_first is None:
+            self.t_first = time.perf_counter()
+        self.parts.append(chunk)
+        if self.on_token is not None:
+            self.on_token(chunk)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def record(self, stats: dict, output_tokens: int = None, input_tokens: int = None, cache_read: int = None, cache_write: int = None) -> None:
+        """
+        Fill STATS with ttft, elapsed, output_tokens and tokens_per_sec, and with
+        input_tokens, cache_read_tokens and cache_write_tokens when the backend reported them.
+        """
+        if stats is None:
+            return
+        t_end = time.perf_counter()
+        text = self.text
+        if not output_tokens:
+            # Rough token estimation (1 token ≈ 4 characters)
+            output_tokens = len(text) // 4
+        stats['elapsed'] = t_end - self.t_start
+        stats['ttft'] = (self.t_first - self.t_start) if self.t_first is not None else None
+        stats['output_tokens'] = output_tokens
+        gen_time = (t_end - self.t_first) if self.t_first is not None else 0.0
+        stats['tokens_per_sec'] = (output_tokens / gen_time) if gen_time > 0 else None
+        for key, value in (('input_tokens', input_tokens), ('cache_read_tokens', cache_read), ('cache_write_tokens', cache_write)):
+            if value is not None:
+                stats[key] = value
+
+def _iter_sse(resp):
+    """Yield (event, data) pairs from a server-sent-events response; data is parsed JSON."""
+    import json
+
+    event = None
+    for raw in resp.iter_lines(decode_unicode=True):
+        if not raw:
+            event = None
+            continue
+        if raw.startswith('event:'):
+            event = raw[len('event:'):].strip()
+        elif raw.startswith('data:'):
+            data = raw[len('data:'):].strip()
+            if data == '[DONE]':
+                return
+            yield event, json.loads(data)
+
+def _raise_for_status(resp, label: str) -> None:
+    """Raise RetryableError for retryable HTTP statuses of RESP, else requests' HTTPError."""
+    if resp.status_code in RETRY_STATUSES:
+        resp.close()
+        reason = "rate limit exceeded" if resp.status_code == 429 else f"HTTP {resp.status_code} {resp.reason}"
+        raise RetryableError(f"** {label} API {reason}", resp.status_code, retry_after(resp.headers))
+    resp.raise_for_status()
+
+def _chat_uncached(prompt: str, backend: str, model: str, temperature: float, debug: bool, max_tokens: int, on_token=None, stats: dict = None, context: str = None, cancel: CancelToken = None, limiter=None) -> tuple[str, bool]:
+    """
+    Perform the backend request for chat(); no caching or retries. All backends
+    stream: ON_TOKEN receives each text chunk as it arrives and STATS is filled
+    with time-to-first-token and generation-rate metrics. Rate-limit headers
+    are passed to LIMITER; retryable failures raise RetryableError.
+    """
+    if backend != 'anthropic':
+        # OpenAI and Ollama cache identical prompt prefixes on their own; the context just has to come first
+        prompt, context = join_prompt(context, prompt), None
     # Debug logging for token usage
     if debug:
-        prompt_length = len(prompt)
-        # Rough token estimation (1 token ≈ 4 characters)
-        estimated_input_tokens = prompt_length // 4
-        print(f"__ LLM Debug: Input length: {prompt_length} chars (~{estimated_input_tokens} tokens)", file=sys.stderr)
+        from .tokens import count_tokens, tokenizer_name
+
+        input_tokens = count_tokens(prompt, backend, model)
+        print(f"__ LLM Debug: Input length: {len(prompt)} chars ({input_tokens} tokens, {tokenizer_name(backend, model)})", file=sys.stderr)
+
+    meter = _StreamMeter(on_token, cancel)
     
     if backend == 'anthropic':
         try:
-            from anthropic import Anthropic
+            import anthropic
         except ModuleNotFoundError:
             raise RuntimeError(
                 "Anthropic SDK is not installed; please install with `pip install anthropic>=0.3.0`"
@@ -51,19 +305,41 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
         if not api_key:
             raise RuntimeError('ANTHROPIC_API_KEY is not set')
 
-        client = Anthropic(api_key=api_key)
+        client = get_anthropic_client(api_key)
         try:
-            text = ''
             stop_reason = None
+            if context:
+                # The transcript block is cached; later calls with the same transcript read it back at a discount
+                content = [
+                    {'type': 'text', 'text': context, 'cache_control': {'type': 'ephemeral'}},
+                    {'type': 'text', 'text': prompt},
+                ]
+            else:
+                content = prompt
             with client.messages.stream(
                 model=model,
-                messages=[{'role': 'user', 'content': prompt}],
+                messages=[{'role': 'user', 'content': content}],
                 temperature=temperature,
                 max_tokens=max_tokens,
             ) as stream:
+                if limiter is not None:
+                    limiter.observe(getattr(getattr(stream, 'response', None), 'headers', None))
+                if cancel is not None:
+                    cancel.on_cancel(stream.close)
                 for chunk in stream.text_stream:
-                    text += chunk
-                stop_reason = stream.get_final_message().stop_reason
+                    meter.feed(chunk)
+                final = stream.get_final_message()
+                stop_reason = final.stop_reason
+            text = meter.text
+            usage = getattr(final, 'usage', None)
+            meter.record(
+                stats, getattr(usage, 'output_tokens', None),
+                input_tokens=getattr(usage, 'input_tokens', None),
+                cache_read=getattr(usage, 'cache_read_input_tokens', None),
+                cache_write=getattr(usage, 'cache_creation_input_tokens', None),
+            )
+            if debug:
+                print(f"__ LLM Debug: Anthropic usage: {usage}", file=sys.stderr)
 
             was_truncated = False
             if stop_reason == 'max_tokens':
@@ -76,39 +352,27 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
                 print(f"__ LLM Debug: Stop reason: {stop_reason}", file=sys.stderr)
 
             return text, was_truncated
-        except Exception as e:
+        except anthropic.APIConnectionError as e:
+            if meter.parts:
+                raise
+            raise RetryableError(f"** Anthropic API connection failed: {e}") from e
+        except anthropic.APIStatusError as e:
+            if e.status_code in RETRY_STATUSES and not meter.parts:
+                raise RetryableError(f"** Anthropic API error: {e}", e.status_code, retry_after(e.response.headers)) from e
             err = str(e)
             if 'token' in err.lower() and ('limit' in err.lower() or 'exceeded' in err.lower()):
                 raise RuntimeError(f"Token limit exceeded: {err}. Consider reducing transcript length or increasing token limit.")
             raise
 
+    import requests
+
+    settings = get_settings()
     if backend == 'openai':
-        # OpenAI API implementation
-        api_key = os.getenv('OPENAI_API_KEY')
+        # OpenAI API implementation; key and base URL come from config.toml or the environment
+        api_key = settings.OPENAI_API_KEY
         if not api_key:
             raise RuntimeError('OPENAI_API_KEY is not set')
-        
-        # Get base URL from config or use default
-        # Load config similar to how config.py does it
-        try:
-            import tomllib
-        except ModuleNotFoundError:
-            import tomli as tomllib
-        
-        # Load config from project-local config.toml if it exists
-        config = {}
-        from pathlib import Path
-        config_path = Path.cwd() / "config.toml"
-        if config_path.exists():
-            with open(config_path, "rb") as f:
-                config = tomllib.load(f)
-        
-        base_url = config.get('openai_base_url', 'https://api.openai.com/v1')
-        
-        # Use API key from config if available, otherwise use environment variable
-        config_api_key = config.get('openai_api_key')
-        if config_api_key:
-            api_key = config_api_key
+        base_url = settings.OPENAI_BASE_URL
         
         use_responses_api = model.startswith("gpt-5")
         if use_responses_api:
@@ -117,6 +381,7 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
                 'model': model,
                 'input': prompt,
                 'max_output_tokens': max_tokens,
+                'stream': True,
                 # temperature not supported by gpt-5.6+ in Responses API
             }
         else:
@@ -124,6 +389,8 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
             payload = {
                 'model': model,
                 'messages': [{'role': 'user', 'content': prompt}],
+                'stream': True,
+                'stream_options': {'include_usage': True},
             }
             # Some newer models (like o4-mini, o3) have specific requirements
             if model.startswith(('o3-', 'o4-')):
@@ -141,72 +408,54 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
             'Content-Type': 'application/json'
         }
         
-        # Retry logic for OpenAI API calls
-        # Responses API (gpt-5.x) needs more time — reasoning models can take minutes
-        request_timeout = 300 if use_responses_api else 60
-        max_retries = 3
-        for attempt in range(max_retries):
+        # Opening the stream is retried by chat(); a started stream is never replayed.
+        # Responses are streamed, so the read timeout bounds the gap between events rather than the whole
+        # response; reasoning models (gpt-5.x) can still think for minutes before the first token
+        request_timeout = (10, 300 if use_responses_api else 60)
+        try:
+            resp = get_session('openai').post(url, json=payload, headers=headers, timeout=request_timeout, stream=True)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise RetryableError(f"** OpenAI API connection failed: {e}") from e
+        if cancel is not None:
+            cancel.on_cancel(response_closer(resp))
+        if limiter is not None:
+            limiter.observe(resp.headers)
+        try:
+            _raise_for_status(resp, 'OpenAI')
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 401:
+                raise RuntimeError("** OpenAI API key is invalid or expired")
+            elif e.response.status_code == 404:
+                raise RuntimeError(f"** OpenAI model '{model}' not found or not available")
             try:
-                resp = requests.post(url, json=payload, headers=headers, timeout=request_timeout)
-                resp.raise_for_status()
-                data = resp.json()
-                break
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code in [500, 502, 503, 504] and attempt < max_retries - 1:
-                    # Server errors - retry with exponential backoff
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    if debug:
-                        print(f"__ LLM Debug: Server error {e.response.status_code}, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})", file=sys.stderr)
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    # Client errors or max retries reached - format error message
-                    if e.response.status_code == 401:
-                        raise RuntimeError("** OpenAI API key is invalid or expired")
-                    elif e.response.status_code == 429:
-                        raise RuntimeError("** OpenAI API rate limit exceeded")
-                    elif e.response.status_code == 404:
-                        raise RuntimeError(f"** OpenAI model '{model}' not found or not available")
-                    else:
-                        try:
-                            error_data = e.response.json()
-                            error_msg = error_data.get('error', {}).get('message', str(e))
-                            raise RuntimeError(f"** OpenAI API error: {error_msg}")
-                        except:
-                            raise RuntimeError(f"** OpenAI API error: {e}")
-            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-                if attempt < max_retries - 1:
-                    # Network errors - retry with exponential backoff
-                    wait_time = (2 ** attempt) + random.uniform(0, 1)
-                    if debug:
-                        print(f"__ LLM Debug: Network error, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})", file=sys.stderr)
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    # Max retries reached
-                    raise RuntimeError(f"** OpenAI API connection failed after {max_retries} attempts: {e}")
-            except Exception as e:
-                # Other exceptions (JSON parsing, etc.)
-                err = str(e)
-                if 'token' in err.lower() and ('limit' in err.lower() or 'exceeded' in err.lower()):
-                    raise RuntimeError(f"** Token limit exceeded: {err}. Consider reducing transcript length or increasing token limit.")
-                raise RuntimeError(f"** OpenAI API error: {err}")
-        else:
-            # This should not happen, but just in case
-            raise RuntimeError("** OpenAI API call failed after all retry attempts")
-            
+                error_msg = e.response.json().get('error', {}).get('message', str(e))
+            except ValueError:
+                error_msg = str(e)
+            if 'token' in error_msg.lower() and ('limit' in error_msg.lower() or 'exceeded' in error_msg.lower()):
+                raise RuntimeError(f"** Token limit exceeded: {error_msg}. Consider reducing transcript length or increasing token limit.")
+            raise RuntimeError(f"** OpenAI API error: {error_msg}")
+
         if use_responses_api:
-            # Extract response content from Responses API
-            parts = []
-            for item in data.get('output', []):
-                if item.get('type') == 'message':
-                    for c in item.get('content', []):
-                        if c.get('type') == 'output_text':
-                            parts.append(c.get('text', ''))
-            content = "".join(parts).strip()
-            if not content:
-                # Fallbacks for unexpected shapes
-                content = data.get('output_text', '') or data.get('text', '')
+            # Stream Responses API events; the terminal event carries status and usage
+            data = {}
+            try:
+                with resp:
+                    for event, item in _iter_sse(resp):
+                        kind = item.get('type') or event
+                        if kind == 'response.output_text.delta':
+                            meter.feed(item.get('delta', ''))
+                        elif kind in ('response.completed', 'response.incomplete', 'response.failed'):
+                            data = item.get('response', {})
+                        elif kind == 'error':
+                            raise RuntimeError(f"** OpenAI API error: {item.get('message', item)}")
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"** OpenAI API stream interrupted: {e}")
+            content = meter.text.strip()
+            usage = data.get('usage') or {}
+            meter.record(
+                stats, usage.get('output_tokens'), input_tokens=usage.get('input_tokens'),
+                cache_read=(usage.get('input_tokens_details') or {}).get('cached_tokens'),
+            )
             
             # Check for truncation / incomplete response
             was_truncated = False
@@ -215,23 +464,25 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
                 was_truncated = True
             
             if debug:
-                usage = data.get('usage', {})
                 print(f"__ LLM Debug: OpenAI usage: {usage}", file=sys.stderr)
                 print(f"__ LLM Debug: Output length: {len(content)} chars", file=sys.stderr)
                 print(f"__ LLM Debug: Status: {data.get('status')}", file=sys.stderr)
             
             return content, was_truncated
         
-        # Extract response content (Chat Completions)
-        content = data['choices'][0]['message']['content']
+        # Stream Chat Completions deltas; finish_reason arrives on the last choice chunk, usage on the final chunk
+        finish_reason, usage = _read_chat_completion_stream(resp, meter, 'OpenAI')
+        content = meter.text
+        meter.record(
+            stats, usage.get('completion_tokens'), input_tokens=usage.get('prompt_tokens'),
+            cache_read=(usage.get('prompt_tokens_details') or {}).get('cached_tokens'),
+        )
         
         # Check for truncation
         was_truncated = False
-        finish_reason = data['choices'][0].get('finish_reason', '')
         if finish_reason == 'length':
             # For reasoning models, check if completion tokens were used for reasoning
-            usage = data.get('usage', {})
-            completion_details = usage.get('completion_tokens_details', {})
+            completion_details = usage.get('completion_tokens_details', {}) or {}
             reasoning_tokens = completion_details.get('reasoning_tokens', 0)
             if reasoning_tokens > 0:
                 print(f"** ERROR: Output truncated due to reasoning token limit ({reasoning_tokens} reasoning tokens used)", file=sys.stderr)
@@ -241,7 +492,6 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
         
         # Debug logging for OpenAI output
         if debug:
-            usage = data.get('usage', {})
             print(f"__ LLM Debug: OpenAI usage: {usage}", file=sys.stderr)
             output_length = len(content)
             print(f"__ LLM Debug: Output length: {output_length} chars", file=sys.stderr)
@@ -249,17 +499,209 @@ def chat(prompt: str, model: str = 'claude-opus-4', temperature: float = 0.0, de
         
         return content, was_truncated
 
-    # Default to Ollama HTTP API
-    url = f"{OLLAMA_URL}/v1/chat/completions"
+    if settings.OLLAMA_API == 'native':
+        return _chat_ollama_native(prompt, model, temperature, debug, max_tokens, meter, stats, cancel)
+
+    # Ollama's OpenAI-compatible endpoint (ollama_api = "openai"), streamed; the server decides the context size
+    import requests
+
+    url = f"{settings.OLLAMA_URL}/v1/chat/completions"
     payload = {
         'model': model,
         'messages': [{'role': 'user', 'content': prompt}],
         'temperature': temperature,
+        'stream': True,
+        'stream_options': {'include_usage': True},
     }
-    resp = requests.post(url, json=payload)
-    resp.raise_for_status()
-    data = resp.json()
+    # The read timeout bounds the wait for each event (including model load before the first), not the whole response
+    try:
+        resp = get_session('ollama').post(url, json=payload, stream=True, timeout=(10, settings.OLLAMA_TIMEOUT))
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise RetryableError(f"** Ollama connection failed: {e}") from e
+    if cancel is not None:
+        cancel.on_cancel(response_closer(resp))
+    # Ollama answers 503 when its request queue (OLLAMA_MAX_QUEUE) is full
+    _raise_for_status(resp, 'Ollama')
+    finish_reason, usage = _read_chat_completion_stream(resp, meter, 'Ollama')
+    meter.record(stats, usage.get('completion_tokens'), input_tokens=usage.get('prompt_tokens'))
+    was_truncated = False
+    if finish_reason == 'length':
+        print("** ERROR: Output truncated due to OUTPUT token limit (Ollama finish_reason=length)", file=sys.stderr)
+        was_truncated = True
+    if debug:
+        print(f"__ LLM Debug: Ollama usage: {usage}", file=sys.stderr)
+        print(f"__ LLM Debug: Finish reason: {finish_reason}", file=sys.stderr)
+    return meter.text, was_truncated
+
+# num_ctx each Ollama model was last requested with by this process; see tokens.ollama_num_ctx
+_ollama_ctx = {}
+_ollama_ctx_lock = threading.Lock()
+
+def _ollama_keep_alive(value: str):
+    """keep_alive for the Ollama API: bare numbers are seconds (-1 = until Ollama stops), anything else a duration."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def _ollama_context(model: str, prompt_tokens: int, max_tokens: int) -> int:
+    from .tokens import ollama_num_ctx
+
+    settings = get_settings()
+    with _ollama_ctx_lock:
+        num_ctx = ollama_num_ctx(
+            prompt_tokens, max_tokens, model, settings.OLLAMA_NUM_CTX, settings.OLLAMA_MAX_CTX, loaded=_ollama_ctx.get(model)
+        )
+        _ollama_ctx[model] = num_ctx
+    return num_ctx
+
+def _ollama_error(resp) -> str:
+    try:
+        return resp.json().get('error') or resp.text
+    except ValueError:
+        return resp.text.strip() or f"HTTP {resp.status_code}"
+
+def _chat_ollama_native(prompt: str, model: str, temperature: float, debug: bool, max_tokens: int, meter: _StreamMeter, stats: dict = None, cancel: CancelToken = None) -> tuple[str, bool]:
+    """
+    Stream PROMPT through Ollama's native /api/chat. num_ctx is sized from the
+    prompt (Ollama would otherwise cut it at its small default context without
+    an error), keep_alive keeps the model loaded for the next run, and Ollama's
+    own load / prompt-eval / eval durations (seconds) and the num_ctx used are
+    added to STATS as 'load_s', 'prompt_eval_s', 'eval_s' and 'num_ctx'.
+    """
+    import json
+    import requests
+    from .tokens import estimate_tokens
+
+    settings = get_settings()
+    prompt_tokens = estimate_tokens(prompt, 'ollama')
+    num_ctx = _ollama_context(model, prompt_tokens, max_tokens)
+    if prompt_tokens >= num_ctx:
+        print(
+            f"** WARNING: Prompt (~{prompt_tokens} tokens) exceeds the largest Ollama context ({num_ctx}); "
+            f"Ollama will drop its beginning. Raise ollama_max_ctx or use --map-reduce",
+            file=sys.stderr,
+        )
+    payload = {
+        'model': model,
+        'messages': [{'role': 'user', 'content': prompt}],
+        'stream': True,
+        'keep_alive': _ollama_keep_alive(settings.OLLAMA_KEEP_ALIVE),
+        # The answer may use whatever the prompt leaves of the context
+        'options': {
+            'temperature': temperature,
+            'num_ctx': num_ctx,
+            'num_predict': min(max_tokens, max(256, num_ctx - prompt_tokens)),
+        },
+    }
+    if debug:
+        print(f"__ LLM Debug: Ollama num_ctx={num_ctx} num_predict={payload['options']['num_predict']} keep_alive={payload['keep_alive']}", file=sys.stderr)
+    # The read timeout bounds the wait for each line (including model load before the first), not the whole response
+    try:
+        resp = get_session('ollama').post(
+            f"{settings.OLLAMA_URL}/api/chat", json=payload, stream=True, timeout=(10, settings.OLLAMA_TIMEOUT)
+        )
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        raise RetryableError(f"** Ollama connection failed: {e}") from e
+    if cancel is not None:
+        cancel.on_cancel(response_closer(resp))
+    if resp.status_code == 404:
+        raise RuntimeError(
+            f"** Ollama: {_ollama_error(resp)} (pull the model with `ollama pull {model}`; "
+            f"for OpenAI-compatible servers set ollama_api = \"openai\")"
+        )
+    # Ollama answers 503 when its request queue (OLLAMA_MAX_QUEUE) is full
+    _raise_for_status(resp, 'Ollama')
+    final = {}
+    try:
+        with resp:
+            for line in resp.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if 'error' in chunk:
+                    raise RuntimeError(f"** Ollama error: {chunk['error']}")
+                meter.feed((chunk.get('message') or {}).get('content') or '')
+                if chunk.get('done'):
+                    final = chunk
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"** Ollama stream interrupted: {e}")
+    except ValueError as e:
+        raise RuntimeError(f"Unexpected response format from LLM: {e}")
+    meter.record(stats, final.get('eval_count'), input_tokens=final.get('prompt_eval_count'))
+    if stats is not None:
+        stats['num_ctx'] = num_ctx
+        for key, name in (('load_duration', 'load_s'), ('prompt_eval_duration', 'prompt_eval_s'), ('eval_duration', 'eval_s')):
+            if final.get(key) is not None:
+                stats[name] = final[key] / 1e9
+    was_truncated = final.get('done_reason') == 'length'
+    if was_truncated:
+        print(f"** ERROR: Output truncated due to OUTPUT token limit (Ollama done_reason=length, num_ctx={num_ctx})", file=sys.stderr)
+    if debug:
+        timings = {k: v for k, v in final.items() if k.endswith(('_duration', '_count'))}
+        print(f"__ LLM Debug: Ollama timings: {timings}", file=sys.stderr)
+        print(f"__ LLM Debug: Done reason: {final.get('done_reason')}", file=sys.stderr)
+    return meter.text, was_truncated
+
+def prewarm(backend: str, model: str, expected_tokens: int = 0, debug: bool = False) -> None:
+    """
+    Start loading MODEL into Ollama in a background thread (native API with
+    OLLAMA_PREWARM only), with the num_ctx a prompt of EXPECTED_TOKENS will be
+    sent with, so the load overlaps caption download. A no-op for other
+    backends and for models this process has already requested.
+    """
+    settings = get_settings()
+    if backend != 'ollama' or settings.OLLAMA_API != 'native' or not settings.OLLAMA_PREWARM:
+        return
+    with _ollama_ctx_lock:
+        if model in _ollama_ctx:
+            return
+    num_ctx = _ollama_context(model, expected_tokens, settings.TOKEN_LIMIT)
+    # An empty message list makes Ollama load the model and return
+    payload = {
+        'model': model, 'messages': [], 'keep_alive': _ollama_keep_alive(settings.OLLAMA_KEEP_ALIVE),
+        'options': {'num_ctx': num_ctx},
+    }
+
+    def load() -> None:
+        t_start = time.perf_counter()
+        try:
+            resp = get_session('ollama').post(
+                f"{settings.OLLAMA_URL}/api/chat", json=payload, timeout=(10, settings.OLLAMA_TIMEOUT)
+            )
+            resp.raise_for_status()
+            if debug:
+                print(f"__ LLM Debug: Ollama prewarmed {model} (num_ctx={num_ctx}) in {time.perf_counter() - t_start:.1f}s", file=sys.stderr)
+        except Exception as e:
+            if debug:
+                print(f"__ LLM Debug: Ollama prewarm of {model} failed: {e}", file=sys.stderr)
+
+    threading.Thread(target=load, name="vp-ollama-prewarm", daemon=True).start()
+
+def _read_chat_completion_stream(resp, meter: _StreamMeter, label: str) -> tuple:
+    """
+    Consume an OpenAI-style chat.completion.chunk stream into METER.
+
+    Returns:
+        tuple[str, dict]: (finish_reason, usage)
+    """
+    import requests
+
+    finish_reason = None
+    usage = {}
     try:
-        return data['choices'][0]['message']['content'], False
-    except Exception:
-        raise RuntimeError(f"Unexpected response format from LLM: {data}")
+        with resp:
+            for _, chunk in _iter_sse(resp):
+                if 'error' in chunk:
+                    raise RuntimeError(f"Unexpected response format from LLM: {chunk}")
+                if chunk.get('usage'):
+                    usage = chunk['usage']
+                for choice in chunk.get('choices') or []:
+                    meter.feed((choice.get('delta') or {}).get('content') or '')
+                    if choice.get('finish_reason'):
+                        finish_reason = choice['finish_reason']
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(f"** {label} stream interrupted: {e}")
+    except ValueError as e:
+        raise RuntimeError(f"Unexpected response format from LLM: {e}")
+    return finish_reason, usage
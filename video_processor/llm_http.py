@@ -0,0 +1,339 @@
+"""
+llm_http.py
+
+Shared transports for the LLM backends: one keep-alive requests.Session per
+backend with a sized connection pool, one Anthropic client per API key, and a
+per-backend cap on requests in flight. Everything here is process-wide and
+thread-safe, so concurrent callers (batch mode, map-reduce, achat) reuse
+connections instead of paying TCP/TLS setup per call.
+
+Each backend/model pair also has a RateLimiter: request and token buckets
+(configured, or learned from the provider's rate-limit headers), a pause
+until any Retry-After passes, and a concurrency limit that halves on every
+rate-limit or overload response and grows back by one slot per round of
+successful calls (AIMD), so concurrent callers settle just under the quota.
+"""
+import email.utils
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from .config import get_settings
+
+_lock = threading.Lock()
+_sessions = {}
+_anthropic_clients = {}
+_slots = {}
+_limiters = {}
+
+# Responses worth retrying: timeouts, rate limits, server errors and Anthropic's 529 "overloaded"
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 529})
+# Of those, the ones that mean "slow down" rather than "try again"
+THROTTLE_STATUSES = frozenset({429, 503, 529})
+
+
+def get_session(backend: str):
+    """Return the pooled requests.Session for BACKEND, creating it on first use."""
+    with _lock:
+        session = _sessions.get(backend)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            # Retries are handled by llm_client, so the adapter never retries on its own
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=get_settings().LLM_POOL_SIZE, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[backend] = session
+        return session
+
+
+def get_anthropic_client(api_key: str):
+    """Return a cached Anthropic client for API_KEY (the SDK client pools its own connections)."""
+    with _lock:
+        client = _anthropic_clients.get(api_key)
+        if client is None:
+            from anthropic import Anthropic
+
+            # Retries go through the shared RateLimiter in llm_client, not the SDK's own backoff
+            client = Anthropic(api_key=api_key, max_retries=0)
+            _anthropic_clients[api_key] = client
+        return client
+
+
+@contextmanager
+def request_slot(backend: str):
+    """Hold one of BACKEND's LLM_MAX_CONCURRENCY request slots for the duration of a call."""
+    with _lock:
+        slot = _slots.get(backend)
+        if slot is None:
+            slot = _slots[backend] = threading.BoundedSemaphore(max(1, get_settings().LLM_MAX_CONCURRENCY))
+    with slot:
+        yield
+
+
+class RetryableError(RuntimeError):
+    """
+    A failed LLM request that may succeed if retried: STATUS is the HTTP status
+    (None for connection errors) and RETRY_AFTER the server's requested delay in seconds.
+    """
+
+    def __init__(self, message: str, status: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def throttled(self) -> bool:
+        return self.status in THROTTLE_STATUSES
+
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def _seconds(value) -> float:
+    """Seconds in a header value: a number, a Go-style duration ('1m30s', '20ms'), or an HTTP/ISO date."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after(headers) -> float:
+    """The delay requested by a response's Retry-After (or retry-after-ms) header, in seconds, or None."""
+    if not headers:
+        return None
+    millis = headers.get("retry-after-ms")
+    if millis is not None:
+        try:
+            return max(0.0, float(millis) / 1000)
+        except ValueError:
+            pass
+    return _seconds(headers.get("retry-after"))
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for retry ATTEMPT (0-based)."""
+    return random.uniform(base, min(cap, base * 2 ** (attempt + 1)))
+
+
+class _Bucket:
+    """Token bucket refilled at PER_MINUTE / 60 per second; reservations may overdraw it and wait."""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take AMOUNT (capped at the bucket size); returns the seconds to wait before using it."""
+        self._refill(now)
+        self.level -= min(amount, self.per_minute)
+        return max(0.0, -self.level * 60 / self.per_minute)
+
+    def sync(self, limit: float, remaining: float, now: float) -> None:
+        """Adopt the provider's view: LIMIT per minute with REMAINING left."""
+        self._refill(now)
+        if limit:
+            self.per_minute = limit
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+
+
+class RateLimiter:
+    """
+    Admission control for one backend/model pair; see the module docstring.
+    Use slot() around each request and report its outcome with succeeded(),
+    throttled() and observe().
+    """
+
+    def __init__(self, label: str, max_concurrency: int, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.label = label
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.requests = _Bucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = _Bucket(tokens_per_minute) if tokens_per_minute else None
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, tokens: int = 0):
+        """Wait for the buckets, any pause and a concurrency slot, then hold the slot for the request."""
+        with self._cond:
+            now = time.monotonic()
+            wait = 0.0
+            if self.requests is not None:
+                wait = self.requests.reserve(1, now)
+            if self.tokens is not None and tokens:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+        if wait > 0:
+            time.sleep(wait)
+        with self._cond:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self._cond.wait(pause)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def succeeded(self) -> None:
+        """Additive increase: one more slot after about LIMIT successful calls."""
+        with self._cond:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def throttled(self, delay: float) -> None:
+        """Multiplicative decrease, and hold every caller back for DELAY seconds."""
+        with self._cond:
+            self.limit = max(1.0, self.limit / 2)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    def observe(self, headers) -> None:
+        """Update the buckets from OpenAI (x-ratelimit-*) or Anthropic (anthropic-ratelimit-*) response headers."""
+        if not headers:
+            return
+        now = time.monotonic()
+        with self._cond:
+            for kind in ("requests", "tokens"):
+                def header(field):
+                    return headers.get(f"x-ratelimit-{field}-{kind}") or headers.get(f"anthropic-ratelimit-{kind}-{field}")
+
+                limit, remaining = header("limit"), header("remaining")
+                if limit is None and remaining is None:
+                    continue
+                try:
+                    limit = float(limit) if limit is not None else None
+                    remaining = float(remaining) if remaining is not None else None
+                except ValueError:
+                    continue
+                bucket = getattr(self, kind)
+                if bucket is None and limit:
+                    bucket = _Bucket(limit)
+                    setattr(self, kind, bucket)
+                if bucket is not None:
+                    bucket.sync(limit, remaining, now)
+                if remaining is not None and remaining <= 0:
+                    reset = _seconds(header("reset"))
+                    if reset:
+                        self.paused_until = max(self.paused_until, now + reset)
+
+
+def rate_limiter(backend: str, model: str) -> RateLimiter:
+    """Return the process-wide RateLimiter for BACKEND/MODEL, creating it on first use."""
+    key = (backend, model)
+    with _lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            settings = get_settings()
+            limiter = _limiters[key] = RateLimiter(
+                f"{backend}:{model}", settings.LLM_MAX_CONCURRENCY,
+                requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE, tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            )
+        return limiter
+
+
+class CancelToken:
+    """
+    Cancellation for one in-flight request. cancel() marks it cancelled and
+    runs the registered closers (e.g. a streaming response's close()), which
+    makes a reader blocked on that stream fail promptly in its own thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._closers = []
+        self._event = threading.Event()
+        self.cancelled = False
+
+    def on_cancel(self, closer) -> None:
+        """Register CLOSER; it runs immediately if the token is already cancelled."""
+        with self._lock:
+            if not self.cancelled:
+                self._closers.append(closer)
+                return
+        closer()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self._event.set()
+            closers, self._closers = self._closers, []
+        for closer in closers:
+            try:
+                closer()
+            except Exception:
+                pass
+
+    def wait(self, seconds: float) -> bool:
+        """Sleep up to SECONDS, waking early on cancel(); returns True if cancelled."""
+        return self._event.wait(seconds)
+
+
+def response_closer(resp):
+    """
+    A CancelToken closer for the streamed requests response RESP. The socket is
+    shut down first: closing the response alone waits for a reader blocked on
+    it, which can be as long as the server takes to send the next event.
+    """
+    def close():
+        sock = getattr(getattr(resp.raw, "_connection", None), "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        resp.close()
+
+    return close
+
+
+def close_all() -> None:
+    """Close pooled sessions and clients (e.g. before a long-lived process exits)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        for client in _anthropic_clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+        _anthropic_clients.clear()
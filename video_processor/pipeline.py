@@ -0,0 +1,724 @@
+"""
+pipeline.py
+
+Per-source processing stages shared by the single-run CLI and batch mode:
+transcript acquisition (captions or Whisper), prompt construction, LLM
+summarization and output writing.
+"""
+import os
+
+import click
+
+from .profiling import stage
+
+
+DEFAULT_TEMPLATE = "transcribe.tpl"
+# Building blocks of other prompts (transcript context, map-reduce passes), not summaries on their own
+INTERNAL_TEMPLATES = ("transcript.tpl", "map.tpl", "reduce.tpl")
+
+
+def is_url(source: str) -> bool:
+    """Return True if SOURCE looks like a URL rather than a local path."""
+    return source.startswith(("http://", "https://"))
+
+
+def read_transcript(source: str) -> tuple:
+    """
+    Read a pre-existing transcript file.
+
+    Returns:
+        tuple[str, bool]: (text, is_srt)
+    """
+    source_ext = os.path.splitext(source)[1].lower()
+    with open(source, "r", encoding="utf-8") as f:
+        raw_text = f.read()
+    if source_ext == ".srt":
+        click.echo(f".. Reading SRT transcript: {source}")
+        return raw_text, True
+    # Plain text or unknown extension: pass directly to LLM, skipping SRT parsing
+    click.echo(f".. Reading plain-text transcript: {source}")
+    return raw_text, False
+
+
+def timestamped_transcript(text: str, is_srt: bool, compact: str = "off", report: dict = None) -> str:
+    """
+    SRT becomes '[HH:MM:SS] text' lines; plain text is used as-is. COMPACT
+    ('auto', 'on', 'off') merges rolling caption cues first (see compaction.py);
+    REPORT, if given, is filled with the compaction report.
+    """
+    if not is_srt:
+        return text
+    if compact == "off":
+        from .srt_parser import srt_to_timestamped_lines
+
+        return srt_to_timestamped_lines(text)
+
+    from .compaction import compact_transcript
+
+    with stage("transcript compact") as prof:
+        timestamped, result = compact_transcript(text, compact)
+        prof.update(result)
+    if report is not None:
+        report.update(result)
+    if result['applied']:
+        before, after = result['tokens_before'], result['tokens_after']
+        saved = 1 - after / before if before else 0.0
+        click.echo(
+            f".. Compacted captions: {result['cues']} cues -> {result['lines']} lines, "
+            f"~{before} -> ~{after} tokens (-{saved:.0%})"
+        )
+    return timestamped
+
+
+def build_prompt_parts(timestamped: str, template_name: str = DEFAULT_TEMPLATE) -> tuple:
+    """
+    Split a prompt into (context, instructions). The context is the timestamped
+    transcript in a fixed wrapper (transcript.tpl), identical for every template,
+    so it can be sent first and cached across calls about the same transcript.
+    A template that still embeds {{ transcript }} is returned whole as the
+    instructions, with an empty context.
+    """
+    from .llm_client import load_template
+
+    template = load_template(template_name)
+    if "{{ transcript }}" in template:
+        return "", template.replace("{{ transcript }}", timestamped)
+    return load_template("transcript.tpl").replace("{{ transcript }}", timestamped), template
+
+
+def build_prompt(timestamped: str, template_name: str = DEFAULT_TEMPLATE) -> str:
+    """The full prompt text for TIMESTAMPED, as sent to backends without explicit prompt caching."""
+    from .llm_client import join_prompt
+
+    return join_prompt(*build_prompt_parts(timestamped, template_name))
+
+
+def ollama_context_limit() -> int:
+    """The largest context an Ollama request can get: sized per request natively, fixed by the server otherwise."""
+    from .config import get_settings
+
+    settings = get_settings()
+    return settings.OLLAMA_MAX_CTX if settings.OLLAMA_API == "native" else settings.OLLAMA_NUM_CTX
+
+
+def plan_prompt(
+    prompt: str, backend: str, model: str, max_tokens: int, compactable: bool = False, fallback: bool = False
+) -> dict:
+    """
+    Count PROMPT's tokens for BACKEND/MODEL and decide, before any request, how
+    to send it: 'fit' (as is, also when the context window is unknown),
+    'compact' (too long, but the captions can still be compacted) or 'split'
+    (too long; summarize in map-reduce windows). The plan is printed (naming
+    the target when it is a FALLBACK) and recorded in the profile.
+    """
+    from .tokens import count_tokens, format_plan, plan_request, tokenizer_name
+
+    with stage("token plan") as prof:
+        tokens = count_tokens(prompt, backend, model)
+        plan = plan_request(tokens, backend, model, max_tokens, num_ctx=ollama_context_limit())
+        plan['tokenizer'] = tokenizer_name(backend, model)
+        if plan['fits'] is False:
+            plan['decision'] = 'compact' if compactable else 'split'
+        else:
+            plan['decision'] = 'fit'
+        prof.update(plan)
+    target = f" (fallback {backend}:{model})" if fallback else ""
+    click.echo(f".. Token plan{target}: {format_plan(plan)}")
+    if plan['max_output'] and max_tokens > plan['max_output']:
+        click.echo(
+            f"** WARNING: --token-limit {max_tokens} exceeds the {plan['max_output']:,}-token output limit of {model}",
+            err=True,
+        )
+    return plan
+
+
+def map_window_tokens(backend: str, model: str, max_tokens: int, window_tokens: int) -> int:
+    """WINDOW_TOKENS, reduced if needed so a map prompt and its output fit the model's context."""
+    from .llm_client import load_template
+    from .summarize import MAP_MAX_TOKENS
+    from .tokens import count_tokens, plan_request
+
+    template_tokens = count_tokens(load_template("map.tpl"), backend, model)
+    plan = plan_request(template_tokens, backend, model, min(max_tokens, MAP_MAX_TOKENS), num_ctx=ollama_context_limit())
+    if plan['available'] is None:
+        return window_tokens
+    # Windows are cut with the rough 4-characters-per-token estimate; keep a margin for it
+    budget = int((plan['available'] - template_tokens) * 0.8)
+    return max(256, min(window_tokens, budget))
+
+
+def split_windows(timestamped: str, backend: str, model: str, max_tokens: int, window_tokens: int) -> tuple:
+    """
+    TIMESTAMPED split into map-reduce windows for BACKEND/MODEL, with
+    WINDOW_TOKENS first reduced to fit the context (see map_window_tokens).
+
+    Returns:
+        tuple[list, int]: (windows, window_tokens used)
+    """
+    from .summarize import split_transcript
+
+    fitted = map_window_tokens(backend, model, max_tokens, window_tokens)
+    if fitted < window_tokens:
+        click.echo(f".. Map-reduce windows reduced to {fitted} tokens to fit the {model} context")
+    return split_transcript(timestamped, fitted, backend, model), fitted
+
+
+def resolve_title(source: str, meta: dict = None, use_cache: bool = True) -> str:
+    """Title for output naming: the YouTube title for URLs, else the file stem."""
+    if meta is None and is_url(source):
+        from .downloader import probe_metadata
+        meta = probe_metadata(source, use_cache=use_cache)
+    if meta and meta.get('title'):
+        return meta['title']
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def summary_filename(source: str, output: str, backend: str, model: str, meta: dict = None, template: str = None) -> str:
+    """
+    Output filename: title-derived when OUTPUT is None, else OUTPUT with timestamp suffix.
+    A TEMPLATE other than the default is added to the name ('<slug>-<template>_backend_model_timestamp').
+    """
+    from .jobctx import slugify_filename_component, generate_timestamp_suffix
+
+    timestamp_suffix = generate_timestamp_suffix(backend, model)
+    variant = ""
+    if template and template != DEFAULT_TEMPLATE:
+        variant = "-" + slugify_filename_component(os.path.splitext(os.path.basename(template))[0])
+    if output is None:
+        # Auto-generate filename from video title
+        slug = slugify_filename_component(resolve_title(source, meta))
+        return slug + variant + timestamp_suffix + ".md"
+    base_name, ext = os.path.splitext(output)
+    return base_name + variant + timestamp_suffix + (ext or ".md")
+
+
+class SummaryStream:
+    """
+    Destination for streamed LLM output: stdout when FILENAME is None, else
+    FILENAME.partial, which is renamed into place by finish() (or removed by
+    abort()) so a failed run never clobbers an existing summary.
+    """
+
+    def __init__(self, filename: str = None):
+        self.filename = filename
+        self._fh = None
+        if filename is not None:
+            self.partial = filename + ".partial"
+            self._fh = open(self.partial, 'w', encoding='utf-8')
+
+    def write(self, chunk: str) -> None:
+        if self._fh is None:
+            click.echo(chunk, nl=False)
+        else:
+            self._fh.write(chunk)
+            self._fh.flush()
+
+    def finish(self) -> bool:
+        """Complete the output; returns True if an existing file was overwritten."""
+        if self._fh is None:
+            click.echo()
+            return False
+        self._fh.close()
+        existed = os.path.exists(self.filename)
+        os.replace(self.partial, self.filename)
+        return existed
+
+    def reset(self) -> None:
+        """Discard what was written so far (the answer is being replaced)."""
+        if self._fh is None:
+            click.echo("\n** Discarding the partial answer above; the complete answer follows", err=True)
+        else:
+            self._fh.seek(0)
+            self._fh.truncate()
+
+    def retarget(self, filename: str) -> None:
+        """Make finish() write to FILENAME instead."""
+        if self._fh is not None:
+            self.filename = filename
+
+    def abort(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            try:
+                os.remove(self.partial)
+            except OSError:
+                pass
+
+
+def format_llm_stats(stats: dict) -> str:
+    """', ttft=…s, … tok/s' suffix for the result line, or '' if nothing was measured."""
+    parts = []
+    if stats.get('cached'):
+        parts.append("cached")
+    else:
+        if stats.get('ttft') is not None:
+            parts.append(f"ttft={stats['ttft']:.2f}s")
+        if stats.get('tokens_per_sec'):
+            parts.append(f"{stats['tokens_per_sec']:.1f} tok/s")
+        if stats.get('input_tokens') is not None:
+            parts.append(f"input={stats['input_tokens']} tokens")
+        if stats.get('cache_read_tokens'):
+            parts.append(f"cache read={stats['cache_read_tokens']}")
+        if stats.get('cache_write_tokens'):
+            parts.append(f"cache write={stats['cache_write_tokens']}")
+        if stats.get('num_ctx'):
+            # Ollama's own timings: model load, prompt processing and generation
+            timings = [f"{label}={stats[key]:.2f}s" for key, label in (
+                ('load_s', "load"), ('prompt_eval_s', "prompt eval"), ('eval_s', "eval")
+            ) if stats.get(key) is not None]
+            parts.extend(timings + [f"num_ctx={stats['num_ctx']}"])
+    return "".join(f", {p}" for p in parts)
+
+
+def describe_llm_error(e: Exception, backend: str, model: str, debug: bool = False) -> str:
+    """Translate an exception raised by llm_client.chat into a user-facing message."""
+    import requests
+    from .failover import AllTargetsFailed
+
+    if isinstance(e, AllTargetsFailed) and e.__cause__ is not None:
+        # Explain the primary target's own error, then list what every target did
+        return f"{describe_llm_error(e.__cause__, backend, model, debug=debug)}\n{e}"
+
+    if isinstance(e, requests.exceptions.HTTPError):
+        resp = e.response
+        # Attempt to parse structured Ollama error JSON
+        try:
+            body = resp.json()
+            info = body.get('error', {})
+            err_msg = info.get('message', '').strip()
+        except Exception:
+            body = resp.text
+            info = {}
+            err_msg = str(body).strip()
+        # Debug output for LLM HTTP errors
+        if debug:
+            click.echo(f"[debug] LLM error response [{resp.status_code}]: {body}", err=True)
+        # Detect missing-model error (legacy and new formats)
+        if info.get('type') == 'not_found_error' or ('model' in err_msg and 'not found' in err_msg):
+            if backend == 'anthropic':
+                return (
+                    f"Model '{model}' not found on Anthropic Cloud."
+                    " Please use a valid Anthropic model name, e.g. claude-2, claude-2.1, claude-2-instant, or claude-3."
+                )
+            elif backend == 'openai':
+                return (
+                    f"Model '{model}' not found on OpenAI."
+                    " Please use a valid OpenAI model name, e.g. gpt-4, gpt-4-turbo, gpt-3.5-turbo, o4-mini-2025-04-16."
+                )
+            return (
+                f"Model '{model}' not found on Ollama server."
+                f"\nPlease pull it first: `ollama pull {model}`"
+            )
+        msg = f"HTTP {resp.status_code} {resp.reason}: {err_msg}"
+    else:
+        msg = str(e)
+    # Special-case missing Anthropic SDK or API key
+    if 'Anthropic SDK is not installed' in msg:
+        return (
+            "Anthropic SDK is not installed; please install with:\n"
+            "  pip install anthropic>=0.3.0"
+        )
+    if 'ANTHROPIC_API_KEY is not set' in msg:
+        return (
+            "ANTHROPIC_API_KEY is not set; please export your Anthropic API key, e.g.:\n"
+            "  export ANTHROPIC_API_KEY=your_api_key_here"
+        )
+    if 'OPENAI_API_KEY is not set' in msg:
+        return (
+            "OPENAI_API_KEY is not set; please export your OpenAI API key, e.g.:\n"
+            "  export OPENAI_API_KEY=your_api_key_here"
+        )
+    return (
+        f"Error during chat completion: {msg}\n"
+        "Ensure your LLM backend is configured correctly (check LLM_BACKEND, OLLAMA_URL, ANTHROPIC_API_KEY, OPENAI_API_KEY)."
+    )
+
+
+def media_fingerprint(path: str) -> str:
+    """Size and modification time of the file at PATH ('size:mtime_ns'), or None if it cannot be read."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def fetch_source(
+    source: str,
+    *,
+    youtube: bool = False,
+    download_video: bool = False,
+    transcript: bool = False,
+    llm_model: str,
+    backend: str,
+    whisper_model: str = None,
+    yt_cookies: str = None,
+    debug: bool = False,
+    use_cache: bool = True,
+    resume: bool = False,
+    **_ignored,
+) -> dict:
+    """
+    Network/disk stage: read a transcript file, or fetch YouTube captions (and the
+    video with DOWNLOAD_VIDEO). Returns a state dict for the later stages; when
+    Whisper is still required, 'media_path' is set and 'text' is None. For YouTube
+    sources the metadata is probed once here and carried in state['meta'], and an
+    Ollama model is loaded in the background while the captions download.
+
+    Completed stages are recorded in the source's job (state['job']); with
+    RESUME, stages the job already completed (metadata, captions, downloaded
+    video, a Whisper SRT from the same WHISPER_MODEL and, for local media, the
+    same unchanged file) are read back instead of redone.
+    """
+    from .config import get_settings
+    from .jobs import open_job
+
+    # Determine if source is a pre-existing transcript (flag or auto-detected extension)
+    source_ext = os.path.splitext(source)[1].lower()
+    is_transcript = transcript or (not youtube and source_ext in (".srt", ".txt"))
+
+    job = open_job(source if is_url(source) else os.path.abspath(source))
+    state = {'source': source, 'text': None, 'is_srt': True, 'media_path': None, 'meta': None, 'job': job}
+    whisper_model = whisper_model or get_settings().WHISPER_MODEL
+    if is_transcript:
+        if debug:
+            click.echo(f"__ Transcript mode: reading {source} directly (skipping Whisper)", err=True)
+        state['text'], state['is_srt'] = read_transcript(source)
+        return state
+
+    def resumed(name: str, **match) -> bool:
+        text = job.read_text(name, **match) if resume else None
+        if text is None:
+            return False
+        click.echo(f".. Resuming {source}: {name} from the job store")
+        state['text'] = text
+        state['whisper'] = name == 'srt'
+        return True
+
+    if youtube:
+        from .downloader import download_srt, download_video as fetch_video, probe_metadata
+
+        click.echo(f".. Seeking subtitles for {source}")
+        stored = job.completed('metadata') if resume else None
+        if stored is not None:
+            meta = stored['data']
+        else:
+            meta = probe_metadata(source, debug=debug, use_cache=use_cache, yt_cookies=yt_cookies)
+            if meta.get('id'):
+                job.finish('metadata', data=meta)
+        state['meta'] = meta
+        job.set_video_id(meta.get('id'))
+        if resumed('captions') or resumed('srt', whisper_model=whisper_model):
+            return state
+        from .llm_client import prewarm
+        from .tokens import SPEECH_TOKENS_PER_SECOND
+
+        prewarm(backend, llm_model, int((meta.get('duration') or 0) * SPEECH_TOKENS_PER_SECOND), debug=debug)
+        downloaded_video_file = None
+        if download_video:
+            stored = job.completed('media') if resume else None
+            if stored is not None:
+                downloaded_video_file = stored['artifact']
+                click.echo(f".. Resuming {source}: video {downloaded_video_file}")
+            else:
+                click.echo(f".. Downloading full video for {source}")
+                with job.step('media'):
+                    downloaded_video_file = fetch_video(source, debug=debug, backend=backend, model=llm_model, yt_cookies=yt_cookies, meta=meta)
+                    job.finish('media', downloaded_video_file)
+        try:
+            with job.step('captions'):
+                state['text'] = download_srt(source, debug=debug, backend=backend, model=llm_model, yt_cookies=yt_cookies, meta=meta)
+                job.save_text('captions', 'captions.srt', state['text'])
+        except RuntimeError:
+            if not download_video or not downloaded_video_file:
+                raise
+            click.echo(f".. No subtitles found; falling back to Whisper transcription", err=True)
+            state['media_path'] = downloaded_video_file
+    elif not resumed('srt', whisper_model=whisper_model, media=media_fingerprint(source)):
+        state['media_path'] = source
+    return state
+
+
+def transcribe_source(
+    state: dict,
+    *,
+    whisper_model: str,
+    llm_model: str,
+    backend: str,
+    debug: bool = False,
+    use_cache: bool = True,
+    chunk_seconds: float = None,
+    chunk_workers: int = None,
+    **_ignored,
+) -> dict:
+    """Whisper stage: transcribe state['media_path'] to SRT text, recorded in the job as stage 'srt'."""
+    from .config import get_settings
+    from .converter import transcribe_to_srt
+    from .jobs import Job
+
+    chunking = {}
+    if chunk_seconds is not None:
+        chunking['chunk_seconds'] = chunk_seconds
+    if chunk_workers is not None:
+        chunking['chunk_workers'] = chunk_workers
+    job = state.get('job') or Job(None, None, state['source'])
+    whisper_model = whisper_model or get_settings().WHISPER_MODEL
+    with job.step('srt'):
+        state['text'] = transcribe_to_srt(
+            state['media_path'], whisper_model, debug=debug, backend=backend, model=llm_model, use_cache=use_cache,
+            **chunking,
+        )
+        # An edited or replaced file at the same path must not resume this transcript
+        job.save_text(
+            'srt', 'whisper.srt', state['text'],
+            data={'whisper_model': whisper_model, 'media': media_fingerprint(state['media_path'])},
+        )
+    state['is_srt'] = True
+    state['whisper'] = True
+    return state
+
+
+def summarize_source(
+    state: dict,
+    *,
+    llm_model: str,
+    temperature: float,
+    token_limit: int,
+    backend: str,
+    output: str = None,
+    debug: bool = False,
+    use_cache: bool = True,
+    map_reduce: bool = False,
+    window_tokens: int = 8000,
+    map_concurrency: int = 4,
+    compact: str = "auto",
+    template: str = DEFAULT_TEMPLATE,
+    fallbacks: list = None,
+    first_token_deadline: float = 0.0,
+    hedge_after: float = 0.0,
+    resume: bool = False,
+    **_ignored,
+) -> dict:
+    """
+    LLM stage: build the prompt from TEMPLATE, summarize and write the result.
+    With MAP_REDUCE, transcripts longer than WINDOW_TOKENS are summarized window
+    by window and then merged (see summarize.map_reduce_summarize); a custom
+    TEMPLATE is applied to the merged notes. COMPACT controls caption
+    de-duplication (see timestamped_transcript). FALLBACKS ((backend, model)
+    pairs), FIRST_TOKEN_DEADLINE and HEDGE_AFTER set the failover policy for
+    the single-prompt call (see failover.chat_with_failover); the output is
+    named after the backend and model that answered.
+
+    The prompt is planned for the primary target and every fallback (fallbacks
+    it does not fit are skipped); with map-reduce the transcript is split once.
+    The token plan and the saved summary are recorded in the source's job as
+    stages 'prompt' and 'summary:TEMPLATE:BACKEND:MODEL'. With RESUME, a summary
+    the job already saved from the same transcript text (and that still exists)
+    is not requested again; with -o FILE it must also have been saved for the same FILE.
+
+    Returns:
+        dict: {'source', 'output', 'truncated', 'backend', 'model'}
+    """
+    from .cache import make_key
+    from .jobctx import in_workdir
+    from .jobs import Job
+    from .llm_client import join_prompt
+    from .tokens import tokenizer_name
+
+    source = state['source']
+    job = state.get('job') or Job(None, None, source)
+    summary_stage = f"summary:{template}:{backend}:{llm_model}"
+    # A summary is only reused for the same transcript text and the same -o (the saved name adds a timestamp)
+    transcript_key = make_key(state['text'])[:16]
+    requested = os.path.abspath(in_workdir(output)) if output not in (None, "", "=") else None
+    if resume and output not in ("", "="):
+        done = job.completed(summary_stage, transcript=transcript_key, output=requested)
+        if done is not None:
+            click.echo(f".. Resuming {source}: already summarized to {done['artifact']}")
+            used = done['data']
+            return {
+                'source': source, 'output': done['artifact'], 'truncated': False,
+                'backend': used.get('backend', backend), 'model': used.get('model', llm_model),
+            }
+    if state.get('timestamped') is not None:
+        # Already parsed for another variant (see summarize_variants)
+        timestamped, compaction = state['timestamped'], state.get('compaction', {})
+    else:
+        compaction = {}
+        with stage("transcript parse", chars=len(state['text'])):
+            timestamped = timestamped_transcript(state['text'], state['is_srt'], compact=compact, report=compaction)
+
+    # Every target that may answer is planned; the primary decides between one prompt and map-reduce
+    targets = [(backend, llm_model)]
+    targets += [tuple(t) for t in fallbacks or () if tuple(t) not in targets]
+    windows = None
+    if map_reduce:
+        windows, window_tokens = split_windows(timestamped, backend, llm_model, token_limit, window_tokens)
+        if len(windows) > 1:
+            plan = {'decision': 'split', 'tokenizer': tokenizer_name(backend, llm_model)}
+        else:
+            # A transcript that fits one window takes the normal single prompt
+            windows = None
+    parts = None
+    if windows is None:
+        # Decide before any request whether the prompt fits; too long means compacting captions first, then splitting
+        with stage("prompt build") as prof:
+            parts = build_prompt_parts(timestamped, template)
+            prof['chars'] = len(join_prompt(*parts))
+        # Whisper output has no rolling captions to merge; only caption files are compacted on demand
+        compactable = state['is_srt'] and not state.get('whisper') and compact == "auto" and not compaction.get('applied')
+        plans = [
+            plan_prompt(join_prompt(*parts), b, m, token_limit, compactable=compactable, fallback=i > 0)
+            for i, (b, m) in enumerate(targets)
+        ]
+        if any(p['decision'] == 'compact' for p in plans):
+            click.echo(".. Prompt exceeds the context window; compacting captions")
+            timestamped = timestamped_transcript(state['text'], True, compact="on")
+            parts = build_prompt_parts(timestamped, template)
+            plans = [
+                plan_prompt(join_prompt(*parts), b, m, token_limit, fallback=i > 0) for i, (b, m) in enumerate(targets)
+            ]
+        plan = plans[0]
+        if plan['decision'] == 'split':
+            click.echo(".. Prompt exceeds the context window; summarizing in map-reduce windows")
+            windows, window_tokens = split_windows(timestamped, backend, llm_model, token_limit, window_tokens)
+            parts = None
+        else:
+            for (b, m), target_plan in zip(targets[1:], plans[1:]):
+                if target_plan['decision'] == 'split':
+                    click.echo(f".. Skipping fallback {b}:{m}: the prompt exceeds its context window")
+                    targets.remove((b, m))
+    record = {key: plan.get(key) for key in ('decision', 'prompt_tokens', 'context_window', 'tokenizer')}
+    if windows is not None:
+        record.update(windows=len(windows), window_tokens=window_tokens)
+    else:
+        record['targets'] = [f"{b}:{m}" for b, m in targets]
+    job.finish('prompt', data=record)
+
+    # Output is streamed as tokens arrive: -o= prints to stdout; omitting -o auto-saves to file;
+    # -o FILE saves to named file
+    filename = None
+    if output not in ("", "="):
+        filename = in_workdir(
+            summary_filename(source, output, backend, llm_model, meta=state.get('meta'), template=template)
+        )
+    sink = SummaryStream(filename)
+    stats = {}
+    try:
+        variant = f", template={template}" if template != DEFAULT_TEMPLATE else ""
+        click.echo(
+            f".. Sending prompt to LLM backend ({backend}), model={llm_model}{variant}, temp={temperature}, max_tokens={token_limit}"
+        )
+        if windows is not None:
+            from .summarize import map_reduce_summarize
+
+            md, was_truncated = map_reduce_summarize(
+                timestamped, model=llm_model, temperature=temperature, max_tokens=token_limit,
+                window_tokens=window_tokens, concurrency=map_concurrency, debug=debug, use_cache=use_cache,
+                on_token=sink.write, stats=stats, backend=backend,
+                reduce_template="reduce.tpl" if template == DEFAULT_TEMPLATE else template, windows=windows,
+            )
+        else:
+            from .failover import chat_with_failover
+
+            # The transcript goes first as a cacheable context; the template's instructions follow it
+            context, instructions = parts
+            md, was_truncated, used_backend, used_model = chat_with_failover(
+                instructions, targets, first_token_deadline=first_token_deadline, hedge_after=hedge_after,
+                context=context, temperature=temperature, debug=debug, max_tokens=token_limit, use_cache=use_cache,
+                on_token=sink.write, on_reset=sink.reset, stats=stats,
+            )
+            if (used_backend, used_model) != (backend, llm_model):
+                backend, llm_model = used_backend, used_model
+                if filename is not None:
+                    filename = in_workdir(
+                        summary_filename(source, output, backend, llm_model, meta=state.get('meta'), template=template)
+                    )
+                    sink.retarget(filename)
+    except Exception as e:
+        sink.abort()
+        job.fail(summary_stage, e)
+        raise RuntimeError(describe_llm_error(e, backend, llm_model, debug=debug)) from e
+    with stage("summary write"):
+        overwritten = sink.finish()
+    if was_truncated:
+        job.fail(summary_stage, "output truncated")
+    elif filename is not None:
+        job.finish(
+            summary_stage, filename,
+            data={'backend': backend, 'model': llm_model, 'transcript': transcript_key, 'output': requested},
+        )
+    click.echo(f".. Received result from LLM ({backend}:{llm_model}, length={len(md)} chars{format_llm_stats(stats)})")
+    if filename is not None:
+        if overwritten:
+            click.echo(f".. Summarization overwritten to {filename}")
+        else:
+            click.echo(f".. Summarization written to {filename}")
+
+    return {'source': source, 'output': filename, 'truncated': was_truncated, 'backend': backend, 'model': llm_model}
+
+
+def summarize_variants(state: dict, *, variants: list = None, fanout_concurrency: int = 4, **options) -> dict:
+    """
+    Summarize one fetched transcript with every variant in VARIANTS, dicts of
+    'template', 'backend' and 'llm_model' overriding OPTIONS, running up to
+    FANOUT_CONCURRENCY at once; each result is written under its own name.
+    Without VARIANTS this is a single summarize_source call.
+
+    Returns:
+        dict: {'source', 'output' (list of files), 'truncated'}
+    Raises RuntimeError naming the failed variants once all have finished.
+    """
+    if not variants:
+        return summarize_source(state, **options)
+    from concurrent.futures import ThreadPoolExecutor
+    from .jobctx import bind_job
+
+    # Workers write under the caller's job (daemon clients have their own cwd, timestamp and output)
+    @bind_job
+    def run(variant: dict) -> dict:
+        with stage("summarize variant", **variant):
+            return summarize_source(state, **{**options, **variant})
+
+    click.echo(f".. Fan-out: {len(variants)} template/model combinations, concurrency={fanout_concurrency}")
+    # Parse (and compact) the transcript once for all variants
+    compaction = {}
+    with stage("transcript parse", chars=len(state['text'])):
+        timestamped = timestamped_transcript(
+            state['text'], state['is_srt'], compact=options.get('compact', "auto"), report=compaction
+        )
+    state = {**state, 'timestamped': timestamped, 'compaction': compaction}
+    with ThreadPoolExecutor(max_workers=max(1, fanout_concurrency), thread_name_prefix="vp-fanout") as pool:
+        futures = [(variant, pool.submit(run, variant)) for variant in variants]
+    results, failures = [], []
+    for variant, future in futures:
+        label = f"{variant.get('template', DEFAULT_TEMPLATE)} on {variant['backend']}:{variant['llm_model']}"
+        try:
+            results.append(future.result())
+        except Exception as e:
+            first_line = str(e).splitlines()[0] if str(e) else type(e).__name__
+            click.echo(f"** Failed {label}: {first_line}", err=True)
+            failures.append(label)
+    if failures:
+        raise RuntimeError(f"{len(failures)} of {len(variants)} combinations failed: {', '.join(failures)}")
+    return {
+        'source': state['source'],
+        'output': [r['output'] for r in results if r['output']],
+        'truncated': any(r['truncated'] for r in results),
+    }
+
+
+def process_source(source: str, **options) -> dict:
+    """
+    Run one SOURCE through every stage: fetch or transcribe, summarize, write.
+    OPTIONS are the keyword arguments accepted by the individual stages.
+
+    Raises RuntimeError with a user-facing message on failure.
+    """
+    with stage("fetch"):
+        state = fetch_source(source, **options)
+    if state['text'] is None:
+        with stage("transcribe"):
+            state = transcribe_source(state, **options)
+    with stage("summarize"):
+        return summarize_variants(state, **options)
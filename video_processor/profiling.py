@@ -0,0 +1,213 @@
+"""
+profiling.py
+
+Per-stage profiling for --profile. Code wraps its stages in `stage(name)`;
+while a Profiler is active each stage records wall time, CPU time (the calling
+thread plus any child processes reaped during the stage, e.g. ffmpeg and
+yt-dlp) and the process peak RSS. The result is written as a JSON timeline
+and, optionally, in Chrome trace format (chrome://tracing, Perfetto).
+When no profiler is active, stage() costs one global lookup.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_active = None
+
+
+def _rusage_maxrss():
+    """(self, children) peak RSS in bytes, or (0, 0) where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return 0, 0
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+
+
+def peak_rss() -> int:
+    """Peak resident set size in bytes of this process plus its largest finished child, or 0 if unknown."""
+    own, children = _rusage_maxrss()
+    return own + children
+
+
+def _children_cpu() -> float:
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+class Profiler:
+    """Collects stage spans from every thread of one run."""
+
+    def __init__(self):
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add_span(self, name: str, start: float, wall: float, cpu: float = None, parent: str = None, **meta) -> None:
+        """
+        Record a span measured elsewhere; START is a time.perf_counter() value.
+        PARENT defaults to the stage currently open in this thread.
+        """
+        stack = self._stack()
+        span = {
+            "name": name,
+            "parent": parent or (stack[-1] if stack else None),
+            "thread": threading.current_thread().name,
+            "start": start - self.t0,
+            "wall": wall,
+            "cpu": cpu,
+            "peak_rss": peak_rss(),
+        }
+        if meta:
+            span["meta"] = meta
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def stage(self, name: str, meta: dict):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        rss_before = peak_rss()
+        t_cpu = time.thread_time()
+        c_cpu = _children_cpu()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield meta
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - start
+            cpu = (time.thread_time() - t_cpu) + (_children_cpu() - c_cpu)
+            stack.pop()
+            rss_after = peak_rss()
+            span = {
+                "name": name,
+                "parent": parent,
+                "thread": threading.current_thread().name,
+                "start": start - self.t0,
+                "wall": wall,
+                "cpu": cpu,
+                "peak_rss": rss_after,
+                "peak_rss_growth": max(0, rss_after - rss_before),
+            }
+            if meta:
+                span["meta"] = dict(meta)
+            if error:
+                span["error"] = error
+            with self._lock:
+                self.spans.append(span)
+
+    def timeline(self, **info) -> dict:
+        """JSON-serializable run summary: INFO plus every span in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {
+            "started": self.started,
+            "wall": time.perf_counter() - self.t0,
+            "peak_rss": peak_rss(),
+            **info,
+            "stages": spans,
+        }
+
+    def chrome_trace(self) -> dict:
+        """The spans as Chrome trace 'complete' events (microseconds)."""
+        pid = os.getpid()
+        tids = {}
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        # Spans recorded before the profiler started (startup) would have negative timestamps
+        origin = min([0.0] + [s["start"] for s in spans])
+        for span in spans:
+            tid = tids.setdefault(span["thread"], len(tids) + 1)
+            args = {k: span[k] for k in ("cpu", "peak_rss", "peak_rss_growth", "error") if span.get(k) is not None}
+            args.update(span.get("meta", {}))
+            events.append({
+                "name": span["name"], "ph": "X", "pid": pid, "tid": tid,
+                "ts": round((span["start"] - origin) * 1e6), "dur": round(span["wall"] * 1e6), "args": args,
+            })
+        for thread, tid in tids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def report(self, file=None) -> None:
+        """Print a per-stage table to FILE (stderr by default)."""
+        file = file or sys.stderr
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        print(".. Profile (wall / cpu / peak RSS):", file=file)
+        for span in spans:
+            depth = 0
+            parent = span["parent"]
+            # Indent by nesting; parents are looked up by name within the same thread
+            while parent is not None and depth < 8:
+                depth += 1
+                parent = next((s["parent"] for s in spans if s["name"] == parent and s["thread"] == span["thread"]), None)
+            cpu = f"{span['cpu']:8.2f}s" if span["cpu"] is not None else "        -"
+            print(
+                f"..   {'  ' * depth}{span['name']:<{32 - 2 * depth}} {span['wall']:8.2f}s {cpu} "
+                f"{span['peak_rss'] / (1024 * 1024):9.1f}MiB",
+                file=file,
+            )
+
+
+def start() -> Profiler:
+    """Activate a new process-wide profiler."""
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def stop() -> Profiler:
+    """Deactivate and return the current profiler (None if none was active)."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active() -> Profiler:
+    return _active
+
+
+@contextmanager
+def stage(name: str, **meta):
+    """
+    Profile the enclosed block as stage NAME. Yields a dict the block may add
+    attributes to (sizes, counts); META seeds it. A no-op without an active profiler.
+    """
+    profiler = _active
+    if profiler is None:
+        yield meta
+        return
+    with profiler.stage(name, meta) as info:
+        yield info
+
+
+def write(profiler: Profiler, base: str, trace: bool = False, **info) -> list:
+    """Write BASE.json (timeline) and, with TRACE, BASE.trace.json; returns the paths written."""
+    paths = [base + ".json"]
+    with open(paths[0], "w", encoding="utf-8") as f:
+        json.dump(profiler.timeline(**info), f, indent=2)
+    if trace:
+        paths.append(base + ".trace.json")
+        with open(paths[1], "w", encoding="utf-8") as f:
+            json.dump(profiler.chrome_trace(), f)
+    return paths
@@ -0,0 +1,15 @@
+You are an AI assistant. You will receive one part (part {{ part }} of {{ parts }}) of a timestamped transcript of a video or audio file.
+Write detailed notes on this part only, in Markdown:
+
+1. One bullet per idea, speaker change or topic shift, in transcript order.
+   - Begin every bullet with the exact timestamp from the transcript line where that idea starts (e.g., [00:01:23]).
+   - Keep timestamps in [HH:MM:SS] form; never invent or round them.
+
+2. After the bullets, add a line "Action items:" followed by any action items mentioned in this part as bullets, or "None.".
+
+Do not add an introduction or conclusion. Do not summarize parts you have not seen.
+
+Here is the transcript part:
+{{ transcript }}
+
+End of transcript part.
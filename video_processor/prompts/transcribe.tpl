@@ -1,4 +1,4 @@
-You are an AI assistant. You will receive a transcript of a video or audio file with timestamps.
+You are an AI assistant. Above is a transcript of a video or audio file with timestamps.
 Please produce output in Markdown with the following structure:
 
 First section, "# Flow of Content" 
@@ -17,9 +17,4 @@ Second section, "# Executive Summary"
 
 
 When you are done, confirm to yourself that each directive above has been followed and redo if not. 
-DO NOT PRINT YOUR CONFIRMATION IN THE OUTPUT. SIMPLY AND SILENTLY PERFORM THE CONFIRMATION. 
-
-Here is the transcript:
-{{ transcript }}
-
-End of transcript.
\ No newline at end of file
+DO NOT PRINT YOUR CONFIRMATION IN THE OUTPUT. SIMPLY AND SILENTLY PERFORM THE CONFIRMATION. 
\ No newline at end of file
@@ -0,0 +1,4 @@
+Here is the timestamped transcript of a video or audio file:
+{{ transcript }}
+
+End of transcript.
\ No newline at end of file
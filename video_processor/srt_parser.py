@@ -1,9 +1,115 @@
 """
 srt_parser.py
 
-Convert raw SRT text into timestamped plain-text lines.
+Convert raw SRT (or WebVTT) text into timestamped plain-text lines.
+
+Cues are parsed in one pass straight from the input (a str or bytes) without
+building per-cue objects. The parser is tolerant
+of what yt-dlp and hand-edited files produce: missing or bogus index lines,
+missing blank lines between cues, CRLF line ends, a BOM, '.' instead of ','
+in timestamps, VTT headers, cue settings and inline tags, and empty cues.
+Anything that is not a timing line or cue text is skipped.
 """
-import srt
+import html
+import re
+
+# A timing line: start timestamp (hours optional for VTT), '-->', the rest of the line
+_TIMING = r"(?m)^[ \t]*(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?[ \t]*-->[^\r\n]*"
+# The same, also capturing the end timestamp when it is readable (only parsed when asked for)
+_TIMING_ENDS = _TIMING.replace("-->", r"-->(?:[ \t]*(?:(\d+):)?(\d{1,2}):(\d{1,2})(?:[,.](\d{1,3}))?)?")
+_TIMING_STR = re.compile(_TIMING)
+_TIMING_BYTES = re.compile(_TIMING.encode("ascii"))
+_TIMING_ENDS_STR = re.compile(_TIMING_ENDS)
+_TIMING_ENDS_BYTES = re.compile(_TIMING_ENDS.encode("ascii"))
+# VTT inline markup: <c>, <i>, <00:00:01.280> word timings, voice spans
+_VTT_TAG = re.compile(r"<[^>]*>")
+
+
+def _is_vtt(data) -> bool:
+    head = data[:16]
+    if not isinstance(head, str):
+        head = bytes(head).decode("utf-8", errors="replace")
+    return head.lstrip("\ufeff").startswith("WEBVTT")
+
+
+def iter_cues(data, ends: bool = False):
+    """
+    Yield (start_seconds, text) for each non-empty cue in DATA, in file order;
+    with ENDS, (start_seconds, end_seconds, text), where the end is None when
+    the timing line has no readable end timestamp.
+
+    DATA may be a str, bytes, or any buffer supporting regex search (mmap).
+    Multi-line cue text is joined with spaces; for WebVTT, inline tags are
+    removed and HTML entities decoded.
+    """
+    is_text = isinstance(data, str)
+    if ends:
+        timing = _TIMING_ENDS_STR if is_text else _TIMING_ENDS_BYTES
+    else:
+        timing = _TIMING_STR if is_text else _TIMING_BYTES
+    vtt = _is_vtt(data)
+    end = len(data)
+    previous = None
+    for match in timing.finditer(data):
+        if previous is not None:
+            cue = _cue(data, previous, match.start(), is_text, vtt, last=False, ends=ends)
+            if cue is not None:
+                yield cue
+        previous = match
+    if previous is not None:
+        cue = _cue(data, previous, end, is_text, vtt, last=True, ends=ends)
+        if cue is not None:
+            yield cue
+
+
+def _seconds(hours, minutes, seconds, millis, is_text: bool) -> float:
+    value = int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+    if millis:
+        value += int(millis.ljust(3, "0" if is_text else b"0")) / 1000
+    return value
+
+
+def _cue(data, match, stop: int, is_text: bool, vtt: bool, last: bool, ends: bool = False):
+    groups = match.groups()
+    start = _seconds(*groups[:4], is_text)
+    body = data[match.end():stop]
+    if not is_text:
+        body = bytes(body).decode("utf-8", errors="replace")
+    lines = []
+    terminated = False
+    # The first piece is the (empty) remainder of the timing line
+    for line in body.splitlines()[1:]:
+        line = line.strip()
+        if not line:
+            terminated = True
+            break
+        lines.append(line)
+    # Without a blank line before the next cue, its index line ends up here
+    if not terminated and not last and lines and lines[-1].isdigit():
+        lines.pop()
+    if vtt:
+        lines = [html.unescape(_VTT_TAG.sub("", line)).strip() for line in lines]
+        lines = [line for line in lines if line]
+    if not lines:
+        return None
+    if ends:
+        cue_end = _seconds(*groups[4:], is_text) if groups[5] is not None else None
+        return start, cue_end, " ".join(lines)
+    return start, " ".join(lines)
+
+
+def format_timestamp(seconds: float) -> str:
+    """Whole seconds as HH:MM:SS (fractions are truncated)."""
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{hours:02}:{minutes:02}:{secs:02}"
+
+
+def timestamped_lines(data):
+    """Yield '[HH:MM:SS] text' for each cue in DATA (see iter_cues)."""
+    for start, text in iter_cues(data):
+        yield f"[{format_timestamp(start)}] {text}"
+
 
 def srt_to_timestamped_lines(srt_text: str) -> str:
     """
@@ -11,13 +117,4 @@ def srt_to_timestamped_lines(srt_text: str) -> str:
         [HH:MM:SS] subtitle text
     one per subtitle segment.
     """
-    subs = list(srt.parse(srt_text))
-    lines = []
-    for sub in subs:
-        start = sub.start
-        hours, remainder = divmod(int(start.total_seconds()), 3600)
-        minutes, seconds = divmod(remainder, 60)
-        ts = f"{hours:02}:{minutes:02}:{seconds:02}"
-        text = " ".join(sub.content.splitlines())
-        lines.append(f"[{ts}] {text}")
-    return "\n".join(lines)
\ No newline at end of file
+    return "\n".join(timestamped_lines(srt_text))
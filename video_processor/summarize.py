@@ -0,0 +1,115 @@
+"""
+summarize.py
+
+Map-reduce summarization for transcripts too long for a single prompt: the
+timestamped transcript is split into token-budgeted windows on line
+boundaries, each window is summarized concurrently, and a reduce pass merges
+the partial notes into the standard "Flow of Content" / "Executive Summary"
+document.
+"""
+import sys
+import asyncio
+
+from .llm_client import chat, achat, load_template
+from .tokens import count_tokens
+
+# Upper bound on OUTPUT tokens for each map call; notes are much shorter than the final summary
+MAP_MAX_TOKENS = 4000
+
+
+def split_transcript(timestamped: str, token_budget: int, backend: str = None, model: str = "") -> list:
+    """
+    Split timestamped transcript lines into windows of at most TOKEN_BUDGET
+    tokens each (counted as the planner counts them for BACKEND/MODEL, see
+    tokens.count_tokens), never breaking a line. A single line longer than the
+    budget becomes its own window.
+    """
+    windows = []
+    current = []
+    current_tokens = 0
+    for line in timestamped.splitlines():
+        line_tokens = count_tokens(line, backend, model) + 1
+        if current and current_tokens + line_tokens > token_budget:
+            windows.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+def map_reduce_summarize(
+    timestamped: str,
+    *,
+    model: str,
+    temperature: float = 0.0,
+    max_tokens: int = 10000,
+    window_tokens: int = 8000,
+    concurrency: int = 4,
+    debug: bool = False,
+    use_cache: bool = True,
+    on_token=None,
+    stats: dict = None,
+    backend: str = None,
+    reduce_template: str = "reduce.tpl",
+    windows: list = None,
+) -> tuple:
+    """
+    Summarize TIMESTAMPED in windows of WINDOW_TOKENS, running up to CONCURRENCY
+    map calls at once, then reduce the notes into the final Markdown with
+    REDUCE_TEMPLATE. ON_TOKEN and STATS apply to the reduce call, whose output is
+    the final document. BACKEND selects the LLM backend for every call (default: see chat()).
+    WINDOWS, if the caller already split TIMESTAMPED (see split_transcript), are used as they are.
+
+    Returns:
+        tuple[str, bool]: (markdown, was_truncated) — truncated if any call was.
+    """
+    if windows is None:
+        windows = split_transcript(timestamped, window_tokens, backend, model)
+    print(f".. Map-reduce: {len(windows)} windows of <= {window_tokens} tokens, concurrency={concurrency}", file=sys.stderr)
+    map_template = load_template("map.tpl")
+    map_tokens = min(max_tokens, MAP_MAX_TOKENS)
+
+    async def summarize_window(index: int, window: str, gate: asyncio.Semaphore):
+        prompt = (
+            map_template
+            .replace("{{ part }}", str(index))
+            .replace("{{ parts }}", str(len(windows)))
+            .replace("{{ transcript }}", window)
+        )
+        async with gate:
+            notes, truncated = await achat(
+                prompt, model=model, temperature=temperature, debug=debug, max_tokens=map_tokens, use_cache=use_cache,
+                backend=backend,
+            )
+        print(f".. Map {index}/{len(windows)} done (length={len(notes)} chars)", file=sys.stderr)
+        return notes, truncated
+
+    async def run_map():
+        gate = asyncio.Semaphore(max(1, concurrency))
+        return await asyncio.gather(
+            *(summarize_window(i, w, gate) for i, w in enumerate(windows, start=1))
+        )
+
+    mapped = asyncio.run(run_map())
+
+    was_truncated = any(truncated for _, truncated in mapped)
+    notes = "\n\n".join(
+        f"## Part {i} of {len(windows)}\n{text.strip()}" for i, (text, _) in enumerate(mapped, start=1)
+    )
+    if debug:
+        print(f"__ Map-reduce: reduce input ~{count_tokens(notes, backend, model)} tokens", file=sys.stderr)
+    reduce_prompt = load_template(reduce_template)
+    context = None
+    if "{{ transcript }}" in reduce_prompt:
+        reduce_prompt = reduce_prompt.replace("{{ transcript }}", notes)
+    else:
+        # Instruction-only templates (see pipeline.build_prompt_parts) take the notes as a leading context
+        context = load_template("transcript.tpl").replace("{{ transcript }}", notes)
+    md, truncated = chat(
+        reduce_prompt, context=context, model=model, temperature=temperature, debug=debug, max_tokens=max_tokens, use_cache=use_cache,
+        on_token=on_token, stats=stats, backend=backend,
+    )
+    return md, was_truncated or truncated
@@ -0,0 +1,188 @@
+"""
+tokens.py
+
+Pre-flight token accounting. Prompt tokens are counted with the model's own
+tokenizer where one is available locally (tiktoken for OpenAI models) and
+with a conservative text-shape estimate otherwise (Anthropic and Ollama
+models have no offline tokenizer here). The count is checked against a table
+of context windows and output limits, so the pipeline can decide before any
+network call whether a request fits, needs its captions compacted, or needs
+to be split into map-reduce windows.
+"""
+import functools
+import math
+import re
+
+# Context window and maximum output tokens by model-name prefix; the longest matching prefix wins
+MODEL_LIMITS = {
+    # Anthropic
+    "claude-opus-4": (200_000, 32_000),
+    "claude-sonnet-4": (200_000, 64_000),
+    "claude-haiku-4": (200_000, 64_000),
+    "claude-3-7-sonnet": (200_000, 64_000),
+    "claude-3-5-sonnet": (200_000, 8_192),
+    "claude-3-5-haiku": (200_000, 8_192),
+    "claude-3": (200_000, 4_096),
+    # OpenAI
+    "gpt-5": (400_000, 128_000),
+    "gpt-4.1": (1_047_576, 32_768),
+    "gpt-4o": (128_000, 16_384),
+    "gpt-4-turbo": (128_000, 4_096),
+    "gpt-4": (8_192, 8_192),
+    "gpt-3.5-turbo": (16_385, 4_096),
+    "o1": (200_000, 100_000),
+    "o3": (200_000, 100_000),
+    "o4-mini": (200_000, 100_000),
+    # Ollama model families (native context; requests are sized up to OLLAMA_MAX_CTX)
+    "llama3.1": (131_072, None),
+    "llama3.2": (131_072, None),
+    "llama3.3": (131_072, None),
+    "llama3": (8_192, None),
+    "deepseek-r1": (131_072, None),
+    "qwen3": (40_960, None),
+    "qwen2.5": (32_768, None),
+    "mistral": (32_768, None),
+    "mixtral": (32_768, None),
+    "gemma3": (131_072, None),
+    "gemma2": (8_192, None),
+    "phi4": (16_384, None),
+    "phi3": (131_072, None),
+    "gpt-oss": (131_072, None),
+}
+
+# Timestamped caption tokens per second of speech (~150 words a minute plus a timestamp every few seconds)
+SPEECH_TOKENS_PER_SECOND = 5
+
+# Characters per token for the estimate; Claude's tokenizer packs slightly fewer characters per token
+_CHARS_PER_TOKEN = {"anthropic": 3.5, "openai": 4.0, "ollama": 3.8}
+
+# Tokenizers split digits, punctuation and symbols finely; timestamps like [01:02:03] cost ~9 tokens
+_PIECES = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]")
+
+
+def model_limits(model: str) -> tuple:
+    """(context_window, max_output) for MODEL, or (None, None) when unknown."""
+    name = model.lower().split("/")[-1]
+    best = None
+    for prefix in MODEL_LIMITS:
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return MODEL_LIMITS[best] if best else (None, None)
+
+
+@functools.lru_cache(maxsize=None)
+def _tiktoken_encoding(model: str):
+    """
+    The tiktoken encoding for MODEL, loaded once; None if tiktoken is not
+    installed or its vocabulary cannot be loaded (it is downloaded on first
+    use, which fails offline or behind a proxy). Failures are cached too.
+    """
+    try:
+        import tiktoken
+    except ModuleNotFoundError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            # Newer models share the GPT-4o vocabulary
+            legacy = model.startswith(("gpt-4-", "gpt-3.5")) or model == "gpt-4"
+            return tiktoken.get_encoding("cl100k_base" if legacy else "o200k_base")
+    except Exception as e:
+        import sys
+
+        print(f"** tiktoken vocabulary for {model} unavailable ({type(e).__name__}: {e}); estimating tokens", file=sys.stderr)
+        return None
+
+
+def tokenizer_name(backend: str, model: str) -> str:
+    if backend == "openai":
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return f"tiktoken:{encoding.name}"
+    return "estimate"
+
+
+def estimate_tokens(text: str, backend: str = "ollama") -> int:
+    """
+    Tokenizer-free estimate: the larger of a characters-per-token ratio and the
+    number of word/number/punctuation pieces, which dominates for timestamped lines.
+    """
+    by_chars = len(text) / _CHARS_PER_TOKEN.get(backend, 4.0)
+    return int(math.ceil(max(by_chars, len(_PIECES.findall(text)))))
+
+
+def count_tokens(text: str, backend: str, model: str) -> int:
+    """Tokens in TEXT for BACKEND/MODEL: exact with tiktoken for OpenAI models, estimated otherwise."""
+    if backend == "openai":
+        encoding = _tiktoken_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+    return estimate_tokens(text, backend)
+
+
+def plan_request(prompt_tokens: int, backend: str, model: str, max_tokens: int, num_ctx: int = None) -> dict:
+    """
+    Check PROMPT_TOKENS plus the output reservation (MAX_TOKENS, capped at the
+    model's output limit) against the context window of BACKEND/MODEL. For Ollama
+    the window is the served context NUM_CTX when smaller than the model's own.
+
+    Returns:
+        dict: 'prompt_tokens', 'output_tokens', 'context_window', 'max_output',
+        'available' (prompt tokens that fit) and 'fits' (None if the window is unknown).
+    """
+    window, max_output = model_limits(model)
+    if backend == "ollama" and num_ctx:
+        window = min(window, num_ctx) if window else num_ctx
+    if max_output:
+        output_tokens = min(max_tokens, max_output)
+    else:
+        # No fixed output limit (Ollama generates within num_ctx): reserve up to a quarter of the window
+        output_tokens = min(max_tokens, window // 4) if window else max_tokens
+    plan = {
+        "backend": backend,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "max_tokens": max_tokens,
+        "context_window": window,
+        "max_output": max_output,
+        "available": None,
+        "fits": None,
+    }
+    if window:
+        # The prompt and the output share the window
+        plan["available"] = max(0, window - output_tokens)
+        plan["fits"] = prompt_tokens <= plan["available"]
+    return plan
+
+
+def ollama_num_ctx(prompt_tokens: int, max_tokens: int, model: str, floor: int, ceiling: int, loaded: int = None) -> int:
+    """
+    num_ctx for a native Ollama request: room for PROMPT_TOKENS and an answer
+    of up to MAX_TOKENS (at least half of FLOOR is kept for it), doubled up
+    from FLOOR and capped at CEILING and the model's own window. Sizes stay
+    powers of two times FLOOR, and a LOADED context that is already big enough
+    is reused, because Ollama reloads the model whenever num_ctx changes.
+    """
+    window, _ = model_limits(model)
+    cap = min(window, ceiling) if window else ceiling
+    need = prompt_tokens + min(max_tokens, max(1, floor) // 2)
+    if loaded and need <= loaded <= cap:
+        return loaded
+    num_ctx = max(1, floor)
+    while num_ctx < need and num_ctx < cap:
+        num_ctx *= 2
+    return min(num_ctx, cap)
+
+
+def format_plan(plan: dict) -> str:
+    """One-line summary of a plan for the run output."""
+    window = f"{plan['context_window']:,}" if plan["context_window"] else "unknown"
+    text = (
+        f"{plan['prompt_tokens']:,} prompt tokens ({plan.get('tokenizer', 'estimate')}) + "
+        f"{plan['output_tokens']:,} output of {window} context"
+    )
+    if plan.get("decision"):
+        text += f" -> {plan['decision']}"
+    return text